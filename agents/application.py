@@ -6,81 +6,242 @@ import os
 import json
 import subprocess
 import sys
-from typing import Dict, Any, Optional
-from services.project_analyzer import ProjectAnalyzer
-from services.ai_interactor import AIInteractor
+from typing import TYPE_CHECKING, Callable, Dict, Any, List, Optional
+from services.project_context import ProjectContext
+from services.file_operator import FileOperator
+from services.change_history import ChangeHistory
+from services.project_watcher import ProjectWatcher
 from services.config import Config
+from services.failure_diagnosis import Diagnosis, FailureDiagnoser
+from services.project_index import CACHE_DIR_NAME
 from commands.project_commands import ProjectCommands
-from commands.ai_commands import AICommands
 from exceptions.project_exceptions import ProjectBaseException
 
+if TYPE_CHECKING:
+    # AI 相关模块（asyncio、HTTP 客户端等）较重，在首次需要调用模型时才导入
+    from commands.ai_commands import AICommands
+    from services.file_block_parser import FileBlock
+    from services.ai_interactor import AIInteractor
+    from services.llm_backends import LLMBackend
+    from services.response_cache import ResponseCache
+
+SYSTEM_PROMPT = (
+    "你是一位资深的UI开发工程师和UX设计师，精通前端架构、交互设计、用户体验优化。"
+    "你的任务是根据项目结构和用户需求，提出专业的分析、建议，并生成高质量、可直接应用的代码。"
+    "在输出时请遵循如下要求：\n"
+    "1. 代码需完整、规范、易维护。\n"
+    "2. 回答要简明扼要，避免无关内容。\n"
+    "项目结构会在每次请求中给出。"
+)
+
 
 class UIProjectAgent:
-    def __init__(self, project_path: str):
+    def __init__(self, project_path: str, backend: Optional['LLMBackend'] = None):
         self.project_path = os.path.abspath(project_path)
-        self.analyzer = ProjectAnalyzer(project_path)
+        # 所有命令共享同一个分析上下文，package.json 等只解析一次
+        self.context = ProjectContext(project_path)
+        self.analyzer = self.context.analyzer
+        # 所有组件共用同一个配置对象
         self.config = Config()
-        self.ai = AIInteractor()
-        self.ai.set_agent(self)  # 设置 agent 引用
+        self._backend = backend
+        self._ai: Optional['AIInteractor'] = None
+        self._ai_commands: Optional['AICommands'] = None
+        self.response_cache: Optional['ResponseCache'] = None
         self.project_info: Dict[str, Any] = {}
         self.context_initialized = False
-        self.project_commands = ProjectCommands(project_path)
-        self.ai_commands = AICommands(self.ai, project_path, self.analyzer)
+        # 应用到项目的修改按修改集记录，可跨多轮撤销/重做
+        self.history = ChangeHistory(self.project_path)
+        self.project_commands = ProjectCommands(project_path, self.context, self.config)
+        self.watcher: Optional[ProjectWatcher] = None
+
+    @property
+    def ai(self) -> 'AIInteractor':
+        """AI交互对象，首次使用时才导入并创建"""
+        if self._ai is None:
+            from services.ai_interactor import AIInteractor
+            from services.response_cache import ResponseCache
+
+            ai = AIInteractor(backend=self._backend, config=self.config)
+            ai.set_agent(self)  # 设置 agent 引用
+            if self.config.response_cache:
+                # 回复缓存键包含项目文件内容指纹，文件变化后旧回复不会命中
+                self.response_cache = ResponseCache(
+                    os.path.join(self.project_path, CACHE_DIR_NAME, 'responses'),
+                    ttl=self.config.response_cache_ttl,
+                    max_bytes=self.config.response_cache_max_bytes
+                )
+                ai.set_response_cache(self.response_cache, self.context.get_content_fingerprint)
+            self._ai = ai
+        return self._ai
+
+    @property
+    def ai_commands(self) -> 'AICommands':
+        """AI相关命令，首次使用时才导入并创建"""
+        if self._ai_commands is None:
+            from commands.ai_commands import AICommands
+
+            self._ai_commands = AICommands(self.ai, self.project_path, self.context, self.history)
+        return self._ai_commands
+
+    def start_watching(self) -> None:
+        """
+        启动后台项目监视，使项目结构在后台保持最新
+        """
+        if self.config.watch_mode == "off" or self.watcher is not None:
+            return
+        self.watcher = ProjectWatcher(
+            self.analyzer,
+            mode=self.config.watch_mode,
+            interval=self.config.watch_interval
+        )
+        self.watcher.add_listener(self.context.invalidate)
+        self.watcher.start()
+
+    def stop_watching(self) -> None:
+        """
+        停止后台项目监视
+        """
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
 
     def analyze_project(self) -> None:
         """
         分析项目结构
         """
         try:
-            self.project_info = self.analyzer.analyze()
+            self.project_info = self.context.get_project_info()
             if not self.context_initialized:
-                self.ai.messages.append({
-                    "role": "system",
-                    "content": (
-                        "你是一位资深的UI开发工程师和UX设计师，精通前端架构、交互设计、用户体验优化。"
-                        "你的任务是根据项目结构和用户需求，提出专业的分析、建议，并生成高质量、可直接应用的代码。"
-                        "在输出时请遵循如下要求：\n"
-                        "1. 代码需完整、规范、易维护。\n"
-                        "2. 回答要简明扼要，避免无关内容。\n"
-                        "当前项目结构如下：\n"
-                        f"{json.dumps(self.project_info, ensure_ascii=False, indent=2)}"
-                    )
-                })
+                # 系统消息只包含固定的说明，项目信息随各次提示发送，请求前缀在会话间保持不变
+                self.ai.messages.append({"role": "system", "content": SYSTEM_PROMPT})
                 self.context_initialized = True
         except Exception as e:
             raise ProjectBaseException(f"分析项目时出错: {str(e)}")
 
-    def modify_project(self, user_requirement: str) -> None:
+    def modify_project(
+        self,
+        user_requirement: str,
+        use_cache: bool = True,
+        apply_policy: Optional[Callable[[List['FileBlock']], bool]] = None
+    ) -> Dict[str, Any]:
         """
         根据用户需求修改项目
+
+        Args:
+            user_requirement: 用户需求
+            use_cache: 为False时跳过模型回复缓存，强制重新生成
+            apply_policy: 根据暂存的修改决定是否应用的函数，为None时询问用户
+
+        Returns:
+            Dict[str, Any]: 本次需求的结果，见 AICommands.modify_project
         """
         try:
             self.analyze_project()
             self.ai_commands.project_info = self.project_info
-            self.ai_commands.modify_project(user_requirement)
+            if self.response_cache is not None:
+                self.response_cache.bypass = not use_cache
+            try:
+                return self.ai_commands.modify_project(user_requirement, apply_policy)
+            finally:
+                if self.response_cache is not None:
+                    self.response_cache.bypass = False
         except Exception as e:
             raise ProjectBaseException(f"修改项目时出错: {str(e)}")
 
+    def undo_changes(self, count: int = 1) -> None:
+        """
+        撤销最近应用的若干次修改
+
+        Args:
+            count: 撤销的修改次数
+        """
+        try:
+            restored = self.history.undo(count)
+        except Exception as e:
+            raise ProjectBaseException(f"撤销修改时出错: {str(e)}")
+        if not restored:
+            print("没有可以撤销的修改。")
+            return
+        print("已撤销，恢复了以下文件：")
+        for path in restored:
+            print(f"  {path}")
+
+    def redo_changes(self, count: int = 1) -> None:
+        """
+        重做最近撤销的若干次修改
+
+        Args:
+            count: 重做的修改次数
+        """
+        try:
+            restored = self.history.redo(count)
+        except Exception as e:
+            raise ProjectBaseException(f"重做修改时出错: {str(e)}")
+        if not restored:
+            print("没有可以重做的修改。")
+            return
+        print("已重做，恢复了以下文件：")
+        for path in restored:
+            print(f"  {path}")
+
+    def show_change_history(self) -> None:
+        """打印最近的修改记录"""
+        print(self.history.format_history())
+
     def check_project_runnable(self) -> tuple[bool, str]:
         """检查项目是否可以运行"""
         return self.project_commands.check_project_runnable()
 
-    def install_dependencies(self) -> bool:
-        """安装项目依赖"""
-        return self.project_commands.install_dependencies()
+    def install_dependencies(self, force: bool = False) -> bool:
+        """安装项目依赖，force 为True时忽略安装记录重新安装"""
+        return self.project_commands.install_dependencies(force)
 
     def run_project(self) -> None:
-        """运行项目"""
-        self.project_commands.run_project()
+        """运行项目，启动出错时自动分析原因"""
+        self._report_project_error(self.project_commands.run_project())
+
+    def restart_project(self) -> None:
+        """重启项目，启动出错时自动分析原因"""
+        self._report_project_error(self.project_commands.restart_project())
 
     def stop_project(self) -> None:
         """停止正在运行的项目"""
         self.project_commands.stop_project()
 
+    def show_project_logs(self, count: int = 50) -> None:
+        """打印项目最近的输出"""
+        self.project_commands.show_logs(count)
+
+    def report_project_errors(self) -> None:
+        """检查运行中的项目是否出现了新的错误（如修改后热更新编译失败），有则自动分析"""
+        self._report_project_error(self.project_commands.take_project_error())
+
+    def _report_project_error(self, error: Optional[str]) -> None:
+        """打印开发服务器的错误输出并交给AI分析原因"""
+        if not error:
+            return
+        print(f"项目运行出错：\n{error}")
+        print(f"分析结果: {self.diagnose_failure(error).format()}")
+
     def analyze_failure_reason(self, message: str) -> str:
         """分析项目无法运行的原因"""
         return self.ai_commands.analyze_failure_reason(message)
 
+    def diagnose_failure(self, message: str) -> Diagnosis:
+        """诊断项目无法运行的原因，本地规则无法判断时才请AI分析"""
+        diagnosis = FailureDiagnoser(self.project_path).diagnose(message)
+        if diagnosis is not None:
+            return diagnosis
+        return self.ai_commands.diagnose_failure_with_ai(message)
+
+    def print_session_stats(self) -> None:
+        """打印本次会话的模型回复缓存和请求前缀复用统计（未调用过模型时不打印）"""
+        if self._ai is None:
+            return
+        if self.response_cache is not None:
+            print(self.response_cache.format_stats())
+        print(self._ai.prefix_tracker.format_stats())
+
     def _execute_action(self, action_name: str, args: list) -> str:
         """
         执行特定行动
@@ -100,13 +261,27 @@ class UIProjectAgent:
                 else:
                     return f"文件 {file_path} 不存在"
                     
+            elif action_name in ("dependencies_of", "dependents_of") and args:
+                file_path = os.path.relpath(os.path.join(self.project_path, args[0]), self.project_path).replace('\\', '/')
+                graph = self.context.get_module_graph()
+                if action_name == "dependencies_of":
+                    related, relation = graph.dependencies_of(file_path), "导入的项目文件"
+                else:
+                    related, relation = graph.dependents_of(file_path), "导入了该文件的项目文件"
+                if not related:
+                    return f"没有找到 {file_path} {relation}"
+                return f"{file_path} {relation}:\n" + '\n'.join(related)
+
             elif action_name == "write_file" and len(args) >= 2:
                 file_path = args[0]
                 content = args[1] if len(args) == 2 else ' '.join(args[1:])
+                if self._ai_commands is not None and self._ai_commands.stage_write(file_path, content):
+                    # 由应用策略决定是否写入（例如批量模式只生成不应用）
+                    return f"文件 {file_path} 的内容已暂存，将与其他修改一起应用"
                 abs_path = os.path.join(self.project_path, file_path)
-                os.makedirs(os.path.dirname(abs_path), exist_ok=True)
-                with open(abs_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
+                FileOperator.write_code_to_file(
+                    abs_path, content, self.project_path, self.history, f"write_file {file_path}"
+                )
                 return f"文件 {file_path} 已写入"
                 
             else:
@@ -115,14 +290,23 @@ class UIProjectAgent:
             return f"执行行动时出错: {str(e)}"
 
 
-def main():
+def main(project_path: Optional[str] = None):
+    """
+    命令行交互入口
+
+    Args:
+        project_path: 项目根目录，为None时提示输入
+    """
     try:
-        project_path = input("请输入你的UI项目根目录路径：").strip()
+        if project_path is None:
+            project_path = input("请输入你的UI项目根目录路径：").strip()
         if not os.path.isdir(project_path):
             print("项目路径不存在！")
             return
         
         agent = UIProjectAgent(project_path=project_path)
+        # 后台分析项目结构，之后的需求无需等待重新扫描
+        agent.start_watching()
         
         # 检查项目是否可以运行
         runnable, message = agent.check_project_runnable()
@@ -133,31 +317,66 @@ def main():
                 agent.run_project()
         else:
             print(f"项目暂时无法运行: {message}")
-            # 让AI分析具体原因
-            analysis_result = agent.analyze_failure_reason(message)
-            print(f"分析结果: {analysis_result}")
+            # 先用本地规则诊断，无法判断时再让AI分析具体原因
+            diagnosis = agent.diagnose_failure(message)
+            print(f"分析结果: {diagnosis.format()}")
             
-            # 根据AI分析结果决定下一步操作
-            if "依赖问题" in analysis_result or "依赖" in analysis_result:
+            # 根据诊断结论决定下一步操作
+            if diagnosis.is_dependency_problem:
                 install_choice = input("是否要安装项目依赖？(y/n): ").strip().lower()
                 if install_choice == 'y':
-                    if agent.install_dependencies():
+                    # 诊断已确认依赖有问题，安装记录不可信，必须重新安装
+                    if agent.install_dependencies(force=True):
                         run_choice = input("依赖安装成功，是否要运行项目？(y/n): ").strip().lower()
                         if run_choice == 'y':
                             agent.run_project()
             else:
-                # 如果不是依赖问题，则已经由AI给出了详细解释，用户可以自行决定是否继续
+                # 如果不是依赖问题，则已经给出了具体说明，用户可以自行决定是否继续
                 pass
         
         # 然后进行项目分析并进入修改模式
-        print("\n输入你的新需求，exit 退出")
+        print(
+            "\n输入你的新需求，以 ! 开头表示不使用缓存的回复、重新生成；"
+            "undo [N] 撤销最近 N 次修改，redo [N] 重做，history 查看修改记录，"
+            "logs [N] 查看项目输出，restart 重启项目，stop 停止项目，exit 退出"
+        )
         while True:
+            # 上一次修改触发的热更新如果编译失败，在这里自动分析
+            agent.report_project_errors()
             user_input = input("你的需求：").strip()
             if user_input.lower() == "exit":
                 # 停止正在运行的项目
                 agent.stop_project()
+                agent.stop_watching()
+                agent.print_session_stats()
                 break
-            agent.modify_project(user_input)
+            command, _, argument = user_input.lower().partition(' ')
+            if command in ("undo", "redo", "rollback") and (not argument or argument.strip().isdigit()):
+                try:
+                    count = int(argument) if argument else 1
+                    if command == "redo":
+                        agent.redo_changes(count)
+                    else:
+                        agent.undo_changes(count)
+                except ProjectBaseException as e:
+                    print(e.message)
+                continue
+            if user_input.lower() == "history":
+                agent.show_change_history()
+                continue
+            if command == "logs" and (not argument or argument.strip().isdigit()):
+                agent.show_project_logs(int(argument) if argument else 50)
+                continue
+            if user_input.lower() == "restart":
+                agent.restart_project()
+                continue
+            if user_input.lower() == "stop":
+                agent.stop_project()
+                continue
+            if user_input.startswith('!'):
+                agent.modify_project(user_input[1:].strip(), use_cache=False)
+            else:
+                agent.modify_project(user_input)
     
     except KeyboardInterrupt:
         print("\n程序被用户中断")
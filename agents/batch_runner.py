@@ -0,0 +1,215 @@
+"""
+批量运行模块
+
+无交互地处理 JSONL 文件中的需求队列，每行一个任务：
+    {"id": "可选", "project": "项目路径", "requirement": "需求", "apply": "可选的应用策略"}
+
+同一项目的任务在同一个工作进程中按顺序执行（共享分析结果和修改历史），不同
+项目的任务在多个工作进程中并行执行。每个任务输出一行 JSON 结果记录，包括状态、
+修改的文件和各阶段耗时。
+"""
+
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+from typing import Any, Callable, Dict, IO, Iterable, List, Optional, Tuple
+
+# 应用策略：根据暂存的修改决定是否写入项目
+APPLY_POLICIES: Dict[str, Callable[[List[Any]], bool]] = {
+    'always': lambda blocks: True,
+    'never': lambda blocks: False,
+    'no_delete': lambda blocks: not any(block.is_delete for block in blocks),
+}
+DEFAULT_APPLY_POLICY = 'no_delete'
+# 结果记录中保留的任务输出长度
+MAX_OUTPUT_CHARS = 4000
+
+
+def load_jobs(lines: Iterable[str]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    解析任务文件
+
+    Args:
+        lines: JSONL 文件的各行
+
+    Returns:
+        Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]: (有效的任务, 无效行的错误记录)
+    """
+    jobs: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            job = json.loads(line)
+            if not isinstance(job, dict):
+                raise ValueError("任务必须是 JSON 对象")
+            if not job.get('project') or not job.get('requirement'):
+                raise ValueError("任务缺少 project 或 requirement")
+            if not isinstance(job['project'], str) or not isinstance(job['requirement'], str):
+                raise ValueError("project 和 requirement 必须是字符串")
+            if job.get('apply', DEFAULT_APPLY_POLICY) not in APPLY_POLICIES:
+                raise ValueError(f"未知的应用策略: {job['apply']}")
+            job['project'] = os.path.abspath(job['project'])
+        except (ValueError, TypeError) as e:
+            # 例如 apply 为列表等不可哈希的值
+            errors.append({'id': f"line-{number}", 'status': 'invalid', 'error': str(e)})
+            continue
+        job.setdefault('id', f"line-{number}")
+        jobs.append(job)
+    return jobs, errors
+
+
+def run_project_jobs(project: str, jobs: List[Dict[str, Any]], default_policy: str) -> List[Dict[str, Any]]:
+    """
+    在当前进程中按顺序执行同一项目的任务（工作进程的入口）
+
+    Args:
+        project: 项目根路径
+        jobs: 该项目的任务
+        default_policy: 任务未指定应用策略时使用的策略
+
+    Returns:
+        List[Dict[str, Any]]: 每个任务的结果记录
+    """
+    # 在工作进程中导入，主进程只负责调度
+    from agents.application import UIProjectAgent
+
+    records = []
+    setup_started = time.perf_counter()
+    try:
+        if not os.path.isdir(project):
+            raise FileNotFoundError(f"项目路径不存在: {project}")
+        with redirect_stdout(io.StringIO()):
+            agent = UIProjectAgent(project)
+            agent.analyze_project()
+    except Exception as e:
+        return [_record(job, status='error', error=str(e)) for job in jobs]
+    setup_time = time.perf_counter() - setup_started
+
+    for job in jobs:
+        started_at = time.time()
+        started = time.perf_counter()
+        output = io.StringIO()
+        policy = APPLY_POLICIES[job.get('apply') or default_policy]
+        try:
+            with redirect_stdout(output):
+                result = agent.modify_project(job['requirement'], job.get('use_cache', True), policy)
+            record = _record(job, **result)
+        except Exception as e:
+            record = _record(job, status='error', error=str(e))
+        record.setdefault('timings', {})
+        record['timings']['wall'] = time.perf_counter() - started
+        record['timings']['setup'] = setup_time
+        record['started_at'] = started_at
+        record['output'] = output.getvalue()[-MAX_OUTPUT_CHARS:]
+        records.append(record)
+        # 只有第一个任务需要等待项目分析
+        setup_time = 0.0
+    return records
+
+
+def _record(job: Dict[str, Any], **fields: Any) -> Dict[str, Any]:
+    """生成一条结果记录，fields 中至少包含 status"""
+    record = {'id': job['id'], 'project': job['project'], 'requirement': job['requirement']}
+    record.update(fields)
+    return record
+
+
+class BatchRunner:
+    """按项目分组、多进程并行处理需求队列"""
+
+    def __init__(self, workers: Optional[int] = None, apply_policy: str = DEFAULT_APPLY_POLICY):
+        """
+        Args:
+            workers: 最多同时运行的工作进程数，默认为 CPU 核数
+            apply_policy: 任务未指定时使用的应用策略
+        """
+        if apply_policy not in APPLY_POLICIES:
+            raise ValueError(f"未知的应用策略: {apply_policy}")
+        self.workers = workers or os.cpu_count() or 1
+        self.apply_policy = apply_policy
+
+    def run(self, jobs: List[Dict[str, Any]], output: IO[str]) -> Dict[str, int]:
+        """
+        执行任务，每完成一个项目的任务就写出其结果记录
+
+        Args:
+            jobs: load_jobs 返回的有效任务
+            output: 结果记录的输出流（JSONL）
+
+        Returns:
+            Dict[str, int]: 各状态的任务数
+        """
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        for job in jobs:
+            groups.setdefault(job['project'], []).append(job)
+
+        counts: Dict[str, int] = {}
+        workers = min(self.workers, len(groups)) or 1
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(run_project_jobs, project, project_jobs, self.apply_policy): project_jobs
+                for project, project_jobs in groups.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    records = future.result()
+                except Exception as e:
+                    # 工作进程异常退出
+                    records = [_record(job, status='error', error=str(e)) for job in futures[future]]
+                for record in records:
+                    self._write(output, record)
+                    counts[record['status']] = counts.get(record['status'], 0) + 1
+        return counts
+
+    @staticmethod
+    def _write(output: IO[str], record: Dict[str, Any]) -> None:
+        output.write(json.dumps(record, ensure_ascii=False) + '\n')
+        output.flush()
+
+
+def run_batch(
+    jobs_path: str,
+    output_path: Optional[str] = None,
+    workers: Optional[int] = None,
+    apply_policy: str = DEFAULT_APPLY_POLICY
+) -> int:
+    """
+    批量模式入口
+
+    Args:
+        jobs_path: 任务文件（JSONL）
+        output_path: 结果文件（JSONL），为None时输出到标准输出
+        workers: 最多同时运行的工作进程数
+        apply_policy: 任务未指定时使用的应用策略
+
+    Returns:
+        int: 进程退出码，有任务失败时为1
+    """
+    try:
+        with open(jobs_path, 'r', encoding='utf-8') as f:
+            jobs, errors = load_jobs(f)
+    except OSError as e:
+        print(f"无法读取任务文件: {str(e)}", file=sys.stderr)
+        return 1
+
+    output = open(output_path, 'w', encoding='utf-8') if output_path else sys.stdout
+    try:
+        for record in errors:
+            BatchRunner._write(output, record)
+        started = time.perf_counter()
+        counts = BatchRunner(workers, apply_policy).run(jobs, output) if jobs else {}
+    finally:
+        if output_path:
+            output.close()
+
+    for record in errors:
+        counts[record['status']] = counts.get(record['status'], 0) + 1
+    summary = '，'.join(f"{status} {count}" for status, count in sorted(counts.items()))
+    print(f"共 {len(jobs) + len(errors)} 个任务，用时 {time.perf_counter() - started:.1f} 秒：{summary}", file=sys.stderr)
+    return 1 if any(status in ('error', 'invalid', 'failed') for status in counts) else 0
@@ -0,0 +1,92 @@
+"""
+整文件模式与补丁模式的输出量基准测试
+
+对不同大小的文件做一次单行修改，比较两种模式下模型需要输出的token数，
+以及在模拟输出速率下的单次修改耗时（首字延迟 + 输出token数 / 输出速率
++ 本地解析与应用耗时，本地部分为实测值）。
+
+运行方式（在仓库根目录下）：
+    python -m benchmarks.bench_edit_modes
+"""
+
+import os
+import shutil
+import tempfile
+import time
+
+from services.file_block_parser import parse_file_blocks
+from services.file_operator import FileOperator
+from services.patch_applier import is_patch
+from utils.helpers import estimate_tokens
+
+LATENCY = 0.5
+TOKEN_RATE = 60.0
+
+
+def build_component(lines: int) -> str:
+    """生成指定行数的组件代码"""
+    body = '\n'.join(f"      <Item key=\"{i}\" label=\"label-{i}\" value={{{i}}} />" for i in range(lines))
+    return f"export default function List() {{\n  return (\n    <div>\n{body}\n    </div>\n  );\n}}\n"
+
+
+def whole_response(path: str, content: str) -> str:
+    """整文件模式的回复"""
+    return f"---file-start---\n{path}\n---code-start---\n{content}\n---code-end---\n---file-end---"
+
+
+def patch_response(path: str, old: str, new: str) -> str:
+    """补丁模式的回复：一个带上下文的片段"""
+    return (
+        f"---file-start---\n{path}\n---code-start---\n"
+        f"<<<<<<< SEARCH\n{old}\n=======\n{new}\n>>>>>>> REPLACE\n"
+        "---code-end---\n---file-end---"
+    )
+
+
+def local_apply_time(project: str, response: str) -> float:
+    """实测解析回复并得到新文件内容的耗时（秒）"""
+    start = time.perf_counter()
+    for block in parse_file_blocks(response):
+        abs_path = os.path.join(project, block.path)
+        if is_patch(block.code):
+            FileOperator.apply_patch(abs_path, block.code, project)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    root = tempfile.mkdtemp(prefix='edit_bench_')
+    try:
+        print(f"模拟模型: 首字延迟 {LATENCY}s，输出 {TOKEN_RATE:.0f} token/s")
+        print(f"{'文件行数':>8} {'整文件token':>11} {'补丁token':>9} {'整文件耗时':>10} {'补丁耗时':>8}")
+        for lines in [100, 500, 2000]:
+            path = f'src/List{lines}.jsx'
+            abs_path = os.path.join(root, path)
+            os.makedirs(os.path.dirname(abs_path), exist_ok=True)
+            original = build_component(lines)
+            with open(abs_path, 'w', encoding='utf-8') as f:
+                f.write(original)
+
+            target = lines // 2
+            old_line = f"      <Item key=\"{target}\" label=\"label-{target}\" value={{{target}}} />"
+            new_line = f"      <Item key=\"{target}\" label=\"新标签\" value={{{target}}} />"
+            context_before = f"      <Item key=\"{target - 1}\" label=\"label-{target - 1}\" value={{{target - 1}}} />"
+            context_after = f"      <Item key=\"{target + 1}\" label=\"label-{target + 1}\" value={{{target + 1}}} />"
+
+            whole = whole_response(path, original.replace(old_line, new_line))
+            patch = patch_response(
+                path,
+                '\n'.join([context_before, old_line, context_after]),
+                '\n'.join([context_before, new_line, context_after])
+            )
+
+            whole_tokens = estimate_tokens(whole)
+            patch_tokens = estimate_tokens(patch)
+            whole_time = LATENCY + whole_tokens / TOKEN_RATE + local_apply_time(root, whole)
+            patch_time = LATENCY + patch_tokens / TOKEN_RATE + local_apply_time(root, patch)
+            print(f"{lines:>8} {whole_tokens:>11} {patch_tokens:>9} {whole_time:>9.1f}s {patch_time:>7.1f}s")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
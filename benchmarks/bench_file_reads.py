@@ -0,0 +1,66 @@
+"""
+修改提示文件读取基准测试
+
+在临时目录中生成一组大小不一的源文件（含少量二进制文件），对比逐个调用
+FileOperator.read_file 与 FileOperator.read_files 批量读取的耗时。
+
+运行方式（在仓库根目录下）：
+    python -m benchmarks.bench_file_reads [文件数]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from typing import List
+
+from benchmarks.bench_project_walker import best_of
+from services.file_operator import FileOperator
+
+
+def build_files(root: str, count: int) -> List[str]:
+    """生成测试文件，返回相对路径列表"""
+    paths = []
+    os.makedirs(os.path.join(root, 'src', 'components'), exist_ok=True)
+    for i in range(count):
+        if i % 10 == 9:
+            path = f'src/components/image{i}.png'
+            with open(os.path.join(root, path), 'wb') as f:
+                f.write(b'\x89PNG\r\n\x1a\n\0' + os.urandom(32 * 1024))
+        else:
+            path = f'src/components/Component{i}.jsx'
+            # 文件大小在 2KB 到约 200KB 之间
+            lines = 50 * (1 + (i % 7) ** 2)
+            with open(os.path.join(root, path), 'w', encoding='utf-8') as f:
+                f.write('\n'.join(f"  const value{j} = '组件{i}-{j}';" for j in range(lines)))
+        paths.append(path)
+    return paths
+
+
+def serial_read(root: str, paths: List[str]) -> None:
+    """旧实现：逐个读取，二进制文件读取失败"""
+    for path in paths:
+        try:
+            FileOperator.read_file(os.path.join(root, path), root)
+        except Exception:
+            pass
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    root = tempfile.mkdtemp(prefix='file_reads_bench_')
+    try:
+        paths = build_files(root, count)
+        serial = best_of(lambda: serial_read(root, paths), 5)
+        batch = best_of(lambda: FileOperator.read_files(paths, root), 5)
+        results = FileOperator.read_files(paths, root)
+        skipped = sum(1 for result in results if result.skipped)
+        print(f"{count} 个文件（其中 {skipped} 个被跳过）")
+        print(f"逐个读取: {serial * 1000:8.2f} ms")
+        print(f"批量读取: {batch * 1000:8.2f} ms")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+modify_project 端到端离线基准测试
+
+使用 ScriptedBackend 回放固定的模型回复，在合成项目上完整运行
+UIProjectAgent.modify_project（文件列表 -> 读取文件 -> 生成修改 -> 应用）。
+先以零延迟运行测量本地开销，再以模拟的首字延迟和输出速率运行，
+从而区分本地性能回退与模型本身的波动。两种文件选择方式（AI给出文件列表、
+本地检索索引）分别测量。
+
+运行方式（在仓库根目录下）：
+    python -m benchmarks.bench_modify_pipeline [运行次数]
+"""
+
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import List, Tuple
+from unittest import mock
+
+from agents.application import UIProjectAgent
+from services.llm_backends import ScriptedBackend
+
+FILE_LIST_RESPONSE = (
+    "Thought: 需要修改按钮组件和首页\n"
+    "Final Answer: src/components/Button.jsx\nsrc/pages/Home.jsx"
+)
+
+
+def build_modification_response(lines_per_file: int) -> str:
+    """生成包含两个文件完整内容的修改回复"""
+    body = '\n'.join(f"  const value{i} = {i};" for i in range(lines_per_file))
+    blocks = []
+    for path in ['src/components/Button.jsx', 'src/pages/Home.jsx']:
+        blocks.append(
+            f"---file-start---\n{path}\n---code-start---\n"
+            f"export default function Component() {{\n{body}\n  return null;\n}}\n"
+            "---code-end---\n---file-end---"
+        )
+    return "Thought: 按需求修改\nFinal Answer:\n" + '\n'.join(blocks)
+
+
+def build_project(root: str, component_count: int = 500) -> None:
+    """生成合成前端项目"""
+    for folder in ['src/components', 'src/pages', 'src/utils']:
+        os.makedirs(os.path.join(root, folder), exist_ok=True)
+    for i in range(component_count):
+        folder = ['src/components', 'src/pages', 'src/utils'][i % 3]
+        with open(os.path.join(root, folder, f'Module{i}.jsx'), 'w', encoding='utf-8') as f:
+            f.write(f"export default function Module{i}() {{ return null; }}\n")
+    for path in ['src/components/Button.jsx', 'src/pages/Home.jsx']:
+        with open(os.path.join(root, path), 'w', encoding='utf-8') as f:
+            f.write("export default function Component() { return null; }\n")
+    with open(os.path.join(root, 'package.json'), 'w', encoding='utf-8') as f:
+        json.dump({'name': 'bench', 'scripts': {'dev': 'vite'}, 'dependencies': {'react': '^18.2.0'}}, f)
+
+
+def run_pipeline(project: str, backend: ScriptedBackend, runs: int, file_selection: str) -> Tuple[List[float], float]:
+    """运行多次 modify_project，返回每次的耗时（秒）和请求间的提示前缀复用率"""
+    agent = UIProjectAgent(project, backend=backend)
+    agent.ai.config.file_selection = file_selection
+    timings = []
+    with mock.patch('builtins.input', return_value='y'), mock.patch('builtins.print'):
+        for i in range(runs):
+            start = time.perf_counter()
+            agent.modify_project(f"把 Button 按钮和 Home 首页改成圆角 #{i}")
+            timings.append(time.perf_counter() - start)
+    agent.context.close()
+    return timings, agent.ai.prefix_tracker.reuse_ratio
+
+
+def main() -> None:
+    # 每次都要真正经过后端，关闭模型回复缓存
+    os.environ['AGENT_RESPONSE_CACHE'] = '0'
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    latency, token_rate = 0.3, 200.0
+    root = tempfile.mkdtemp(prefix='pipeline_bench_')
+    try:
+        build_project(root)
+        responses = [
+            {'match': '生成需要修改的文件列表', 'response': FILE_LIST_RESPONSE},
+            {'match': '生成具体的修改方案', 'response': build_modification_response(200)},
+        ]
+
+        for file_selection in ['react', 'retrieval']:
+            local = ScriptedBackend(responses)
+            local_timings, reuse_ratio = run_pipeline(root, local, runs, file_selection)
+
+            simulated = ScriptedBackend(responses, latency=latency, token_rate=token_rate)
+            simulated_timings, _ = run_pipeline(root, simulated, runs, file_selection)
+
+            print(f"[{file_selection}] 每次需求的模型调用次数: {local.calls // runs}，提示前缀复用率: {reuse_ratio:.0%}")
+            print(f"  本地开销（零延迟后端）: 中位数 {statistics.median(local_timings) * 1000:8.1f} ms")
+            print(
+                f"  模拟模型（首字 {latency}s，{token_rate:.0f} token/s）: "
+                f"中位数 {statistics.median(simulated_timings) * 1000:8.1f} ms"
+            )
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
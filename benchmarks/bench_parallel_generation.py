@@ -0,0 +1,139 @@
+"""
+并行生成基准测试
+
+在合成项目上用 ScriptedBackend 模拟首字延迟和输出速率，比较一次修改多个文件时
+两种生成方式的耗时：
+1. single：一次回复中依次输出所有文件；
+2. parallel：每个文件单独请求并发生成；
+3. parallel + 限流：后端同时处理的请求超过配额时返回限流错误（带 Retry-After）。
+
+运行方式（在仓库根目录下）：
+    python -m benchmarks.bench_parallel_generation [文件数]
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, Iterator, List
+from unittest import mock
+
+from agents.application import UIProjectAgent
+from exceptions.project_exceptions import RateLimitError
+from services.llm_backends import LLMBackend, ScriptedBackend
+
+LINES_PER_FILE = 60
+
+
+def file_path(index: int) -> str:
+    return f"src/components/Widget{index}.jsx"
+
+
+def file_block(index: int) -> str:
+    body = '\n'.join(f"  const value{i} = {i};" for i in range(LINES_PER_FILE))
+    return (
+        f"---file-start---\n{file_path(index)}\n---code-start---\n"
+        f"export default function Widget{index}() {{\n{body}\n  return null;\n}}\n"
+        "---code-end---\n---file-end---"
+    )
+
+
+def build_responses(file_count: int) -> List[Dict[str, str]]:
+    """文件列表、整体回复和每个文件单独的回复"""
+    paths = '\n'.join(file_path(i) for i in range(file_count))
+    responses = [
+        {'match': '生成需要修改的文件列表', 'response': f"Thought: 需要修改所有组件\nFinal Answer: {paths}"},
+        {'match': '生成具体的修改方案', 'response': "Final Answer:\n" + '\n'.join(file_block(i) for i in range(file_count))},
+    ]
+    for i in range(file_count):
+        responses.append({'match': f"本次只负责文件 {file_path(i)}，", 'response': "Final Answer:\n" + file_block(i)})
+    return responses
+
+
+def build_project(root: str, file_count: int) -> None:
+    os.makedirs(os.path.join(root, 'src/components'))
+    for i in range(file_count):
+        with open(os.path.join(root, file_path(i)), 'w', encoding='utf-8') as f:
+            f.write(f"export default function Widget{i}() {{ return null; }}\n")
+    with open(os.path.join(root, 'package.json'), 'w', encoding='utf-8') as f:
+        json.dump({'name': 'bench', 'scripts': {'dev': 'vite'}, 'dependencies': {'react': '^18.2.0'}}, f)
+
+
+class QuotaBackend(LLMBackend):
+    """同时处理的请求超过配额时返回限流错误，模拟服务端的并发配额"""
+
+    name = 'quota'
+
+    def __init__(self, inner: LLMBackend, quota: int, retry_after: float):
+        self.inner = inner
+        self.quota = quota
+        self.retry_after = retry_after
+        self.rejected = 0
+        self.peak = 0
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def stream_chat(self, model: str, messages: List[Dict[str, str]]) -> Iterator[str]:
+        with self._lock:
+            if self._active >= self.quota:
+                self.rejected += 1
+                raise RateLimitError("too many concurrent requests", self.retry_after)
+            self._active += 1
+            self.peak = max(self.peak, self._active)
+        try:
+            yield from self.inner.stream_chat(model, messages)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+
+def run_once(root: str, file_count: int, backend: LLMBackend, generation_mode: str) -> Dict:
+    build_project(root, file_count)
+    agent = UIProjectAgent(root, backend=backend)
+    agent.ai.config.file_selection = 'react'
+    agent.ai.config.edit_mode = 'whole'
+    agent.ai.config.generation_mode = generation_mode
+    start = time.perf_counter()
+    with mock.patch('builtins.print'):
+        result = agent.modify_project("修改所有 Widget 组件", apply_policy=lambda blocks: True)
+    elapsed = time.perf_counter() - start
+    agent.context.close()
+    shutil.rmtree(root)
+    if len(result['changes'].get('modified', [])) != file_count:
+        raise SystemExit(f"[{generation_mode}] 应修改 {file_count} 个文件，实际: {result}")
+    return {'elapsed': elapsed, 'result': result}
+
+
+def main() -> None:
+    # 每次都要真正经过后端，关闭模型回复缓存
+    os.environ['AGENT_RESPONSE_CACHE'] = '0'
+    file_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    latency, token_rate, quota = 0.3, 400.0, 3
+    responses = build_responses(file_count)
+    root = os.path.join(tempfile.mkdtemp(prefix='parallel_bench_'), 'project')
+    print(f"修改 {file_count} 个文件（每个约 {LINES_PER_FILE} 行），模拟首字 {latency}s、{token_rate:.0f} token/s")
+    try:
+        single = run_once(root, file_count, ScriptedBackend(responses, latency=latency, token_rate=token_rate), 'single')
+        print(f"  single:          {single['elapsed']:6.2f} s，模型调用 {single['result']['model_calls']} 次")
+
+        parallel = run_once(root, file_count, ScriptedBackend(responses, latency=latency, token_rate=token_rate), 'parallel')
+        print(
+            f"  parallel:        {parallel['elapsed']:6.2f} s，模型调用 {parallel['result']['model_calls']} 次，"
+            f"加速 {single['elapsed'] / parallel['elapsed']:.1f} 倍"
+        )
+
+        limited_backend = QuotaBackend(ScriptedBackend(responses, latency=latency, token_rate=token_rate), quota, 0.2)
+        limited = run_once(root, file_count, limited_backend, 'parallel')
+        print(
+            f"  parallel + 限流: {limited['elapsed']:6.2f} s，模型调用 {limited['result']['model_calls']} 次，"
+            f"被限流 {limited_backend.rejected} 次，最大并发 {limited_backend.peak}（配额 {quota}）"
+        )
+    finally:
+        shutil.rmtree(os.path.dirname(root), ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+"""
+项目增量索引基准测试
+
+对比无索引、冷启动（首次建立索引）、热启动（新进程载入已有索引）以及
+少量文件变化后的分析耗时。
+
+运行方式（在仓库根目录下）：
+    python -m benchmarks.bench_project_index
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_project_walker import build_synthetic_project, best_of
+from services.project_analyzer import ProjectAnalyzer
+
+
+def timed(func) -> float:
+    """返回单次运行耗时（秒）"""
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    total_files = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    root = tempfile.mkdtemp(prefix='index_bench_')
+    try:
+        created = build_synthetic_project(root, total_files)
+        print(f"已生成合成项目: {root}（{created} 个文件）")
+        # 索引不缓存修改时间过近的目录，等待合成项目“稳定”
+        time.sleep(2.5)
+
+        plain = ProjectAnalyzer(root, use_index=False)
+        full_time = best_of(plain.analyze, 3)
+        expected = json.dumps(plain.project_info, ensure_ascii=False, indent=2)
+
+        cold = ProjectAnalyzer(root)
+        cold_time = timed(cold.analyze)
+        cold.index.close()
+
+        # 新建分析器，模拟下一次请求/下一次启动时从磁盘载入索引
+        warm = ProjectAnalyzer(root)
+        warm_time = timed(warm.analyze)
+        if json.dumps(warm.project_info, ensure_ascii=False, indent=2) != expected:
+            raise SystemExit("输出不一致：索引结果与全量分析不同")
+        repeat_time = best_of(warm.analyze, 3)
+
+        # 修改少量目录后再次分析
+        for i in range(5):
+            path = os.path.join(root, 'src', 'components', f'group{i}', f'NewFile{i}.tsx')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write('export default {}\n')
+        changed_time = timed(warm.analyze)
+        plain.analyze()
+        if warm.project_info != plain.project_info:
+            raise SystemExit("输出不一致：文件变化后索引结果与全量分析不同")
+
+        print("输出校验通过：索引结果与全量分析一致")
+        print(f"无索引全量分析:             {full_time * 1000:8.1f} ms")
+        print(f"冷启动（建立索引）:         {cold_time * 1000:8.1f} ms")
+        print(f"热启动（载入已有索引）:     {warm_time * 1000:8.1f} ms")
+        print(f"同一进程内重复分析:         {repeat_time * 1000:8.1f} ms")
+        print(f"5个目录变化后分析:          {changed_time * 1000:8.1f} ms")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+项目遍历基准测试
+
+在临时目录中生成约5万个文件的合成前端项目，对比旧的逐目录 os.walk 遍历与
+ProjectAnalyzer 单次 scandir 遍历的耗时，并校验二者输出一致。
+
+运行方式（在仓库根目录下）：
+    python -m benchmarks.bench_project_walker
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from services.project_analyzer import ProjectAnalyzer
+
+
+def build_synthetic_project(root: str, total_files: int = 50000) -> int:
+    """
+    生成合成前端项目
+
+    约四成文件位于 src 下的常见子目录，其余位于 node_modules、dist 等
+    应被忽略的目录中，模拟大型前端仓库。
+
+    Args:
+        root: 项目根目录
+        total_files: 生成的文件总数
+
+    Returns:
+        int: 实际生成的文件数
+    """
+    layout = [
+        ('src/components', 0.15),
+        ('src/pages', 0.08),
+        ('src/views', 0.04),
+        ('src/utils', 0.04),
+        ('src/hooks', 0.03),
+        ('src/services', 0.03),
+        ('public', 0.03),
+        ('src/node_modules/pkg', 0.25),
+        ('src/components/node_modules/lib', 0.15),
+        ('src/dist', 0.10),
+        ('src/.git/objects', 0.10),
+    ]
+    exts = ['.js', '.jsx', '.ts', '.tsx', '.vue', '.css', '.json']
+    created = 0
+    for folder, share in layout:
+        count = int(total_files * share)
+        for i in range(count):
+            # 每个目录最多放100个文件，形成多层级结构
+            sub_dir = os.path.join(root, folder, f'group{i // 100}')
+            if i % 100 == 0:
+                os.makedirs(sub_dir, exist_ok=True)
+            with open(os.path.join(sub_dir, f'File{i}{exts[i % len(exts)]}'), 'w', encoding='utf-8') as f:
+                f.write('export default {}\n')
+            created += 1
+    with open(os.path.join(root, 'package.json'), 'w', encoding='utf-8') as f:
+        json.dump({'name': 'synthetic', 'scripts': {'dev': 'vite'}}, f)
+    return created
+
+
+def legacy_analyze(analyzer: ProjectAnalyzer) -> Dict[str, Any]:
+    """
+    旧版分析实现：每个目录各自调用一次 os.walk
+    """
+    def find_files(folder: str, exts: List[str]) -> List[str]:
+        result: List[str] = []
+        abs_folder = os.path.join(analyzer.project_path, folder)
+        if not os.path.exists(abs_folder):
+            return result
+        for root, _, files in os.walk(abs_folder):
+            for f in files:
+                if any(f.endswith(ext) for ext in exts):
+                    result.append(os.path.relpath(os.path.join(root, f), analyzer.project_path))
+        return result
+
+    info: Dict[str, Any] = {}
+    for file_name in analyzer.key_files:
+        info[file_name] = analyzer.read_file(file_name)
+    for dir_name in analyzer.key_directories:
+        info[dir_name] = find_files(dir_name, analyzer.component_extensions)
+    for subdir in analyzer.src_subdirectories:
+        info[f'src/{subdir}'] = find_files(f'src/{subdir}', analyzer.component_extensions)
+    return info
+
+
+def best_of(func, repeat: int) -> float:
+    """返回多次运行中的最短耗时（秒）"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    total_files = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    repeat = 3
+    root = tempfile.mkdtemp(prefix='walker_bench_')
+    try:
+        created = build_synthetic_project(root, total_files)
+        print(f"已生成合成项目: {root}（{created} 个文件）")
+
+        analyzer = ProjectAnalyzer(root, use_index=False)
+
+        # 关闭忽略目录后，输出必须与旧实现逐字节一致
+        analyzer.ignored_directories = []
+        legacy_json = json.dumps(legacy_analyze(analyzer), ensure_ascii=False, indent=2)
+        unpruned_json = json.dumps(analyzer.analyze(), ensure_ascii=False, indent=2)
+        if legacy_json != unpruned_json:
+            raise SystemExit("输出不一致：单次遍历结果与旧实现不同")
+        print("输出校验通过：不忽略目录时与旧实现逐字节一致")
+
+        legacy_time = best_of(lambda: legacy_analyze(analyzer), repeat)
+        unpruned_time = best_of(analyzer.analyze, repeat)
+
+        analyzer = ProjectAnalyzer(root, use_index=False)
+        pruned_time = best_of(analyzer.analyze, repeat)
+        pruned_count = sum(len(v) for k, v in analyzer.project_info.items() if isinstance(v, list))
+
+        print(f"旧实现（逐目录 os.walk）:     {legacy_time * 1000:8.1f} ms")
+        print(f"单次遍历（不忽略目录）:       {unpruned_time * 1000:8.1f} ms")
+        print(f"单次遍历（跳过忽略目录）:     {pruned_time * 1000:8.1f} ms，收集条目 {pruned_count}")
+        print(f"加速比: {legacy_time / pruned_time:.1f}x")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
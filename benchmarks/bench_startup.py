@@ -0,0 +1,101 @@
+"""
+启动耗时基准测试
+
+每次都启动新的 Python 进程测量：
+1. 运行 main.py 到出现第一个输入提示的时间（目标 100 ms 以内）；
+2. 导入各主要模块的时间；
+3. 用 -X importtime 列出导入某个模块时累计耗时最多的模块。
+
+运行方式（在仓库根目录下）：
+    python -m benchmarks.bench_startup [要分析的模块，默认 agents.application]
+"""
+
+import os
+import subprocess
+import sys
+import time
+from typing import List, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIRST_PROMPT = "请输入你的UI项目根目录路径".encode('utf-8')
+TARGET_MS = 100.0
+MODULES = ['agents.application', 'commands.ai_commands', 'services.ai_interactor']
+
+
+def time_to_first_prompt() -> float:
+    """启动 main.py，返回第一个输入提示出现所用的秒数"""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(REPO_ROOT, 'main.py')],
+        cwd=REPO_ROOT,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL
+    )
+    output = b''
+    try:
+        while FIRST_PROMPT not in output:
+            chunk = os.read(process.stdout.fileno(), 4096)
+            if not chunk:
+                raise SystemExit("main.py 在出现输入提示前退出")
+            output += chunk
+        return time.perf_counter() - start
+    finally:
+        process.kill()
+        process.wait()
+
+
+def time_import(module: str) -> float:
+    """在新进程中导入模块，返回进程总耗时（秒）"""
+    start = time.perf_counter()
+    subprocess.run([sys.executable, '-c', f'import {module}'], cwd=REPO_ROOT, check=True)
+    return time.perf_counter() - start
+
+
+def best_of(func, repeat: int) -> float:
+    return min(func() for _ in range(repeat))
+
+
+def top_imports(module: str, count: int = 15) -> List[Tuple[int, str]]:
+    """
+    解析 -X importtime 的输出
+
+    Returns:
+        List[Tuple[int, str]]: 按累计耗时降序排列的 (微秒, 模块名)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    entries = []
+    for line in result.stderr.splitlines():
+        parts = line.split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        entries.append((int(parts[1]), parts[2].rstrip()))
+    entries.sort(reverse=True)
+    return entries[:count]
+
+
+def main() -> None:
+    module = sys.argv[1] if len(sys.argv) > 1 else 'agents.application'
+    repeat = 5
+
+    baseline = best_of(lambda: time_import('os'), repeat)
+    prompt = best_of(time_to_first_prompt, repeat)
+    print(f"解释器启动（基准）:         {baseline * 1000:8.1f} ms")
+    status = "达标" if prompt * 1000 <= TARGET_MS else "未达标"
+    print(f"main.py 到第一个输入提示:   {prompt * 1000:8.1f} ms（目标 {TARGET_MS:.0f} ms，{status}）")
+    for name in MODULES:
+        print(f"导入 {name:<26}{best_of(lambda: time_import(name), repeat) * 1000:8.1f} ms")
+
+    print(f"\n导入 {module} 时累计耗时最多的模块：")
+    for microseconds, name in top_imports(module):
+        print(f"  {microseconds / 1000:8.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
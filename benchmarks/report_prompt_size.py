@@ -0,0 +1,61 @@
+"""
+提示词体积报告
+
+对比旧的 json.dumps(project_info, indent=2) 与项目摘要的字符数和估算token数。
+
+运行方式（在仓库根目录下）：
+    python -m benchmarks.report_prompt_size <项目路径> [<项目路径> ...]
+未指定项目路径时使用合成项目。
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+from typing import List, Tuple
+
+from benchmarks.bench_project_walker import build_synthetic_project
+from services.config import Config
+from services.project_analyzer import ProjectAnalyzer
+from services.project_summary import ProjectSummaryBuilder
+from utils.helpers import estimate_tokens
+
+
+def measure(project_path: str, token_budget: int) -> Tuple[int, int, int, int]:
+    """
+    测量单个项目的提示词体积
+
+    Returns:
+        Tuple[int, int, int, int]: (旧字符数, 旧token数, 摘要字符数, 摘要token数)
+    """
+    project_info = ProjectAnalyzer(project_path, use_index=False).analyze()
+    full_text = json.dumps(project_info, ensure_ascii=False, indent=2)
+    summary = ProjectSummaryBuilder(token_budget).build(project_info)
+    return len(full_text), estimate_tokens(full_text), len(summary), estimate_tokens(summary)
+
+
+def main() -> None:
+    token_budget = Config().summary_token_budget
+    paths: List[str] = sys.argv[1:]
+    temp_root = None
+    if not paths:
+        temp_root = tempfile.mkdtemp(prefix='summary_report_')
+        build_synthetic_project(temp_root, 5000)
+        paths = [temp_root]
+
+    try:
+        print(f"摘要token预算: {token_budget}")
+        print(f"{'项目':<40} {'原JSON字符':>10} {'原token':>8} {'摘要字符':>8} {'摘要token':>9} {'缩减':>7}")
+        for path in paths:
+            full_chars, full_tokens, summary_chars, summary_tokens = measure(path, token_budget)
+            reduction = 1 - summary_tokens / full_tokens if full_tokens else 0
+            name = os.path.basename(os.path.abspath(path))
+            print(f"{name:<40} {full_chars:>10} {full_tokens:>8} {summary_chars:>8} {summary_tokens:>9} {reduction:>7.1%}")
+    finally:
+        if temp_root:
+            shutil.rmtree(temp_root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -2,69 +2,346 @@
 AI命令处理模块
 """
 
-import json
+import difflib
 import os
-from typing import Dict, Any
+import time
+from typing import Callable, Dict, Any, List, Optional, Tuple
 from services.ai_interactor import AIInteractor
+from services.file_block_parser import FileBlock, FileBlockStreamParser, parse_file_blocks
 from services.file_operator import FileOperator
+from services.change_history import ChangeHistory
+from services.failure_diagnosis import CATEGORY_DEPENDENCY, CATEGORY_UNKNOWN, Diagnosis
+from services.file_transaction import FileTransaction
+from services.parallel_generator import GenerationResult, ParallelGenerator
+from services.patch_applier import is_patch
+from exceptions.project_exceptions import PatchApplyError
+from services.project_context import ProjectContext
+from services.retrieval_index import RetrievalHit
+
+# 检索候选中提供完整内容的最大文件数，以及相对最高分的得分比例下限
+MAX_FULL_CANDIDATES = 4
+FULL_CONTENT_SCORE_RATIO = 0.5
+# 并行生成模式下，文件数达到该值才按文件拆分请求
+PARALLEL_MIN_FILES = 2
 
 
 class AICommands:
     """处理AI相关命令的类"""
     
-    def __init__(self, ai_interactor: AIInteractor, project_path: str, analyzer):
+    def __init__(
+        self,
+        ai_interactor: AIInteractor,
+        project_path: str,
+        context: ProjectContext,
+        history: Optional[ChangeHistory] = None
+    ):
         self.ai = ai_interactor
         self.project_path = project_path
-        self.analyzer = analyzer
+        self.context = context
+        self.history = history
+        self.analyzer = context.analyzer
         self.project_info: Dict[str, Any] = {}
+        # 给出应用策略时，模型通过 write_file 写入的文件先暂存在这里，与其他修改一起交给策略决定
+        self.staged_writes: Optional[List[FileBlock]] = None
+        # 进行中的需求里因格式错误或路径越界而被跳过的文件，记录到结果中
+        self.skipped_paths: Optional[List[str]] = None
+
+    def diagnose_failure_with_ai(self, message: str) -> Diagnosis:
+        """
+        请AI分析项目无法运行的原因（本地规则无法判断时使用）
+
+        Args:
+            message: 检查项目时的错误信息或项目运行时的错误输出
+
+        Returns:
+            Diagnosis: rule 为 'llm' 的诊断结论
+        """
+        result = self.analyze_failure_reason(message)
+        category = CATEGORY_DEPENDENCY if "依赖问题" in result else CATEGORY_UNKNOWN
+        return Diagnosis(category, 'llm', result)
 
     def analyze_failure_reason(self, message: str) -> str:
         """分析项目无法运行的原因"""
-        # 准备项目信息供AI分析
-        project_info = self.analyzer.analyze()
-        project_context = json.dumps(project_info, ensure_ascii=False, indent=2)
+        # 准备项目摘要供AI分析
+        project_context = self.context.get_project_summary(self.ai.config.summary_token_budget)
         
-        # 使用ReAct策略分析失败原因
+        # 使用ReAct策略分析失败原因，固定说明在前，项目信息和错误信息在后
         analysis_prompt = (
-            f"项目无法运行，错误信息是：{message}\n"
-            f"项目结构信息：\n{project_context}\n"
-            "请使用ReAct策略分析项目无法运行的具体原因，并判断是否因为缺少依赖导致。\n"
+            "项目无法运行，请使用ReAct策略分析项目无法运行的具体原因，并判断是否因为缺少依赖导致。\n"
             "请按照以下格式进行推理和行动：\n"
             "Thought: 分析错误信息和项目结构，确定可能的原因\n"
             "Action: analyze_project_issues()\n"
             "Observation: 根据分析结果，确定具体原因\n"
             "Final Answer: 如果是缺少依赖导致的，请回复'依赖问题'；如果是其他原因，请给出详细解释。\n"
-            "只输出分析结果，不要输出其他内容。"
+            "只输出分析结果，不要输出其他内容。\n\n"
+            f"项目结构信息：\n{project_context}\n\n"
+            f"错误信息是：{message}"
         )
         
         analysis_result = self.ai.ask_with_react(analysis_prompt)
         return analysis_result.strip()
 
-    def modify_project(self, user_requirement: str) -> None:
+    def modify_project(
+        self,
+        user_requirement: str,
+        apply_policy: Optional[Callable[[List[FileBlock]], bool]] = None
+    ) -> Dict[str, Any]:
         """
         根据用户需求修改项目
+
+        Args:
+            user_requirement: 用户需求
+            apply_policy: 根据暂存的修改决定是否应用的函数，为None时询问用户；给出时模型通过
+                write_file 写入的文件也先暂存，与其他修改一起由策略决定是否应用
+
+        Returns:
+            Dict[str, Any]: 本次需求的结果，包括 status（applied/skipped/no_changes/failed）、
+                建议修改的文件、实际的变化、生成失败的文件、修改无法应用或被跳过的文件、
+                模型调用次数和各阶段耗时（秒）；没有可应用的修改且有文件失败时 status 为 failed
         """
-        self.project_info = self.analyzer.analyze()
-        
-        # 使用ReAct策略生成文件列表
-        react_prompt = self._generate_react_prompt_for_file_list(user_requirement)
-        ai_file_list = self.ai.ask_with_react(react_prompt)
-        
-        file_paths = [line.strip() for line in ai_file_list.split('\n') if line.strip()]
+        self.staged_writes = [] if apply_policy is not None else None
+        self.skipped_paths = []
+        try:
+            return self._modify_project(user_requirement, apply_policy)
+        finally:
+            self.staged_writes = None
+            self.skipped_paths = None
+
+    def stage_write(self, path: str, content: str) -> bool:
+        """
+        暂存模型通过 write_file 写入的文件
+
+        Args:
+            path: 文件相对路径
+            content: 文件内容
+
+        Returns:
+            bool: 是否已暂存；没有进行中的、给出了应用策略的需求时返回False，由调用方直接写入
+        """
+        if self.staged_writes is None:
+            return False
+        self.staged_writes.append(FileBlock(path=path, code=content))
+        return True
+
+    def _modify_project(
+        self,
+        user_requirement: str,
+        apply_policy: Optional[Callable[[List[FileBlock]], bool]]
+    ) -> Dict[str, Any]:
+        """modify_project 的实现"""
+        timings: Dict[str, float] = {}
+        started = time.perf_counter()
+        self.project_info = self.context.get_project_info()
+        edit_mode = self.ai.config.edit_mode
+        # interactions 为写入对话历史的轮数，并行生成的请求不写入历史
+        interactions = 0
+        model_calls = 0
+        errors: List[str] = []
+
+        candidates = self._select_candidates(user_requirement)
+        timings['select'] = time.perf_counter() - started
+        if candidates:
+            # 本地检索已足够确定相关文件，省去让AI挑选文件的一轮对话
+            print("根据本地检索确定的候选文件：")
+            for hit in candidates:
+                print(f"  {hit.path}（{hit.score:.2f}）")
+            file_paths = [hit.path for hit in candidates]
+        else:
+            # 使用ReAct策略生成文件列表
+            react_prompt = self._generate_react_prompt_for_file_list(user_requirement)
+            ai_file_list = self.ai.ask_with_react(react_prompt)
+            interactions += 1
+            model_calls += 1
+            timings['plan'] = time.perf_counter() - started - timings['select']
+            file_paths = [line.strip() for line in ai_file_list.split('\n') if line.strip()]
+
+        parallel = self.ai.config.generation_mode == 'parallel' and len(file_paths) >= PARALLEL_MIN_FILES
+        print("建议的修改：")
+        if parallel:
+            # 每个文件单独请求，不写入对话历史
+            staged, failed_paths, errors, calls = self._request_modifications_parallel(
+                user_requirement, file_paths, edit_mode, candidates
+            )
+            model_calls += calls
+        else:
+            staged, failed_paths = self._request_modifications(user_requirement, file_paths, edit_mode, candidates)
+            interactions += 1
+            model_calls += 1
+        if failed_paths:
+            # 修改片段无法安全应用的文件，退回到整文件模式重新生成
+            print(f"以下文件的修改片段无法安全应用，改为请求完整文件内容: {', '.join(failed_paths)}")
+            if parallel and len(failed_paths) >= PARALLEL_MIN_FILES:
+                retry_staged, still_failed, retry_errors, calls = self._request_modifications_parallel(
+                    user_requirement, failed_paths, 'whole'
+                )
+                errors.extend(retry_errors)
+                model_calls += calls
+            else:
+                retry_staged, still_failed = self._request_modifications(user_requirement, failed_paths, 'whole')
+                interactions += 1
+                model_calls += 1
+            staged.extend(retry_staged)
+            failed_paths = still_failed
+        if self.staged_writes:
+            # write_file 发生在最终回复之前，同一文件以最终回复中的内容为准
+            written: List[Tuple[FileBlock, str]] = []
+            for block in self.staged_writes:
+                self._stage_block(block, written)
+            staged = written + staged
+        timings['generate'] = time.perf_counter() - started - sum(timings.values())
+        # 整文件重试后仍无法应用的文件和被跳过的文件
+        failed_paths = list(dict.fromkeys(failed_paths + self.skipped_paths))
+        if failed_paths:
+            print(f"以下文件的修改未能生成可应用的内容: {', '.join(failed_paths)}")
+
+        result: Dict[str, Any] = {
+            # 没有可应用的修改时，区分“无需修改”和“修改未能生成或应用”
+            'status': 'failed' if not staged and (failed_paths or errors) else 'no_changes',
+            'files': [block.path for block, _ in staged],
+            'changes': {},
+            'errors': errors,
+            'failed': failed_paths,
+            'model_calls': model_calls,
+            'timings': timings,
+        }
+        print("建议需要修改的文件：")
+        print('\n'.join(result['files']))
+        if apply_policy is None:
+            apply = input("是否将上述修改应用到项目？(y/n)：").strip().lower() == 'y'
+        else:
+            apply = bool(staged) and apply_policy([block for block, _ in staged])
+        if apply:
+            apply_started = time.perf_counter()
+            transaction = self.apply_staged_changes(staged, user_requirement)
+            timings['apply'] = time.perf_counter() - apply_started
+            if transaction is None:
+                result['status'] = 'failed'
+            else:
+                if transaction.changes:
+                    result['status'] = 'applied'
+                result['changes'] = {
+                    'modified': transaction.modified,
+                    'created': transaction.created,
+                    'deleted': transaction.deleted,
+                    'unchanged': transaction.unchanged,
+                }
+        else:
+            print("已跳过自动应用修改。")
+            if staged:
+                result['status'] = 'skipped'
+            # 用户拒绝应用修改时，清除本次需求的所有对话历史（文件列表请求+具体内容请求）
+            for _ in range(interactions):
+                self.ai.remove_last_interaction()
+        timings['total'] = time.perf_counter() - started
+        return result
+
+    def _select_candidates(self, user_requirement: str) -> Optional[List[RetrievalHit]]:
+        """
+        通过本地检索索引选出候选文件
+
+        Args:
+            user_requirement: 用户需求
+
+        Returns:
+            Optional[List[RetrievalHit]]: 候选文件；未启用检索或候选文件覆盖的需求词项不足以确定时返回None
+        """
+        config = self.ai.config
+        if config.file_selection != 'retrieval':
+            return None
+        hits = self.context.search_files(user_requirement, config.retrieval_top_k)
+        if not hits:
+            return None
+        # BM25 得分的绝对值随项目规模变化，按候选文件覆盖的需求词项比例判断是否可信
+        coverage = self.context.get_retrieval_index().coverage(user_requirement, [hit.path for hit in hits])
+        if coverage < config.retrieval_min_coverage:
+            return None
+        return hits
+
+    def _build_files_info(self, file_paths: List[str], snippets: Optional[Dict[str, str]] = None) -> str:
+        """
+        读取文件内容，按文件块格式拼接到提示中
+
+        Args:
+            file_paths: 文件路径列表
+            snippets: 只提供相关片段而非完整内容的文件及其片段
+        """
+        snippets = snippets or {}
+        to_read = [path for path in file_paths if path not in snippets]
+        results = {
+            result.path: result
+            for result in FileOperator.read_files(to_read, self.project_path, self.ai.config.max_prompt_file_bytes)
+        }
         file_contents = []
         for path in file_paths:
-            abs_path = os.path.join(self.project_path, path)
-            content = FileOperator.read_file(abs_path, self.project_path)
-            if content:
-                file_contents.append(f"---file-start---\n{path}\n---code-start---\n{content}\n---code-end---\n---file-end---")
+            if path in snippets:
+                file_contents.append(f"---file-start---\n{path}\n---snippet-start---\n{snippets[path]}\n---snippet-end---\n---file-end---")
+                continue
+            result = results[path]
+            if result.skipped == 'outside':
+                print(f"警告：文件路径 '{path}' 超出项目目录范围，跳过处理")
+                continue
+            if result.skipped in ('binary', 'error'):
+                content = "(二进制或无法读取的文件，不要修改)"
+            elif result.skipped == 'too_large':
+                content = f"(文件过大（{result.size} 字节），内容已省略，不要修改)"
+            elif result.exists:
+                content = result.content
             else:
-                file_contents.append(f"---file-start---\n{path}\n---code-start---\n(文件不存在，请生成新文件内容)\n---code-end---\n---file-end---")
-        files_info = '\n'.join(file_contents)
-        format_tip = (
-            "请严格按照如下格式回复：\n"
-            "每个需要修改或删除或新增的文件用如下格式分隔：\n"
-            "---file-start---\n文件路径（如 src/App.jsx）\n---code-start---\n代码内容（完整替换该文件内容）\n---code-end---\n---file-end---\n"
-            "如需删除文件，请在 ---code-start--- 和 ---code-end--- 之间填写delete。\n"
+                content = "(文件不存在，请生成新文件内容)"
+            file_contents.append(f"---file-start---\n{path}\n---code-start---\n{content}\n---code-end---\n---file-end---")
+        return '\n'.join(file_contents)
+
+    def _build_dependency_info(self, file_paths: List[str]) -> str:
+        """
+        列出文件在项目内的导入关系，便于AI判断修改的影响范围
+
+        Args:
+            file_paths: 文件路径列表
+
+        Returns:
+            str: 依赖关系说明，没有任何导入关系时返回空字符串
+        """
+        graph = self.context.get_module_graph()
+        lines = []
+        for path in file_paths:
+            dependencies = graph.dependencies_of(path)
+            dependents = graph.dependents_of(path)
+            if dependencies or dependents:
+                lines.append(
+                    f"{path} 导入: {', '.join(dependencies) or '无'}；被导入: {', '.join(dependents) or '无'}"
+                )
+        if not lines:
+            return ''
+        return "模块依赖关系（仅项目内文件）：\n" + '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _build_format_tip(edit_mode: str) -> str:
+        """
+        生成回复格式说明
+
+        Args:
+            edit_mode: 'patch' 只返回修改片段，'whole' 返回完整文件内容
+        """
+        if edit_mode == 'patch':
+            format_rules = (
+                "请严格按照如下格式回复：\n"
+                "每个需要修改或删除或新增的文件用如下格式分隔：\n"
+                "---file-start---\n文件路径（如 src/App.jsx）\n---code-start---\n修改内容\n---code-end---\n---file-end---\n"
+                "修改已有文件时，修改内容只包含一个或多个如下片段，不要输出未修改的部分：\n"
+                "<<<<<<< SEARCH\n原文件中需要替换的连续若干行（必须与原文件逐字一致，并包含足够的上下文使其在文件中唯一）\n"
+                "=======\n替换后的内容\n>>>>>>> REPLACE\n"
+                "新增文件时，修改内容为该文件的完整内容。\n"
+                "如需删除文件，请在 ---code-start--- 和 ---code-end--- 之间填写delete。\n"
+            )
+        else:
+            format_rules = (
+                "请严格按照如下格式回复：\n"
+                "每个需要修改或删除或新增的文件用如下格式分隔：\n"
+                "---file-start---\n文件路径（如 src/App.jsx）\n---code-start---\n代码内容（完整替换该文件内容）\n---code-end---\n---file-end---\n"
+                "如需删除文件，请在 ---code-start--- 和 ---code-end--- 之间填写delete。\n"
+            )
+        return (
+            format_rules +
             "如有多个文件，重复上述结构。不要输出多余内容。\n"
             "代码必须遵循以下要求：\n"
             "1. 切记不要修改原代码逻辑，除非用户明确要求。\n"
@@ -73,62 +350,231 @@ class AICommands:
             "4. 组件请使用material-ui中的组件。\n"
             "5. 尽量不添加新的第三方库进项目，除非用户明确要求。"
         )
-        full_prompt = (
-            f"以下项目中需要修改/新增的文件及其内容（如有），{files_info}\n 请根据用户需求“{user_requirement}”给出每个文件的完整新内容。遵循以下规则：\n{format_tip}"
+
+    @staticmethod
+    def _select_snippets(candidates: List[RetrievalHit]) -> Dict[str, str]:
+        """
+        决定检索候选文件中哪些只提供相关片段
+
+        得分接近最高分的前 MAX_FULL_CANDIDATES 个文件提供完整内容，其余只提供片段。
+
+        Args:
+            candidates: 按得分从高到低排列的候选文件
+
+        Returns:
+            Dict[str, str]: 只提供片段的文件路径及其片段
+        """
+        top_score = candidates[0].score
+        return {
+            hit.path: hit.snippet
+            for index, hit in enumerate(candidates)
+            if index >= MAX_FULL_CANDIDATES or hit.score < top_score * FULL_CONTENT_SCORE_RATIO
+        }
+
+    def _build_modification_task(
+        self,
+        file_paths: List[str],
+        edit_mode: str,
+        candidates: Optional[List[RetrievalHit]] = None
+    ) -> Tuple[str, str]:
+        """
+        生成修改提示中与本次需求相关的信息，以及需要AI给出的内容
+
+        Args:
+            file_paths: 需要修改的文件路径列表
+            edit_mode: 'patch' 或 'whole'
+            candidates: 本地检索得到的候选文件，给出时由AI自行判断其中哪些需要修改
+
+        Returns:
+            Tuple[str, str]: (文件内容、依赖关系等信息, 需要给出的内容)
+        """
+        if candidates:
+            snippets = self._select_snippets(candidates)
+            task = (
+                f"当前项目信息：\n{self.context.get_project_summary(self.ai.config.summary_token_budget)}\n\n"
+                f"以下是根据用户需求从项目中检索到的候选文件（按相关度排序）：\n"
+                f"{self._build_files_info(file_paths, snippets)}\n"
+                f"其中 ---snippet-start--- 与 ---snippet-end--- 之间只是带行号的相关片段，修改这类文件前请先用read_file查看完整内容。\n"
+                f"{self._build_dependency_info(file_paths)}"
+            )
+            wanted = "判断哪些文件确实需要修改、删除或新增，只输出这些文件，不需要修改的文件不要输出"
+        else:
+            task = (
+                f"以下项目中需要修改/新增的文件及其内容（如有）：\n"
+                f"{self._build_files_info(file_paths)}\n"
+                f"{self._build_dependency_info(file_paths)}"
+            )
+            wanted = "给出" + ("每个文件的修改" if edit_mode == 'patch' else "每个文件的完整新内容")
+        return task, wanted
+
+    def _request_modifications(
+        self,
+        user_requirement: str,
+        file_paths: List[str],
+        edit_mode: str,
+        candidates: Optional[List[RetrievalHit]] = None
+    ) -> Tuple[List[Tuple[FileBlock, str]], List[str]]:
+        """
+        请求AI生成文件修改，每个文件块一结束就校验并暂存
+
+        Args:
+            user_requirement: 用户需求
+            file_paths: 需要修改的文件路径列表
+            edit_mode: 'patch' 或 'whole'
+            candidates: 本地检索得到的候选文件，给出时由AI自行判断其中哪些需要修改
+
+        Returns:
+            Tuple[List[Tuple[FileBlock, str]], List[str]]: (暂存的修改, 修改片段无法应用的文件路径)
+        """
+        task, wanted = self._build_modification_task(file_paths, edit_mode, candidates)
+        react_modify_prompt = self._generate_react_prompt_for_modifications(
+            task, f"用户需求：{user_requirement}\n请根据用户需求{wanted}。", edit_mode
         )
-        
-        # 使用ReAct策略生成文件修改内容
-        react_modify_prompt = self._generate_react_prompt_for_modifications(full_prompt)
-        ai_response = self.ai.ask_with_react(react_modify_prompt)
-        
-        print("建议需要修改的文件：")
-        print(ai_file_list)
-        apply = input("是否将上述修改应用到项目？(y/n)：").strip().lower()
-        if apply == 'y':
-            self.apply_ai_changes(ai_response)
+
+        parser = FileBlockStreamParser()
+        staged: List[Tuple[FileBlock, str]] = []
+        failed: List[str] = []
+        received: List[str] = []
+
+        def on_final_answer(chunk: str) -> None:
+            received.append(chunk)
+            for block in parser.feed(chunk):
+                self._stage_block(block, staged, failed)
+
+        ai_response = self.ai.ask_with_react(react_modify_prompt, on_final_answer)
+        for block in parser.close():
+            self._stage_block(block, staged, failed)
+        if ''.join(received).strip() != ai_response:
+            # 回复未按格式给出 Final Answer 或中途重试过，按完整回复重新解析
+            staged, failed = [], []
+            for block in parse_file_blocks(ai_response):
+                self._stage_block(block, staged, failed)
+        return staged, failed
+
+    def _request_modifications_parallel(
+        self,
+        user_requirement: str,
+        file_paths: List[str],
+        edit_mode: str,
+        candidates: Optional[List[RetrievalHit]] = None
+    ) -> Tuple[List[Tuple[FileBlock, str]], List[str], List[str], int]:
+        """
+        为每个文件单独发送请求并发生成修改，合并为一个暂存列表
+
+        所有请求共享同一段前缀（格式说明、项目信息、所有待修改文件的内容和用户需求），
+        只有最后指定本次负责的文件不同，便于利用服务端的前缀缓存。请求不写入对话历史，
+        每个文件一生成完就校验并暂存。
+
+        Args:
+            user_requirement: 用户需求
+            file_paths: 已规划的需要修改的文件路径列表
+            edit_mode: 'patch' 或 'whole'
+            candidates: 本地检索得到的候选文件，给出时由AI判断各文件是否确实需要修改
+
+        Returns:
+            Tuple[List[Tuple[FileBlock, str]], List[str], List[str], int]:
+                (按规划顺序排列的暂存修改, 修改片段无法应用的文件路径, 生成失败的文件路径, 模型调用次数)
+        """
+        config = self.ai.config
+        file_paths = list(dict.fromkeys(file_paths))
+        snippets = self._select_snippets(candidates) if candidates else {}
+        shared_prompt = (
+            f"根据用户需求和文件内容生成指定文件的修改方案。本次需要修改的文件由多个请求分别生成，"
+            f"每个请求只负责其中一个文件。不需要输出推理过程，直接以 Final Answer: 开头按格式输出。\n\n"
+            f"Final Answer 的格式规则：\n{self._build_format_tip(edit_mode)}\n\n"
+            f"当前项目信息：\n{self.context.get_project_summary(config.summary_token_budget)}\n\n"
+            f"本次需求涉及的文件及其内容（如有）：\n{self._build_files_info(file_paths, snippets)}\n"
+            f"其中 ---snippet-start--- 与 ---snippet-end--- 之间只是带行号的相关片段。\n"
+            f"{self._build_dependency_info(file_paths)}"
+            f"用户需求：{user_requirement}\n"
+        )
+        if candidates:
+            wanted = "先判断该文件是否确实需要修改；需要时只输出该文件的修改，不需要修改时 Final Answer 之后不输出任何内容"
         else:
-            print("已跳过自动应用修改。")
-            # 用户拒绝应用修改时，清除相关的两次对话历史（文件列表请求+具体内容请求）
-            self.ai.remove_last_interaction()  # 清除具体内容请求的对话历史
-            self.ai.remove_last_interaction()  # 清除文件列表请求的对话历史
+            wanted = "只输出该文件的" + ("修改" if edit_mode == 'patch' else "完整新内容")
+        prompts = {}
+        for path in file_paths:
+            # 只提供了片段的文件，在负责它的请求中补充完整内容
+            full_content = f"该文件的完整内容：\n{self._build_files_info([path])}\n" if path in snippets else ''
+            prompts[path] = f"{shared_prompt}\n{full_content}本次只负责文件 {path}，{wanted}，不要输出其他文件。"
+
+        generated: Dict[str, List[Tuple[FileBlock, str]]] = {}
+        failed: List[str] = []
+        errors: List[str] = []
+
+        def on_result(result: GenerationResult) -> None:
+            # 在调用线程中按完成顺序校验，其余文件仍在生成
+            if result.error is not None:
+                print(f"  {result.key} 生成失败: {result.error}")
+                errors.append(result.key)
+                return
+            staged: List[Tuple[FileBlock, str]] = []
+            for block in parse_file_blocks(result.text or ''):
+                if os.path.normpath(block.path) != os.path.normpath(result.key):
+                    print(f"警告：负责 {result.key} 的回复中包含其他文件 {block.path}，跳过处理")
+                    continue
+                self._stage_block(block, staged, failed)
+            if not staged and result.key not in failed:
+                print(f"  {result.key} 无需修改")
+            generated[result.key] = staged
+
+        generator = ParallelGenerator(
+            self.ai.ask_once,
+            max_concurrency=config.generation_concurrency,
+            max_retries=config.max_retries
+        )
+        results = generator.run(prompts, on_result)
+        staged = [item for path in file_paths for item in generated.get(path, [])]
+        return staged, failed, errors, sum(result.attempts for result in results.values())
 
     def _generate_react_prompt_for_file_list(self, user_requirement: str) -> str:
         """
         生成用于ReAct策略的文件列表生成提示
+
+        固定的说明在前，项目信息其次，用户需求放在最后，连续请求之间的前缀尽量保持一致。
         """
         react_prompt = (
             f"根据用户需求生成需要修改的文件列表。请使用ReAct策略来思考和行动。\n"
-            f"用户需求：{user_requirement}\n"
-            f"当前项目信息：{json.dumps(self.project_info, ensure_ascii=False, indent=2)}\n\n"
             f"请按照以下格式进行推理和行动：\n"
             f"Thought: 分析用户需求和项目结构，确定需要修改哪些文件。如果需要了解特定文件的内容以做出判断，可以使用read_file操作。\n"
-            f"Action: analyze_project()  # 可用的Action包括: analyze_project(), read_file(\"文件路径\"), write_file(\"文件路径\", \"文件内容\")\n"
+            f"Action: analyze_project()  # 可用的Action包括: analyze_project(), read_file(\"文件路径\"), dependencies_of(\"文件路径\"), dependents_of(\"文件路径\"), write_file(\"文件路径\", \"文件内容\")\n"
             f"Observation: 根据分析结果，列出需要修改或删除或新增的文件路径\n"
             f"Final Answer: 只输出文件路径列表，每行一个文件路径（如 src/App.jsx），只输出文件路径列表，不输出其他内容\n\n"
             f"重要提示：\n"
             f"1. 在Thought阶段，仔细分析用户需求，考虑哪些文件可能需要修改\n"
-            f"2. 如果需要查看特定文件的内容以判断是否需要修改，请使用read_file操作\n"
+            f"2. 如果需要查看特定文件的内容以判断是否需要修改，请使用read_file操作；需要了解某个文件被哪些文件引用、引用了哪些文件时，请使用dependents_of和dependencies_of操作\n"
             f"3. 只有在充分分析后，才给出最终的文件列表\n"
-            f"4. 不要包含你不确定是否需要修改的文件"
+            f"4. 不要包含你不确定是否需要修改的文件\n"
+            f"5. 需要查看多个文件时，请在同一次回复中给出多行Action，它们会被同时执行\n\n"
+            f"当前项目信息：\n{self.context.get_project_summary(self.ai.config.summary_token_budget)}\n\n"
+            f"用户需求：{user_requirement}"
         )
         return react_prompt
 
-    def _generate_react_prompt_for_modifications(self, full_prompt: str) -> str:
+    def _generate_react_prompt_for_modifications(self, task: str, request: str, edit_mode: str) -> str:
         """
         生成用于ReAct策略的文件修改内容生成提示
+
+        Args:
+            task: 文件内容、依赖关系等与本次需求相关的信息
+            request: 用户需求及本次需要给出的内容
+            edit_mode: 'patch' 或 'whole'，决定回复格式说明
         """
         react_prompt = (
             f"根据用户需求和文件内容生成具体的修改方案。请使用ReAct策略来思考和行动。\n"
-            f"任务描述：{full_prompt}\n\n"
             f"请按照以下格式进行推理和行动：\n"
             f"Thought: 分析用户需求和当前文件内容，确定如何修改。如果需要查看其他相关文件以确保修改的一致性，可以使用read_file操作。\n"
-            f"Action: analyze_project()  # 可用的Action包括: analyze_project(), read_file(\"文件路径\"), write_file(\"文件路径\", \"文件内容\")\n"
+            f"Action: analyze_project()  # 可用的Action包括: analyze_project(), read_file(\"文件路径\"), dependencies_of(\"文件路径\"), dependents_of(\"文件路径\"), write_file(\"文件路径\", \"文件内容\")\n"
             f"Observation: 根据分析结果，生成符合要求的代码修改方案\n"
             f"Final Answer: 严格按照指定格式输出文件修改内容\n\n"
             f"重要提示：\n"
             f"1. 在Thought阶段，仔细分析用户需求和提供的文件内容\n"
             f"2. 如果需要查看其他相关文件以确保修改的一致性，请使用read_file操作\n"
-            f"3. 确保生成的代码符合项目的现有风格和结构"
+            f"3. 确保生成的代码符合项目的现有风格和结构\n"
+            f"4. 需要查看多个文件时，请在同一次回复中给出多行Action，它们会被同时执行\n\n"
+            f"Final Answer 的格式规则：\n{self._build_format_tip(edit_mode)}\n\n"
+            f"{task}\n"
+            f"{request}"
         )
         return react_prompt
 
@@ -136,65 +582,131 @@ class AICommands:
         """
         应用AI生成的修改到项目
         """
-        print("正在应用建议到项目...")
-        files = ai_response.split('---file-start---')
-        files_changed = False
-        structure_changed = False
-        
-        for file_block in files:
-            file_block = file_block.strip()
-            if not file_block:
-                continue
+        staged: List[Tuple[FileBlock, str]] = []
+        for block in parse_file_blocks(ai_response):
+            self._stage_block(block, staged)
+        self.apply_staged_changes(staged)
+
+    def _stage_block(
+        self,
+        block: FileBlock,
+        staged: List[Tuple[FileBlock, str]],
+        failed: Optional[List[str]] = None
+    ) -> None:
+        """
+        校验单个文件块，打印与现有文件的差异并加入暂存列表
+
+        修改片段会在此时应用到当前文件内容上，暂存的始终是完整的新内容。
+
+        Args:
+            block: 解析出的文件块
+            staged: 暂存列表，校验通过的 (文件块, 绝对路径) 会追加到其中
+            failed: 修改片段无法应用的文件路径会追加到其中
+
+        格式错误或路径越界而被跳过的文件，在需求进行中时记录到 skipped_paths。
+        """
+        if block.error:
+            print(f"警告：{block.error}，跳过处理: {block.path}...")
+            if self.skipped_paths is not None:
+                self.skipped_paths.append(block.path)
+            return
+        abs_path = os.path.join(self.project_path, block.path)
+        if not FileOperator.validate_path(abs_path, self.project_path):
+            print(f"警告：文件路径 '{block.path}' 超出项目目录范围，跳过处理")
+            if self.skipped_paths is not None:
+                self.skipped_paths.append(block.path)
+            return
+
+        if is_patch(block.code):
             try:
-                # 安全地分割文件块，避免索引越界
-                parts = file_block.split('---code-start---')
-                if len(parts) < 2:
-                    print(f"警告：文件块格式不正确，跳过处理: {file_block[:50]}...")
-                    continue
-                    
-                path_part = parts[0].strip()
-                code_parts = parts[1].split('---code-end---')
-                if len(code_parts) < 1:
-                    print(f"警告：文件块缺少代码结束标记，跳过处理: {path_part[:50]}...")
-                    continue
-                    
-                code_part = code_parts[0].strip()
-                rel_path = path_part.split('\n')[0].strip()
-                abs_path = os.path.join(self.project_path, rel_path)
-                
-                # 判断操作类型
-                if code_part.lower().strip() == "delete":
-                    # 删除文件操作
+                block = FileBlock(path=block.path, code=FileOperator.apply_patch(abs_path, block.code, self.project_path))
+            except PatchApplyError as e:
+                print(f"  {block.path}: {e.message}")
+                if failed is not None:
+                    failed.append(block.path)
+                return
+
+        exists = os.path.exists(abs_path)
+        if block.is_delete:
+            print(f"  删除 {block.path}" if exists else f"  删除 {block.path}（文件不存在）")
+        elif not exists:
+            print(f"  新增 {block.path}（{len(block.code.splitlines())} 行）")
+        else:
+            old_lines = FileOperator.read_file(abs_path, self.project_path).splitlines()
+            added = removed = 0
+            for line in difflib.unified_diff(old_lines, block.code.splitlines(), lineterm='', n=0):
+                if line.startswith('+') and not line.startswith('+++'):
+                    added += 1
+                elif line.startswith('-') and not line.startswith('---'):
+                    removed += 1
+            if added or removed:
+                print(f"  修改 {block.path}（+{added} -{removed}）")
+            else:
+                print(f"  {block.path} 内容未变化")
+        staged.append((block, abs_path))
+
+    def apply_staged_changes(
+        self,
+        staged: List[Tuple[FileBlock, str]],
+        description: str = ''
+    ) -> Optional[FileTransaction]:
+        """
+        在一个事务中应用已暂存的文件修改，任何一个文件失败时所有文件保持原样
+
+        Args:
+            staged: (文件块, 绝对路径) 列表
+            description: 记录到修改历史中的说明
+
+        Returns:
+            Optional[FileTransaction]: 已提交的事务（含实际的变化），应用失败时返回None
+        """
+        print("正在应用建议到项目...")
+        # 同一文件出现多次时以最后一次为准
+        latest: Dict[str, FileBlock] = {}
+        for block, abs_path in staged:
+            latest.pop(abs_path, None)
+            latest[abs_path] = block
+
+        transaction = FileTransaction(
+            self.project_path,
+            history=self.history,
+            description=description,
+            ignore_whitespace=self.ai.config.ignore_whitespace_changes
+        )
+        try:
+            for abs_path, block in latest.items():
+                if block.is_delete:
                     if os.path.exists(abs_path):
-                        os.remove(abs_path)
-                        structure_changed = True  # 结构发生变化
-                        files_changed = True
-                        print(f"已删除文件: {abs_path}")
+                        transaction.delete(abs_path)
                     else:
                         print(f"文件不存在，无法删除: {abs_path}")
                 else:
-                    # 创建或修改文件操作
-                    old_exists = os.path.exists(abs_path)
-                    if FileOperator.write_code_to_file(abs_path, code_part, self.project_path):
-                        files_changed = True
-                        
-                        # 如果是新创建的文件，则结构发生变化
-                        if not old_exists:
-                            structure_changed = True
-                    else:
-                        print(f"写入文件失败: {abs_path}")
-                        
-            except Exception as e:
-                print(f"解析回复时出错: {e}")
-        
-        # 只有在文件结构发生变化时才重新分析项目
-        if structure_changed:
-            print("检测到文件结构变更，重新分析项目结构...")
-            self.project_info = self.analyzer.analyze()
-        elif files_changed:
-            print("文件内容已更新。")
-            
-        print("应用完成！")
-
+                    transaction.write(abs_path, block.code)
+            transaction.commit()
+        except Exception as e:
+            transaction.abort()
+            print(f"应用修改时出错，所有文件均未修改: {e}")
+            return None
 
+        # 内容没有变化的文件不会被重写，不会触发开发服务器的热更新
+        for label, paths in (
+            ("修改", transaction.modified),
+            ("新增", transaction.created),
+            ("删除", transaction.deleted),
+            ("未变化", transaction.unchanged)
+        ):
+            for path in paths:
+                print(f"  {label} {path}")
+        print(
+            f"共修改 {len(transaction.modified)} 个文件，新增 {len(transaction.created)} 个，"
+            f"删除 {len(transaction.deleted)} 个，{len(transaction.unchanged)} 个文件内容未变化"
+        )
 
+        # 事务提交时已通知 FileOperator 的监听者，共享的分析结果会在下次使用时重新分析
+        if transaction.created or transaction.deleted:
+            print("检测到文件结构变更，项目结构将重新分析。")
+        if self.history is not None and transaction.changes:
+            print("如需撤销本次修改，请输入 undo。")
+            
+        print("应用完成！")
+        return transaction
@@ -4,32 +4,41 @@
 
 import os
 import json
-import subprocess
-from typing import Dict, Any, Optional, Tuple
-from services.project_analyzer import ProjectAnalyzer
-from utils.helpers import find_executable, run_subprocess_command
+from typing import Dict, Any, List, Optional, Tuple
+from services.config import Config
+from services.failure_diagnosis import FailureDiagnoser
+from services.install_cache import InstallCache, PackageManager, detect_package_manager
+from services.process_supervisor import STATE_EXITED, STATE_READY, ProcessSupervisor
+from services.project_context import ProjectContext
+from utils.helpers import find_executable, stream_subprocess_command
 
 
 class ProjectCommands:
     """处理项目相关命令的类"""
     
-    def __init__(self, project_path: str):
+    def __init__(self, project_path: str, context: Optional[ProjectContext] = None, config: Optional[Config] = None):
         self.project_path = project_path
-        self.analyzer = ProjectAnalyzer(project_path)
-        self.running_process: Optional[subprocess.Popen] = None
+        self.context = context or ProjectContext(project_path)
+        self.analyzer = self.context.analyzer
+        self.config = config or Config()
+        self.supervisor: Optional[ProcessSupervisor] = None
 
     def check_project_runnable(self) -> Tuple[bool, str]:
         """检查项目是否可以运行"""
-        package_json_content = self.analyzer.read_file('package.json')
-        if not package_json_content:
-            return False, "项目中没有找到 package.json 文件"
-        
         try:
-            package_data = json.loads(package_json_content)
+            if not self.context.get_package_json_text():
+                return False, "项目中没有找到 package.json 文件"
+            
+            package_data = self.context.get_package_data()
             
             if 'scripts' not in package_data:
                 return False, "package.json 中没有定义 scripts"
             
+            # 依赖未安装或与锁文件不一致时项目无法启动
+            diagnosis = FailureDiagnoser(self.project_path).diagnose()
+            if diagnosis is not None and diagnosis.is_dependency_problem:
+                return False, diagnosis.format()
+
             # 检查是否有启动脚本
             start_scripts = ['start', 'dev', 'serve']
             for script in start_scripts:
@@ -42,110 +51,157 @@ class ProjectCommands:
         except Exception as e:
             return False, f"检查项目时出错: {str(e)}"
 
-    def install_dependencies(self) -> bool:
-        """安装项目依赖"""
-        print("正在安装项目依赖...")
+    def install_dependencies(self, force: bool = False) -> bool:
+        """
+        安装项目依赖
+
+        package.json 与锁文件自上次成功安装后没有变化且 node_modules 存在时跳过安装。
+
+        Args:
+            force: 为True时忽略安装记录，总是重新安装
+
+        Returns:
+            bool: 依赖是否已就绪
+        """
         try:
             # 检查是否存在 package.json
             package_json_path = os.path.join(self.project_path, 'package.json')
             if not os.path.exists(package_json_path):
                 print("项目中没有找到 package.json 文件，无法安装依赖")
                 return False
-            
-            # 检查npm是否可用
-            npm_executable = find_executable('npm')
-            if not npm_executable:
+
+            # 安装记录总是对应检测到的包管理器，即使实际退回了 npm，下次检查时才能一致
+            detected = manager = detect_package_manager(self.project_path)
+            cache = InstallCache(self.project_path)
+            if not force and cache.is_current(detected):
+                print("依赖自上次安装后没有变化，跳过安装。")
+                return True
+
+            executable = find_executable(manager.name)
+            if not executable and manager.name != 'npm':
+                # 检测到的包管理器未安装时退回 npm，此时锁文件不适用
+                print(f"未找到 {manager.name} 命令，改用 npm install")
+                manager = PackageManager('npm', None)
+                executable = find_executable('npm')
+            if not executable:
                 print("未找到 npm 命令，请确保已安装 Node.js")
                 return False
-            
-            # 执行 npm install，确保在正确的项目目录下执行
-            cmd = [npm_executable, 'install']
+
+            print("正在安装项目依赖...")
+            # 确保在正确的项目目录下执行，输出实时显示
+            cmd = [executable] + manager.install_args()
             print(f"执行命令: {' '.join(cmd)} 在目录: {self.project_path}")
-            result = run_subprocess_command(cmd, cwd=self.project_path)
-            
-            if result.returncode == 0:
+            returncode, tail = stream_subprocess_command(cmd, cwd=self.project_path)
+            if returncode != 0 and manager.name == 'npm' and manager.lockfile:
+                # package-lock.json 与 package.json 不一致时 npm ci 会失败，改用 npm install 更新锁文件
+                print("npm ci 失败，改用 npm install 重新安装")
+                cmd = [executable, 'install']
+                returncode, tail = stream_subprocess_command(cmd, cwd=self.project_path)
+
+            if returncode == 0:
+                cache.record(detected)
                 print("依赖安装成功！")
                 return True
             else:
-                print(f"依赖安装失败: {result.stderr}")
+                cache.clear()
+                print("依赖安装失败: \n" + '\n'.join(tail[-20:]))
                 return False
         except Exception as e:
             print(f"安装依赖时出错: {str(e)}")
             return False
 
-    def run_project(self) -> None:
-        """运行项目"""
+    def _resolve_run_command(self, npm_executable: str) -> List[str]:
+        """根据 package.json 中的 scripts 确定启动命令"""
+        scripts = self.context.get_package_data().get('scripts', {})
+        for script_name in ('start', 'dev', 'serve'):
+            if script_name in scripts:
+                return [npm_executable, 'run', script_name]
+        # 如果没有预定义的脚本，使用默认的启动命令
+        print("警告: package.json 中未定义 'start' 脚本")
+        return [npm_executable, 'start']
+
+    def run_project(self) -> Optional[str]:
+        """
+        在后台运行项目，并等待开发服务器就绪或报错
+
+        Returns:
+            Optional[str]: 启动失败或编译出错时的错误输出，正常启动时返回None
+        """
         try:
             # 检查是否有项目正在运行
-            if self.running_process and self.running_process.poll() is None:
+            if self.supervisor is not None and self.supervisor.is_running:
                 print("项目已在运行中，请先停止当前项目再启动新项目")
-                return
+                return None
             
             # 检查npm是否可用
             npm_executable = find_executable('npm')
             if not npm_executable:
                 print("未找到 npm 命令，请确保已安装 Node.js")
-                return
+                return None
             
-            package_json_path = os.path.join(self.project_path, 'package.json')
-            if not os.path.exists(package_json_path):
+            if not self.context.get_package_json_text():
                 print("项目中没有找到 package.json 文件")
-                return
-                
-            with open(package_json_path, 'r', encoding='utf-8') as f:
-                package_data = json.load(f)
-            
-            # 确定运行命令
-            scripts = package_data.get('scripts', {})
-            run_cmd = None
-            script_name = None
-            if 'start' in scripts:
-                script_name = 'start'
-                run_cmd = [npm_executable, 'run', 'start']
-            elif 'dev' in scripts:
-                script_name = 'dev'
-                run_cmd = [npm_executable, 'run', 'dev']
-            elif 'serve' in scripts:
-                script_name = 'serve'
-                run_cmd = [npm_executable, 'run', 'serve']
-            else:
-                # 如果没有预定义的脚本，使用默认的启动命令
-                script_name = 'start'
-                run_cmd = [npm_executable, 'start']
-            
+                return None
+
+            run_cmd = self._resolve_run_command(npm_executable)
             print(f"正在启动项目: {' '.join(run_cmd)}")
-            print("项目将在新窗口中运行，您可以通过 Ctrl+C 停止项目")
-            print("您也可以在cmd中输入 'stop' 来停止项目")
-            
-            # 检查脚本是否在package.json中定义
-            if script_name not in scripts:
-                print(f"警告: package.json 中未定义 '{script_name}' 脚本")
-            
-            # 在新窗口中运行项目，使其可见且可以使用Ctrl+C停止
-            # Windows系统使用start命令在新窗口中运行
-            cmd_string = ' '.join(run_cmd)
-            # 使用 /d 参数确保正确切换驱动器和目录
-            self.running_process = subprocess.Popen(
-                f'start "Project Runner" cmd /k "cd /d \"{self.project_path}\" && {cmd_string}"',
-                shell=True
+            # 直接启动 npm（不经过 shell），输出在后台记录，可随时查看
+            self.supervisor = ProcessSupervisor(
+                run_cmd,
+                cwd=self.project_path,
+                buffer_lines=self.config.dev_server_log_lines
             )
-            
-            print("项目已启动，请查看新打开的窗口")
+            self.supervisor.start()
+
+            state = self.supervisor.wait_until_settled(self.config.dev_server_ready_timeout)
+            if state == STATE_READY:
+                address = f"：{self.supervisor.url}" if self.supervisor.url else ""
+                print(f"项目已启动{address}")
+            else:
+                error = self.supervisor.take_error()
+                if error:
+                    return error
+                print("项目进程已退出" if state == STATE_EXITED else "项目仍在启动中")
+            print("输入 logs 查看输出，restart 重启项目，stop 停止项目")
+            return None
         except json.JSONDecodeError as e:
             print(f"package.json 文件格式错误: {str(e)}")
         except Exception as e:
             print(f"运行项目时出错: {str(e)}")
+        return None
+
+    def restart_project(self) -> Optional[str]:
+        """
+        重启项目
+
+        Returns:
+            Optional[str]: 重启后出错时的错误输出
+        """
+        self.stop_project()
+        return self.run_project()
+
+    def show_logs(self, count: int = 50) -> None:
+        """打印项目最近的输出"""
+        if self.supervisor is None:
+            print("项目未运行")
+            return
+        print('\n'.join(self.supervisor.tail(count)) or "暂无输出")
+
+    def take_project_error(self) -> Optional[str]:
+        """
+        获取运行中的项目新出现的错误，同一次错误只返回一次
+
+        Returns:
+            Optional[str]: 错误输出，没有新错误时返回None
+        """
+        if self.supervisor is None:
+            return None
+        return self.supervisor.take_error()
 
     def stop_project(self) -> None:
-        """停止正在运行的项目"""
-        if self.running_process and self.running_process.poll() is None:
-            self.running_process.terminate()
-            try:
-                self.running_process.wait(timeout=5)
-                print("项目已停止")
-            except subprocess.TimeoutExpired:
-                self.running_process.kill()
-                print("项目无响应，已强制停止")
-            self.running_process = None
+        """停止正在运行的项目（连同其子进程）"""
+        if self.supervisor is not None and self.supervisor.stop():
+            print("项目已停止")
         else:
-            print("没有正在运行的项目")
\ No newline at end of file
+            print("没有正在运行的项目")
+        self.supervisor = None
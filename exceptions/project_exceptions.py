@@ -2,6 +2,9 @@
 项目自定义异常类
 """
 
+from typing import Optional
+
+
 class ProjectBaseException(Exception):
     """项目基础异常类"""
     def __init__(self, message: str):
@@ -30,4 +33,18 @@ class AIInteractionError(ProjectBaseException):
 class ProjectAnalysisError(ProjectBaseException):
     """项目分析错误异常"""
     def __init__(self, message: str):
-        super().__init__(f"项目分析错误: {message}")
\ No newline at end of file
+        super().__init__(f"项目分析错误: {message}")
+
+
+class PatchApplyError(FileOperationError):
+    """修改片段无法应用异常"""
+    def __init__(self, message: str):
+        super().__init__(f"修改片段无法应用: {message}")
+
+
+class RateLimitError(AIInteractionError):
+    """模型服务限流异常"""
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        # 服务端建议的重试等待时间（秒），未给出时为None
+        self.retry_after = retry_after
+        super().__init__(f"请求被限流: {message}")
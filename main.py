@@ -5,7 +5,41 @@
 前端自动修改Agent主入口文件
 """
 
-from agents.application import main
+import sys
+
+
+def parse_args(argv):
+    """解析命令行参数，只在有参数时才导入 argparse"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="前端自动修改Agent")
+    parser.add_argument('--batch', metavar='JOBS.jsonl', help="无交互地处理任务文件中的需求（每行一个 JSON 任务）")
+    parser.add_argument('--output', metavar='RESULTS.jsonl', help="批量模式的结果文件，默认输出到标准输出")
+    parser.add_argument('--workers', type=int, help="批量模式最多同时处理的项目数，默认为 CPU 核数")
+    parser.add_argument(
+        '--apply', choices=['always', 'never', 'no_delete'], default='no_delete',
+        help="任务未指定时的应用策略：always 总是应用，never 只生成不应用，no_delete 不应用包含删除的修改（默认）"
+    )
+    return parser.parse_args(argv)
+
+
+def main() -> None:
+    if len(sys.argv) > 1:
+        args = parse_args(sys.argv[1:])
+        if args.batch:
+            from agents.batch_runner import run_batch
+            sys.exit(run_batch(args.batch, args.output, args.workers, args.apply))
+
+    # 首个提示出现前只加载标准库，项目分析等模块在输入项目路径之后才导入
+    try:
+        project_path = input("请输入你的UI项目根目录路径：").strip()
+    except (KeyboardInterrupt, EOFError):
+        print("\n程序被用户中断")
+        sys.exit(0)
+
+    from agents.application import main as run
+    run(project_path)
+
 
 if __name__ == '__main__':
     main()
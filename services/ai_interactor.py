@@ -2,33 +2,146 @@
 AI交互模块
 """
 
-import dashscope
-import json
+import asyncio
+import itertools
 import re
-import time
-from typing import List, Dict, Any, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from services.config import Config
-from exceptions.project_exceptions import AIInteractionError
+from services.history_manager import HistoryManager, PrefixReuseTracker
+from services.llm_backends import LLMBackend, create_backend
+from services.react_stream_parser import ReActEvent, ReActStreamParser
+from services.response_cache import CachingBackend, ResponseCache
+from exceptions.project_exceptions import AIInteractionError, RateLimitError
+
+# 不修改项目、可以并发执行的Action
+READ_ONLY_ACTIONS = {'read_file', 'analyze_project', 'dependencies_of', 'dependents_of'}
+
+
+class _StreamFailure:
+    """在线程间传递流式接收过程中发生的异常"""
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+class _ReActTurn:
+    """一轮模型回复的解析结果"""
+
+    def __init__(self):
+        self.content = ''
+        self.final_answer: Optional[str] = None
+        self.actions: List[Tuple[str, str, Optional[asyncio.Future]]] = []
+        self.cut_offset: Optional[int] = None
 
 
 class AIInteractor:
-    def __init__(self, api_key: Optional[str] = None):
-        self.config = Config()
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        backend: Optional[LLMBackend] = None,
+        config: Optional[Config] = None
+    ):
+        # 与调用方共用同一个配置对象
+        self.config = config or Config()
         if api_key:
             self.config.api_key = api_key
+        self._backend = backend
         self.messages: List[Dict[str, str]] = []
+        # 发送请求时压缩较早的历史，请求大小不随对话轮数增长
+        self.history = HistoryManager(
+            token_budget=self.config.history_token_budget,
+            recent_messages=self.config.history_recent_messages,
+            compaction_chunk=self.config.history_compaction_chunk
+        )
+        self.prefix_tracker = PrefixReuseTracker()
         self.agent = None  # 添加对 agent 的引用
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._backend_lock = threading.Lock()
+        self.response_cache: Optional[ResponseCache] = None
+        self._fingerprint: Optional[Callable[[], str]] = None
+
+    @property
+    def backend(self) -> LLMBackend:
+        """大模型后端，首次使用时根据配置创建"""
+        # 并行生成时可能在多个线程中首次访问
+        with self._backend_lock:
+            if self._backend is None:
+                self._backend = create_backend(self.config)
+            if self.response_cache is not None and not isinstance(self._backend, CachingBackend):
+                self._backend = CachingBackend(self._backend, self.response_cache, self._fingerprint)
+            return self._backend
+
+    def set_response_cache(self, cache: ResponseCache, fingerprint: Optional[Callable[[], str]] = None) -> None:
+        """
+        启用模型回复缓存
+
+        Args:
+            cache: 回复缓存
+            fingerprint: 返回相关文件内容指纹的函数，文件变化后旧的回复不再命中
+        """
+        self.response_cache = cache
+        self._fingerprint = fingerprint
 
     def set_agent(self, agent):
         """设置 agent 引用，以便调用实际的 action"""
         self.agent = agent
 
-    def ask_with_react(self, prompt: str) -> str:
+    def ask_with_react(self, prompt: str, on_final_answer: Optional[Callable[[str], None]] = None) -> str:
+        """
+        使用ReAct策略与AI交互（同步接口，内部运行异步ReAct循环）
+
+        Args:
+            prompt: 用户提示
+            on_final_answer: 可选回调，Final Answer 的内容片段一到达即被调用
+        """
+        coroutine = self.ask_with_react_async(prompt, on_final_answer)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(coroutine)
+        # 已处于事件循环中时，在独立线程中运行新的事件循环
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            return executor.submit(asyncio.run, coroutine).result()
+
+    def ask_once(self, prompt: str) -> str:
+        """
+        发送一次独立的请求，不读取也不写入对话历史，可在多个线程中同时调用
+
+        不执行 Action，出错时不重试（限流等错误由调用方处理）。对话历史开头的系统消息
+        同样会发送，与单次生成使用相同的指令，所有并行请求也因此共用同一前缀。
+
+        Args:
+            prompt: 用户提示
+
+        Returns:
+            str: Final Answer 之后的内容，回复中没有 Final Answer 标识时为完整回复
+        """
+        messages = list(itertools.takewhile(lambda message: message['role'] == 'system', self.messages))
+        messages.append({"role": "user", "content": prompt})
+        content = self.backend.chat(self.config.model_name, messages)
+        final_answer = self._extract_final_answer_lines(content)
+        return final_answer if final_answer is not None else content.strip()
+
+    async def ask_with_react_async(
+        self,
+        prompt: str,
+        on_final_answer: Optional[Callable[[str], None]] = None
+    ) -> str:
         """
         使用ReAct策略与AI交互
+
+        模型输出在后台线程中接收，同时被增量解析：只读的 Action 在其所在行
+        结束时即在线程池中开始执行；模型在 Action 之后自行编造 Observation
+        时提前结束接收。
+
+        Args:
+            prompt: 用户提示
+            on_final_answer: 可选回调，Final Answer 的内容片段一到达即被调用
         """
         try:
-            dashscope.api_key = self.config.api_key
+            backend = self.backend
             self.messages.append({"role": "user", "content": prompt})
             
             max_iterations = 10
@@ -36,114 +149,41 @@ class AIInteractor:
             
             while iteration < max_iterations:
                 try:
-                    response = dashscope.Generation.call(
-                        model=self.config.model_name,
-                        messages=self.messages,
-                        stream=True,
-                        result_format='message'
-                    )
-
-                    content = ""
-                    for resp in response:
-                        if resp.status_code == 200 and hasattr(resp, 'output') and resp.output and 'choices' in resp.output:
-                            if resp.output['choices'] and len(resp.output['choices']) > 0:
-                                choice = resp.output['choices'][0]
-                                if 'message' in choice and choice['message']:
-                                    delta = choice['message'].get('content', '')
-                                    if delta:
-                                        content += delta
-                        elif resp.status_code != 200:
-                            raise AIInteractionError(
-                                f"API调用失败: status_code={resp.status_code}, "
-                                f"code={getattr(resp, 'code', 'N/A')}, "
-                                f"message={getattr(resp, 'message', 'N/A')}"
-                            )
+                    request_messages = self.history.build(self.messages)
+                    self.prefix_tracker.record(request_messages)
+                    turn = await self._stream_turn(backend, request_messages, on_final_answer)
+                    content = turn.content
                     
                     self.messages.append({"role": "assistant", "content": content.strip()})
 
                     # 检查是否包含Final Answer，如果包含则直接返回最终答案
-                    final_answer_match = re.search(r'Final Answer:\s*(.*)', content, re.DOTALL)
-                    if final_answer_match:
-                        # 提取Final Answer后的内容作为最终结果
-                        final_answer = final_answer_match.group(1).strip()
-                        return final_answer
-                    
-                    # 检查是否包含Thought过程
-                    thought_match = re.search(r'Thought:\s*(.*?)(?:\n(?:Action|Final Answer):|$)', content, re.DOTALL | re.IGNORECASE)
-                    if thought_match:
-                        thought = thought_match.group(1).strip()
-                        if thought:
-                            print(f"Thought: {thought}")
+                    if turn.final_answer is not None:
+                        return turn.final_answer
                     
-                    # 检查是否包含Action，支持多种格式如 "Action: FUNCTION(args)" 或 "Action: FUNCTION (args)"
-                    action_match = re.search(r'Action:\s*(\w+)\s*\((.*?)\)', content, re.IGNORECASE)
-                    if action_match:
-                        action = action_match.group(1)
-                        action_input = action_match.group(2).strip('\"')
-                        
-                        # 执行Action并获取Observation
-                        observation = self.execute_action(action, action_input)
+                    if turn.actions:
+                        # 等待所有Action执行完成并获取Observation
+                        observations = await self._collect_observations(turn.actions)
                         
                         # 将Observation添加到对话中
-                        observation_message = f"Observation: {observation}"
-                        # print(observation_message)  # 添加打印以便调试
+                        observation_message = self._format_observations(
+                            [(action, action_input) for action, action_input, _ in turn.actions],
+                            observations
+                        )
                         self.messages.append({"role": "user", "content": observation_message})
                         
                         iteration += 1
                     else:
-                        # 没有更多Action，检查是否包含Final Answer行，如果有则提取其后的内容
-                        # 这种情况是为了处理AI可能没有严格按照格式但在最后一行给出了答案的情况
-                        lines = content.strip().split('\n')
-                        final_answer_found = False
-                        final_answer_lines = []
-                        
-                        for line in lines:
-                            if line.startswith('Final Answer:'):
-                                final_answer_found = True
-                                # 提取"Final Answer:"后的内容（如果有）
-                                possible_answer = line[13:].strip()  # 13是"Final Answer:"的长度
-                                if possible_answer:
-                                    final_answer_lines.append(possible_answer)
-                            elif final_answer_found:
-                                # 在找到Final Answer行后，所有后续行都视为答案的一部分
-                                final_answer_lines.append(line)
-                        
-                        if final_answer_found:
-                            final_answer = '\n'.join(final_answer_lines).strip()
-                            return final_answer
-                        
-                        # 如果连Final Answer行都没有，记录警告并尝试从内容中提取有用信息
-                        print("警告：AI响应没有遵循ReAct格式，既没有Action也没有Final Answer标识")
-                        
-                        # 尝试从内容中提取可能的文件列表（针对文件列表生成场景）
-                        # 这是一种启发式方法，尝试从非标准格式中提取有用信息
-                        potential_files = []
-                        for line in lines:
-                            # 增强的启发式检查是否像文件路径或有效结果
-                            cleaned_line = line.strip()
-                            if (cleaned_line and 
-                                # 检查是否包含路径分隔符和扩展名，或者看起来像是一个合理的答案
-                                (('.' in cleaned_line and ('/' in cleaned_line or '\\' in cleaned_line)) or 
-                                 # 或者是不以特定ReAct关键字开头的有效内容
-                                 not cleaned_line.startswith(('Thought:', 'Action:', 'Observation:', 'Final Answer:')) and 
-                                 len(cleaned_line) > 0)):
-                                potential_files.append(cleaned_line)
-                        
-                        if potential_files:
-                            print("从非标准格式中提取到可能的文件列表")
-                            return '\n'.join(potential_files)
-                        else:
-                            # 如果无法提取到有用信息，返回整个内容
-                            print("无法从非标准格式中提取有用信息，返回完整内容")
-                            return content.strip()
+                        return self._extract_answer_without_action(content)
                 
                 except Exception as e:
                     print(f"调用AI接口时出错: {str(e)}")
                     # 实现重试机制
                     if iteration < self.config.max_retries - 1:
                         wait_time = 2 ** iteration  # 指数退避
+                        if isinstance(e, RateLimitError) and e.retry_after is not None:
+                            wait_time = e.retry_after
                         print(f"等待 {wait_time} 秒后重试...")
-                        time.sleep(wait_time)
+                        await asyncio.sleep(wait_time)
                         iteration += 1
                         continue
                     else:
@@ -157,21 +197,8 @@ class AIInteractor:
                 return final_answer
             else:
                 # 如果没有找到Final Answer，尝试其他方式提取答案
-                lines = final_content.strip().split('\n')
-                final_answer_found = False
-                final_answer_lines = []
-                
-                for line in lines:
-                    if line.startswith('Final Answer:'):
-                        final_answer_found = True
-                        possible_answer = line[13:].strip()
-                        if possible_answer:
-                            final_answer_lines.append(possible_answer)
-                    elif final_answer_found:
-                        final_answer_lines.append(line)
-                
-                if final_answer_found:
-                    final_answer = '\n'.join(final_answer_lines).strip()
+                final_answer = self._extract_final_answer_lines(final_content)
+                if final_answer is not None:
                     return final_answer
                 
                 # 最后的备选方案：发出警告并返回整个内容
@@ -181,6 +208,190 @@ class AIInteractor:
         except Exception as e:
             raise AIInteractionError(f"AI交互失败: {str(e)}")
 
+    async def _stream_turn(
+        self,
+        backend: LLMBackend,
+        messages: List[Dict[str, str]],
+        on_final_answer: Optional[Callable[[str], None]] = None
+    ) -> '_ReActTurn':
+        """
+        接收并增量解析一轮模型回复
+
+        Args:
+            backend: 大模型后端
+            messages: 发送的消息列表
+            on_final_answer: Final Answer 片段回调
+
+        Returns:
+            _ReActTurn: 本轮的内容、Final Answer 和已调度的 Action
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        queue: asyncio.Queue = asyncio.Queue()
+        finished = object()
+        stop = threading.Event()
+
+        def produce() -> None:
+            stream = backend.stream_chat(self.config.model_name, messages)
+            try:
+                for delta in stream:
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, delta)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, _StreamFailure(e))
+            finally:
+                close = getattr(stream, 'close', None)
+                if close:
+                    close()
+                loop.call_soon_threadsafe(queue.put_nowait, finished)
+
+        parser = ReActStreamParser()
+        turn = _ReActTurn()
+        # 出现会修改项目的 Action 后，其后的只读 Action 不再提前执行，保持先后顺序
+        barrier = False
+
+        def handle(events: List[ReActEvent]) -> bool:
+            nonlocal barrier
+            for event in events:
+                if event.kind == 'thought':
+                    print(f"Thought: {event.text}")
+                elif event.kind == 'action':
+                    future = None
+                    if event.name in READ_ONLY_ACTIONS and not barrier:
+                        future = loop.run_in_executor(executor, self.execute_action, event.name, event.argument)
+                    else:
+                        barrier = True
+                    turn.actions.append((event.name, event.argument, future))
+                elif event.kind == 'final_answer':
+                    if on_final_answer:
+                        on_final_answer(event.text)
+                elif event.kind == 'observation' and turn.actions:
+                    # 模型开始编造观察结果，之后的内容没有意义
+                    turn.cut_offset = event.offset
+                    return True
+            return False
+
+        producer = loop.run_in_executor(executor, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is finished:
+                    handle(parser.close())
+                    break
+                if isinstance(item, _StreamFailure):
+                    raise item.error
+                if handle(parser.feed(item)):
+                    stop.set()
+                    break
+        finally:
+            stop.set()
+            await producer
+
+        content = parser.content
+        turn.content = content if turn.cut_offset is None else content[:turn.cut_offset]
+        if turn.cut_offset is None:
+            turn.final_answer = parser.final_answer
+        return turn
+
+    async def _collect_observations(self, actions: List[Tuple[str, str, Optional[asyncio.Future]]]) -> List[str]:
+        """
+        按顺序获取各Action的Observation
+
+        已提前开始的只读Action直接等待其结果，其余Action按顺序执行。
+
+        Args:
+            actions: (Action名称, 参数, 已调度的任务) 列表
+
+        Returns:
+            List[str]: 每个Action的Observation
+        """
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        observations: List[str] = []
+        for action, action_input, future in actions:
+            if future is None:
+                future = loop.run_in_executor(executor, self.execute_action, action, action_input)
+            observations.append(await future)
+        return observations
+
+    @staticmethod
+    def _format_observations(actions: List[Tuple[str, str]], observations: List[str]) -> str:
+        """将一个或多个Action的结果格式化为Observation消息"""
+        if len(observations) == 1:
+            return f"Observation: {observations[0]}"
+        lines = ["Observation:"]
+        for index, ((action, action_input), observation) in enumerate(zip(actions, observations), 1):
+            lines.append(f"[{index}] {action}({action_input}): {observation}")
+        return '\n'.join(lines)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """获取执行流式接收和Action的线程池"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.config.action_workers,
+                thread_name_prefix='react'
+            )
+        return self._executor
+
+    @staticmethod
+    def _extract_final_answer_lines(content: str) -> Optional[str]:
+        """
+        逐行查找以 Final Answer: 开头的行，返回其后的内容；未找到时返回None
+        """
+        lines = content.strip().split('\n')
+        final_answer_found = False
+        final_answer_lines = []
+        
+        for line in lines:
+            if line.startswith('Final Answer:'):
+                final_answer_found = True
+                # 提取"Final Answer:"后的内容（如果有）
+                possible_answer = line[13:].strip()  # 13是"Final Answer:"的长度
+                if possible_answer:
+                    final_answer_lines.append(possible_answer)
+            elif final_answer_found:
+                # 在找到Final Answer行后，所有后续行都视为答案的一部分
+                final_answer_lines.append(line)
+        
+        if final_answer_found:
+            return '\n'.join(final_answer_lines).strip()
+        return None
+
+    def _extract_answer_without_action(self, content: str) -> str:
+        """
+        回复中既没有Action也没有匹配到Final Answer时，尽量提取有用的结果
+        """
+        # 这种情况是为了处理AI可能没有严格按照格式但在最后一行给出了答案的情况
+        final_answer = self._extract_final_answer_lines(content)
+        if final_answer is not None:
+            return final_answer
+        
+        # 如果连Final Answer行都没有，记录警告并尝试从内容中提取有用信息
+        print("警告：AI响应没有遵循ReAct格式，既没有Action也没有Final Answer标识")
+        
+        # 尝试从内容中提取可能的文件列表（针对文件列表生成场景）
+        # 这是一种启发式方法，尝试从非标准格式中提取有用信息
+        potential_files = []
+        for line in content.strip().split('\n'):
+            # 增强的启发式检查是否像文件路径或有效结果
+            cleaned_line = line.strip()
+            if (cleaned_line and 
+                # 检查是否包含路径分隔符和扩展名，或者看起来像是一个合理的答案
+                (('.' in cleaned_line and ('/' in cleaned_line or '\\' in cleaned_line)) or 
+                 # 或者是不以特定ReAct关键字开头的有效内容
+                 not cleaned_line.startswith(('Thought:', 'Action:', 'Observation:', 'Final Answer:')) and 
+                 len(cleaned_line) > 0)):
+                potential_files.append(cleaned_line)
+        
+        if potential_files:
+            print("从非标准格式中提取到可能的文件列表")
+            return '\n'.join(potential_files)
+        else:
+            # 如果无法提取到有用信息，返回整个内容
+            print("无法从非标准格式中提取有用信息，返回完整内容")
+            return content.strip()
+
     def execute_action(self, action: str, action_input: str) -> str:
         """
         执行特定的Action并返回结果
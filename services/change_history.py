@@ -0,0 +1,227 @@
+"""
+修改历史模块
+
+记录每次应用到项目的修改（一个修改集包含若干文件修改前后内容的哈希），文件内容
+保存在 FileTransaction 使用的对象存储中，相同内容只保存一份。修改集索引保存在
+.agent_cache/history/index.json，支持跨多轮对话撤销和重做。
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+from exceptions.project_exceptions import FileOperationError
+from services.file_transaction import BlobStore, FileChange, FileTransaction, OBJECTS_DIR_NAME, hash_file
+from services.project_index import CACHE_DIR_NAME, ensure_cache_dir
+
+HISTORY_DIR_NAME = 'history'
+INDEX_FILE_NAME = 'index.json'
+
+
+@dataclass
+class ChangeSet:
+    """一次应用到项目的修改"""
+    id: str
+    time: float
+    description: str
+    files: List[FileChange] = field(default_factory=list)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ChangeSet':
+        return cls(
+            id=data['id'],
+            time=data['time'],
+            description=data.get('description', ''),
+            files=[FileChange(**item) for item in data.get('files', [])]
+        )
+
+
+class ChangeHistory:
+    """项目的修改历史，position 之前的修改集为已应用，之后的为已撤销、可重做"""
+
+    def __init__(self, project_path: str, store: Optional[BlobStore] = None, max_change_sets: int = 200):
+        """
+        Args:
+            project_path: 项目根路径
+            store: 对象存储，默认与 FileTransaction 共用项目缓存目录下的 objects
+            max_change_sets: 最多保留的修改集数量，超出时丢弃最早的修改集
+        """
+        self.project_path = os.path.abspath(project_path)
+        cache_dir = os.path.join(self.project_path, CACHE_DIR_NAME)
+        self.store = store or BlobStore(os.path.join(cache_dir, OBJECTS_DIR_NAME))
+        self.index_path = os.path.join(cache_dir, HISTORY_DIR_NAME, INDEX_FILE_NAME)
+        self.max_change_sets = max_change_sets
+        self._lock = threading.RLock()
+        self.changes: List[ChangeSet] = []
+        self.position = 0
+        self._load()
+
+    def _load(self) -> None:
+        """读取索引文件，不存在或损坏时从空历史开始"""
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.changes = [ChangeSet.from_dict(item) for item in data.get('changes', [])]
+            self.position = min(int(data.get('position', len(self.changes))), len(self.changes))
+        except (OSError, ValueError, KeyError, TypeError):
+            self.changes = []
+            self.position = 0
+
+    def _save(self) -> None:
+        """原子地写入索引文件"""
+        ensure_cache_dir(os.path.dirname(self.index_path))
+        data = {'changes': [change.to_dict() for change in self.changes], 'position': self.position}
+        temp_path = self.index_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, self.index_path)
+
+    def record(self, files: List[FileChange], description: str = '') -> ChangeSet:
+        """
+        记录一个新的修改集，已撤销的修改集不能再重做
+
+        Args:
+            files: 修改的文件
+            description: 修改说明（通常为用户需求）
+
+        Returns:
+            ChangeSet: 记录的修改集
+        """
+        with self._lock:
+            change_set = ChangeSet(uuid.uuid4().hex[:12], time.time(), description, list(files))
+            dropped = self.changes[self.position:]
+            self.changes = self.changes[:self.position] + [change_set]
+            if len(self.changes) > self.max_change_sets:
+                dropped += self.changes[:-self.max_change_sets]
+                self.changes = self.changes[-self.max_change_sets:]
+            self.position = len(self.changes)
+            self._save()
+            if dropped:
+                self._collect_garbage()
+            return change_set
+
+    def undo(self, count: int = 1) -> List[str]:
+        """
+        撤销最近应用的若干个修改集
+
+        Args:
+            count: 撤销的修改集数量
+
+        Returns:
+            List[str]: 恢复的文件路径，没有可撤销的修改时为空
+
+        Raises:
+            FileOperationError: 文件在修改之后又被改动过，或恢复失败
+        """
+        with self._lock:
+            count = max(0, min(count, self.position))
+            selected = self.changes[self.position - count:self.position]
+            # 从最近的修改集往前回退，每个文件恢复到最早修改集之前的内容
+            restored = self._apply(selected[::-1], 'before', 'after')
+            self.position -= count
+            self._save()
+            return restored
+
+    def redo(self, count: int = 1) -> List[str]:
+        """
+        重新应用最近撤销的若干个修改集
+
+        Args:
+            count: 重做的修改集数量
+
+        Returns:
+            List[str]: 恢复的文件路径，没有可重做的修改时为空
+
+        Raises:
+            FileOperationError: 文件在撤销之后又被改动过，或恢复失败
+        """
+        with self._lock:
+            count = max(0, min(count, len(self.changes) - self.position))
+            selected = self.changes[self.position:self.position + count]
+            restored = self._apply(selected, 'after', 'before')
+            self.position += count
+            self._save()
+            return restored
+
+    def _apply(self, change_sets: List[ChangeSet], target_field: str, expected_field: str) -> List[str]:
+        """
+        把修改集涉及的文件恢复到目标状态
+
+        按顺序遍历修改集，每个文件的期望当前内容取第一次出现时的值，目标内容取最后
+        一次出现时的值。
+        """
+        if not change_sets:
+            return []
+        expected: Dict[str, Optional[str]] = {}
+        targets: Dict[str, Optional[str]] = {}
+        for change_set in change_sets:
+            for change in change_set.files:
+                expected.setdefault(change.path, getattr(change, expected_field))
+                targets[change.path] = getattr(change, target_field)
+
+        conflicts = [
+            path for path, digest in expected.items()
+            if hash_file(os.path.join(self.project_path, path)) != digest
+        ]
+        if conflicts:
+            raise FileOperationError("以下文件在此之后又被修改过，无法恢复：" + '、'.join(sorted(conflicts)))
+
+        # 恢复操作本身不记入历史
+        with FileTransaction(self.project_path, self.store) as transaction:
+            for path, digest in targets.items():
+                abs_path = os.path.join(self.project_path, path)
+                if digest is None:
+                    if os.path.exists(abs_path):
+                        transaction.delete(abs_path)
+                else:
+                    transaction.write_bytes(abs_path, self.store.get(digest))
+        return sorted(targets)
+
+    def list(self) -> List[ChangeSet]:
+        """
+        获取所有修改集，最早的在前
+
+        Returns:
+            List[ChangeSet]: 修改集列表
+        """
+        with self._lock:
+            return list(self.changes)
+
+    def format_history(self, limit: int = 20) -> str:
+        """
+        生成最近修改集的说明
+
+        Args:
+            limit: 最多列出的修改集数量
+
+        Returns:
+            str: 每行一个修改集，已撤销的标注“已撤销”
+        """
+        with self._lock:
+            if not self.changes:
+                return "暂无修改记录。"
+            lines = []
+            start = max(0, len(self.changes) - limit)
+            for index in range(len(self.changes) - 1, start - 1, -1):
+                change_set = self.changes[index]
+                stamp = time.strftime('%m-%d %H:%M', time.localtime(change_set.time))
+                state = '' if index < self.position else '（已撤销）'
+                description = change_set.description.splitlines()[0][:40] if change_set.description else '-'
+                lines.append(f"  {stamp} {description}，{len(change_set.files)} 个文件{state}")
+            return '\n'.join(lines)
+
+    def _collect_garbage(self) -> None:
+        """删除不再被任何修改集引用的对象"""
+        referenced = set()
+        for change_set in self.changes:
+            for change in change_set.files:
+                referenced.update(digest for digest in (change.before, change.after) if digest)
+        for digest in list(self.store.digests()):
+            if digest not in referenced:
+                self.store.remove(digest)
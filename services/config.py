@@ -3,6 +3,20 @@ from typing import Optional
 from exceptions.project_exceptions import ConfigurationError
 
 
+def _env_float(name: str, default: float) -> float:
+    """
+    Read a float from an environment variable, falling back to the default when it is malformed
+    """
+    value = os.getenv(name)
+    if value is None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        print(f"Warning: ignoring invalid {name}={value!r}, using {default}")
+        return default
+
+
 class Config:
     """
     Configuration class for the application
@@ -12,6 +26,33 @@ class Config:
         self._model_name: str = "qwen3-coder-plus"
         self._max_retries: int = 3
         self._timeout: int = 30
+        self._watch_mode: str = "auto"
+        self._watch_interval: float = 1.0
+        self._summary_token_budget: int = 2000
+        self._history_token_budget: int = 24000
+        self._history_recent_messages: int = 6
+        self._history_compaction_chunk: int = 6
+        self._action_workers: int = 4
+        self._edit_mode: str = "patch"
+        self._file_selection: str = "retrieval"
+        self._generation_mode: str = "single"
+        self._generation_concurrency: int = 4
+        self._retrieval_top_k: int = 8
+        self._retrieval_min_coverage: float = 0.5
+        self._max_prompt_file_bytes: int = 512 * 1024
+        self._ignore_whitespace_changes: bool = False
+        self._dev_server_log_lines: int = 1000
+        self._dev_server_ready_timeout: float = 60.0
+        self._response_cache: bool = os.getenv("AGENT_RESPONSE_CACHE", "1") != "0"
+        self._response_cache_ttl: float = 86400.0
+        self._response_cache_max_bytes: int = 50 * 1024 * 1024
+        self._llm_backend: str = os.getenv("AGENT_LLM_BACKEND", "dashscope")
+        self._api_base_url: Optional[str] = os.getenv("OPENAI_BASE_URL")
+        self._openai_api_key: Optional[str] = os.getenv("OPENAI_API_KEY")
+        self._scripted_responses_path: Optional[str] = os.getenv("AGENT_SCRIPTED_RESPONSES")
+        self._scripted_latency: float = _env_float("AGENT_SCRIPTED_LATENCY", 0.0)
+        self._scripted_token_rate: float = _env_float("AGENT_SCRIPTED_TOKEN_RATE", 0.0)
+        self._record_responses_path: Optional[str] = os.getenv("AGENT_RECORD_RESPONSES")
 
     @property
     def api_key(self) -> str:
@@ -74,4 +115,394 @@ class Config:
         """
         Set the timeout for API calls
         """
-        self._timeout = value
\ No newline at end of file
+        self._timeout = value
+
+    @property
+    def watch_mode(self) -> str:
+        """
+        Get the project watcher mode: auto, inotify, poll or off
+        """
+        return self._watch_mode
+
+    @watch_mode.setter
+    def watch_mode(self, value: str):
+        """
+        Set the project watcher mode
+        """
+        if value not in ("auto", "inotify", "poll", "off"):
+            raise ConfigurationError(f"Unsupported watch mode: {value}")
+        self._watch_mode = value
+
+    @property
+    def watch_interval(self) -> float:
+        """
+        Get the polling interval of the project watcher in seconds
+        """
+        return self._watch_interval
+
+    @watch_interval.setter
+    def watch_interval(self, value: float):
+        """
+        Set the polling interval of the project watcher in seconds
+        """
+        self._watch_interval = value
+
+    @property
+    def summary_token_budget(self) -> int:
+        """
+        Get the token budget of the project summary embedded in prompts
+        """
+        return self._summary_token_budget
+
+    @summary_token_budget.setter
+    def summary_token_budget(self, value: int):
+        """
+        Set the token budget of the project summary embedded in prompts
+        """
+        self._summary_token_budget = value
+
+    @property
+    def history_token_budget(self) -> int:
+        """
+        Get the token budget of the message list sent to the model
+        """
+        return self._history_token_budget
+
+    @history_token_budget.setter
+    def history_token_budget(self, value: int):
+        """
+        Set the token budget of the message list sent to the model
+        """
+        self._history_token_budget = value
+
+    @property
+    def history_recent_messages(self) -> int:
+        """
+        Get the number of most recent messages kept verbatim
+        """
+        return self._history_recent_messages
+
+    @history_recent_messages.setter
+    def history_recent_messages(self, value: int):
+        """
+        Set the number of most recent messages kept verbatim
+        """
+        self._history_recent_messages = value
+
+    @property
+    def llm_backend(self) -> str:
+        """
+        Get the LLM backend: dashscope, openai or scripted
+        """
+        return self._llm_backend
+
+    @llm_backend.setter
+    def llm_backend(self, value: str):
+        """
+        Set the LLM backend: dashscope, openai or scripted
+        """
+        if value not in ("dashscope", "openai", "scripted"):
+            raise ConfigurationError(f"Unsupported LLM backend: {value}")
+        self._llm_backend = value
+
+    @property
+    def api_base_url(self) -> Optional[str]:
+        """
+        Get the base URL of the OpenAI-compatible endpoint
+        """
+        return self._api_base_url
+
+    @api_base_url.setter
+    def api_base_url(self, value: Optional[str]):
+        """
+        Set the base URL of the OpenAI-compatible endpoint
+        """
+        self._api_base_url = value
+
+    @property
+    def openai_api_key(self) -> Optional[str]:
+        """
+        Get the API key of the OpenAI-compatible endpoint
+        """
+        return self._openai_api_key
+
+    @openai_api_key.setter
+    def openai_api_key(self, value: Optional[str]):
+        """
+        Set the API key of the OpenAI-compatible endpoint
+        """
+        self._openai_api_key = value
+
+    @property
+    def scripted_responses_path(self) -> Optional[str]:
+        """
+        Get the JSONL script replayed by the scripted backend
+        """
+        return self._scripted_responses_path
+
+    @scripted_responses_path.setter
+    def scripted_responses_path(self, value: Optional[str]):
+        """
+        Set the JSONL script replayed by the scripted backend
+        """
+        self._scripted_responses_path = value
+
+    @property
+    def scripted_latency(self) -> float:
+        """
+        Get the first-token latency of the scripted backend in seconds
+        """
+        return self._scripted_latency
+
+    @scripted_latency.setter
+    def scripted_latency(self, value: float):
+        """
+        Set the first-token latency of the scripted backend in seconds
+        """
+        self._scripted_latency = value
+
+    @property
+    def scripted_token_rate(self) -> float:
+        """
+        Get the output rate of the scripted backend in tokens per second (0 = unlimited)
+        """
+        return self._scripted_token_rate
+
+    @scripted_token_rate.setter
+    def scripted_token_rate(self, value: float):
+        """
+        Set the output rate of the scripted backend in tokens per second (0 = unlimited)
+        """
+        self._scripted_token_rate = value
+
+    @property
+    def record_responses_path(self) -> Optional[str]:
+        """
+        Get the JSONL file that records every model response for later replay
+        """
+        return self._record_responses_path
+
+    @record_responses_path.setter
+    def record_responses_path(self, value: Optional[str]):
+        """
+        Set the JSONL file that records every model response for later replay
+        """
+        self._record_responses_path = value
+
+    @property
+    def action_workers(self) -> int:
+        """
+        Get the thread pool size used for streaming and concurrent ReAct actions
+        """
+        return self._action_workers
+
+    @action_workers.setter
+    def action_workers(self, value: int):
+        """
+        Set the thread pool size used for streaming and concurrent ReAct actions
+        """
+        self._action_workers = value
+
+    @property
+    def edit_mode(self) -> str:
+        """
+        Get how the model returns file changes: patch (search/replace hunks) or whole (full file content)
+        """
+        return self._edit_mode
+
+    @edit_mode.setter
+    def edit_mode(self, value: str):
+        """
+        Set how the model returns file changes
+        """
+        if value not in ("patch", "whole"):
+            raise ConfigurationError(f"Unsupported edit mode: {value}")
+        self._edit_mode = value
+
+    @property
+    def file_selection(self) -> str:
+        """
+        Get how files to modify are chosen: retrieval (local index) or react (ask the model for a file list)
+        """
+        return self._file_selection
+
+    @file_selection.setter
+    def file_selection(self, value: str):
+        """
+        Set how files to modify are chosen
+        """
+        if value not in ("retrieval", "react"):
+            raise ConfigurationError(f"Unsupported file selection mode: {value}")
+        self._file_selection = value
+
+    @property
+    def generation_mode(self) -> str:
+        """
+        Get how file changes are generated: single (one response for all files) or parallel (one concurrent request per file)
+        """
+        return self._generation_mode
+
+    @generation_mode.setter
+    def generation_mode(self, value: str):
+        """
+        Set how file changes are generated
+        """
+        if value not in ("single", "parallel"):
+            raise ConfigurationError(f"Unsupported generation mode: {value}")
+        self._generation_mode = value
+
+    @property
+    def generation_concurrency(self) -> int:
+        """
+        Get the maximum number of concurrent per-file requests in parallel generation mode
+        """
+        return self._generation_concurrency
+
+    @generation_concurrency.setter
+    def generation_concurrency(self, value: int):
+        """
+        Set the maximum number of concurrent per-file requests in parallel generation mode
+        """
+        if value < 1:
+            raise ConfigurationError(f"Generation concurrency must be at least 1: {value}")
+        self._generation_concurrency = value
+
+    @property
+    def retrieval_top_k(self) -> int:
+        """
+        Get the number of candidate files the retrieval index puts into the modification prompt
+        """
+        return self._retrieval_top_k
+
+    @retrieval_top_k.setter
+    def retrieval_top_k(self, value: int):
+        """
+        Set the number of candidate files the retrieval index puts into the modification prompt
+        """
+        self._retrieval_top_k = value
+
+    @property
+    def retrieval_min_coverage(self) -> float:
+        """
+        Get the idf-weighted share of requirement terms the retrieval candidates must cover to skip the model-chosen file list
+        """
+        return self._retrieval_min_coverage
+
+    @retrieval_min_coverage.setter
+    def retrieval_min_coverage(self, value: float):
+        """
+        Set the idf-weighted share of requirement terms the retrieval candidates must cover to skip the model-chosen file list
+        """
+        self._retrieval_min_coverage = value
+
+    @property
+    def max_prompt_file_bytes(self) -> int:
+        """
+        Get the size above which a file's content is left out of the modification prompt
+        """
+        return self._max_prompt_file_bytes
+
+    @max_prompt_file_bytes.setter
+    def max_prompt_file_bytes(self, value: int):
+        """
+        Set the size above which a file's content is left out of the modification prompt
+        """
+        self._max_prompt_file_bytes = value
+
+    @property
+    def response_cache(self) -> bool:
+        """
+        Get whether complete model responses are cached on disk
+        """
+        return self._response_cache
+
+    @response_cache.setter
+    def response_cache(self, value: bool):
+        """
+        Set whether complete model responses are cached on disk
+        """
+        self._response_cache = value
+
+    @property
+    def response_cache_ttl(self) -> float:
+        """
+        Get how long a cached response stays valid, in seconds
+        """
+        return self._response_cache_ttl
+
+    @response_cache_ttl.setter
+    def response_cache_ttl(self, value: float):
+        """
+        Set how long a cached response stays valid, in seconds
+        """
+        self._response_cache_ttl = value
+
+    @property
+    def response_cache_max_bytes(self) -> int:
+        """
+        Get the total size above which least recently used responses are evicted
+        """
+        return self._response_cache_max_bytes
+
+    @response_cache_max_bytes.setter
+    def response_cache_max_bytes(self, value: int):
+        """
+        Set the total size above which least recently used responses are evicted
+        """
+        self._response_cache_max_bytes = value
+
+    @property
+    def history_compaction_chunk(self) -> int:
+        """
+        Get how many messages accumulate before the history compaction boundary moves
+        """
+        return self._history_compaction_chunk
+
+    @history_compaction_chunk.setter
+    def history_compaction_chunk(self, value: int):
+        """
+        Set how many messages accumulate before the history compaction boundary moves
+        """
+        self._history_compaction_chunk = value
+
+    @property
+    def ignore_whitespace_changes(self) -> bool:
+        """
+        Get whether writes differing only in trailing whitespace or line endings are skipped
+        """
+        return self._ignore_whitespace_changes
+
+    @ignore_whitespace_changes.setter
+    def ignore_whitespace_changes(self, value: bool):
+        """
+        Set whether writes differing only in trailing whitespace or line endings are skipped
+        """
+        self._ignore_whitespace_changes = value
+
+    @property
+    def dev_server_log_lines(self) -> int:
+        """
+        Get how many lines of dev server output are kept in memory
+        """
+        return self._dev_server_log_lines
+
+    @dev_server_log_lines.setter
+    def dev_server_log_lines(self, value: int):
+        """
+        Set how many lines of dev server output are kept in memory
+        """
+        self._dev_server_log_lines = value
+
+    @property
+    def dev_server_ready_timeout(self) -> float:
+        """
+        Get how long to wait for the dev server to report ready or an error
+        """
+        return self._dev_server_ready_timeout
+
+    @dev_server_ready_timeout.setter
+    def dev_server_ready_timeout(self, value: float):
+        """
+        Set how long to wait for the dev server to report ready or an error
+        """
+        self._dev_server_ready_timeout = value
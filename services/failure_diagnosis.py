@@ -0,0 +1,234 @@
+"""
+项目运行失败诊断模块
+
+在请求AI分析之前，先用本地规则检查 package.json、锁文件和
+node_modules/*/package.json 以及错误输出，识别缺少 package.json、格式错误、
+没有启动脚本、依赖未安装或与锁文件不一致、端口被占用等常见的机械性问题。
+只有没有规则命中时才需要交给AI分析。
+"""
+
+import json
+import os
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from services.install_cache import InstallCache, detect_package_manager
+
+# 诊断类别
+CATEGORY_DEPENDENCY = 'dependency'
+# 代码导入了 package.json 中没有声明的包，重新安装无法解决，需要先添加依赖
+CATEGORY_UNDECLARED_DEPENDENCY = 'undeclared_dependency'
+CATEGORY_CONFIG = 'config'
+CATEGORY_ENVIRONMENT = 'environment'
+CATEGORY_UNKNOWN = 'unknown'
+
+START_SCRIPTS = ('start', 'dev', 'serve')
+DEPENDENCY_FIELDS = ('dependencies', 'devDependencies')
+# 错误输出中缺少的模块：Cannot find module 'x' / Module not found: Can't resolve 'x' / Failed to resolve import "x"
+MISSING_MODULE_PATTERN = re.compile(
+    r'''(?:Cannot find module|Can't resolve|Failed to resolve import|Cannot find package)\s+['"]([^'"]+)['"]'''
+)
+# npm 脚本调用的命令不存在（依赖未安装时 vite、react-scripts 等命令不可用）
+COMMAND_NOT_FOUND_PATTERN = re.compile(
+    r'''sh: (?:\d+: )?([\w@./-]+): (?:command )?not found|([\w@./-]+): command not found|'([\w@./-]+)' is not recognized'''
+)
+PORT_IN_USE_PATTERN = re.compile(r'EADDRINUSE[^\n]*?(\d{2,5})?\s*$|port (\d{2,5}) is (?:already )?in use', re.IGNORECASE | re.MULTILINE)
+# 错误详情最多列出的包数
+MAX_LISTED_PACKAGES = 10
+
+
+@dataclass
+class Diagnosis:
+    """一次诊断的结论"""
+    category: str
+    rule: str
+    message: str
+    details: List[str] = field(default_factory=list)
+
+    @property
+    def is_dependency_problem(self) -> bool:
+        return self.category == CATEGORY_DEPENDENCY
+
+    def format(self) -> str:
+        """
+        生成供用户阅读的说明
+
+        Returns:
+            str: 结论及详情
+        """
+        lines = [self.message] + [f"  - {detail}" for detail in self.details[:MAX_LISTED_PACKAGES]]
+        if len(self.details) > MAX_LISTED_PACKAGES:
+            lines.append(f"  - ……共 {len(self.details)} 项")
+        return '\n'.join(lines)
+
+
+def _package_name(specifier: str) -> Optional[str]:
+    """从导入路径中取出包名，相对路径和别名返回None"""
+    if specifier.startswith(('.', '/', '~', '#')) or ':' in specifier:
+        return None
+    parts = specifier.split('/')
+    if specifier.startswith('@'):
+        # '@/components/...' 是常见的路径别名而不是包
+        return '/'.join(parts[:2]) if len(parts) >= 2 and len(parts[0]) > 1 else None
+    return parts[0]
+
+
+class FailureDiagnoser:
+    """基于规则的项目运行失败诊断"""
+
+    def __init__(self, project_path: str):
+        self.project_path = os.path.abspath(project_path)
+
+    def diagnose(self, error_output: str = '') -> Optional[Diagnosis]:
+        """
+        依次检查项目配置、依赖安装情况和错误输出
+
+        Args:
+            error_output: 项目运行时的错误输出或检查时的错误信息
+
+        Returns:
+            Optional[Diagnosis]: 第一个命中的规则给出的结论，没有规则命中时返回None
+        """
+        package_path = os.path.join(self.project_path, 'package.json')
+        try:
+            with open(package_path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except OSError:
+            return Diagnosis(CATEGORY_CONFIG, 'missing_package_json', "项目根目录中没有 package.json 文件")
+        try:
+            package = json.loads(text)
+        except ValueError as e:
+            return Diagnosis(CATEGORY_CONFIG, 'invalid_package_json', f"package.json 格式错误: {str(e)}")
+        if not isinstance(package, dict):
+            return Diagnosis(CATEGORY_CONFIG, 'invalid_package_json', "package.json 的内容不是对象")
+
+        scripts = package.get('scripts') or {}
+        if not any(name in scripts for name in START_SCRIPTS):
+            return Diagnosis(
+                CATEGORY_CONFIG, 'missing_start_script',
+                "package.json 中没有 start、dev 或 serve 脚本，无法确定如何启动项目",
+                sorted(scripts)
+            )
+
+        declared = self._declared_dependencies(package)
+        return (
+            self._check_installed(declared)
+            or self._check_error_output(error_output, declared)
+        )
+
+    @staticmethod
+    def _declared_dependencies(package: Dict) -> Dict[str, str]:
+        """package.json 中声明的依赖及版本范围"""
+        declared: Dict[str, str] = {}
+        for field_name in DEPENDENCY_FIELDS:
+            value = package.get(field_name)
+            if isinstance(value, dict):
+                declared.update({str(name): str(version) for name, version in value.items()})
+        return declared
+
+    def _check_installed(self, declared: Dict[str, str]) -> Optional[Diagnosis]:
+        """检查依赖是否已安装，以及是否与锁文件一致"""
+        if not declared:
+            return None
+        if os.path.exists(os.path.join(self.project_path, '.pnp.cjs')):
+            # Yarn Plug'n'Play 不使用 node_modules
+            return None
+        node_modules = os.path.join(self.project_path, 'node_modules')
+        if not os.path.isdir(node_modules):
+            return Diagnosis(
+                CATEGORY_DEPENDENCY, 'missing_node_modules',
+                f"依赖问题：项目声明了 {len(declared)} 个依赖，但还没有安装（node_modules 不存在）"
+            )
+
+        installed = {name: self._installed_version(name) for name in declared}
+        missing = sorted(name for name, version in installed.items() if version is None)
+        if missing:
+            return Diagnosis(
+                CATEGORY_DEPENDENCY, 'missing_packages',
+                f"依赖问题：package.json 中有 {len(missing)} 个依赖没有安装", missing
+            )
+
+        locked = self._locked_versions()
+        outdated = [
+            f"{name}：已安装 {installed[name]}，锁文件为 {locked[name]}"
+            for name in sorted(declared)
+            if locked.get(name) and installed[name] != locked[name]
+        ]
+        if outdated:
+            return Diagnosis(
+                CATEGORY_DEPENDENCY, 'lockfile_mismatch',
+                "依赖问题：已安装的依赖版本与锁文件不一致，需要重新安装", outdated
+            )
+
+        manager = detect_package_manager(self.project_path)
+        cache = InstallCache(self.project_path)
+        if os.path.exists(cache.state_path) and not cache.is_current(manager):
+            return Diagnosis(
+                CATEGORY_DEPENDENCY, 'dependencies_changed',
+                "依赖问题：package.json 或锁文件在上次安装依赖之后发生了变化，需要重新安装"
+            )
+        return None
+
+    def _installed_version(self, name: str) -> Optional[str]:
+        """读取 node_modules/<包名>/package.json 中的版本，未安装时返回None"""
+        path = os.path.join(self.project_path, 'node_modules', name, 'package.json')
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return str(json.load(f).get('version', ''))
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _locked_versions(self) -> Dict[str, str]:
+        """从 package-lock.json（v2/v3）读取顶层依赖锁定的版本"""
+        try:
+            with open(os.path.join(self.project_path, 'package-lock.json'), 'r', encoding='utf-8') as f:
+                packages = json.load(f).get('packages') or {}
+        except (OSError, ValueError, AttributeError):
+            return {}
+        prefix = 'node_modules/'
+        return {
+            path[len(prefix):]: str(info.get('version', ''))
+            for path, info in packages.items()
+            if path.startswith(prefix) and '/node_modules/' not in path and isinstance(info, dict)
+        }
+
+    def _check_error_output(self, error_output: str, declared: Dict[str, str]) -> Optional[Diagnosis]:
+        """根据错误输出判断缺少的包、缺少的命令或端口占用"""
+        if not error_output:
+            return None
+
+        packages = []
+        for specifier in MISSING_MODULE_PATTERN.findall(error_output):
+            name = _package_name(specifier)
+            if name and name not in packages:
+                packages.append(name)
+        if packages:
+            undeclared = [name for name in packages if name not in declared]
+            if undeclared:
+                return Diagnosis(
+                    CATEGORY_UNDECLARED_DEPENDENCY, 'undeclared_package',
+                    "代码导入了 package.json 中没有声明的包，重新安装依赖无法解决，"
+                    f"请先添加这些依赖（例如 npm install {' '.join(undeclared[:MAX_LISTED_PACKAGES])}）或修改导入",
+                    undeclared
+                )
+            return Diagnosis(
+                CATEGORY_DEPENDENCY, 'unresolved_package',
+                "依赖问题：以下依赖无法加载，需要重新安装", packages
+            )
+
+        commands = [name for groups in COMMAND_NOT_FOUND_PATTERN.findall(error_output) for name in groups if name]
+        if commands:
+            return Diagnosis(
+                CATEGORY_DEPENDENCY, 'command_not_found',
+                "依赖问题：启动脚本使用的命令不存在，通常是依赖没有安装", sorted(set(commands))
+            )
+
+        match = PORT_IN_USE_PATTERN.search(error_output)
+        if match:
+            port = next((group for group in match.groups() if group), '')
+            return Diagnosis(
+                CATEGORY_ENVIRONMENT, 'port_in_use',
+                f"端口 {port} 已被占用，请停止占用该端口的进程或修改开发服务器的端口" if port
+                else "端口已被占用，请停止占用该端口的进程或修改开发服务器的端口"
+            )
+        return None
@@ -0,0 +1,146 @@
+"""
+文件块流式解析模块
+
+解析 AI 回复中的文件修改协议：
+
+    ---file-start---
+    文件路径
+    ---code-start---
+    代码内容（或 delete）
+    ---code-end---
+    ---file-end---
+
+内容可以分片输入，每当一个文件块以 ---file-end---（或下一个
+---file-start---、输入结束）结束时立即产生该文件块。
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional
+
+FILE_START = '---file-start---'
+FILE_END = '---file-end---'
+CODE_START = '---code-start---'
+CODE_END = '---code-end---'
+_MARKER_TAIL = max(len(FILE_START), len(FILE_END)) - 1
+
+
+@dataclass
+class FileBlock:
+    """解析出的单个文件块"""
+    path: str
+    code: str = ''
+    # 格式错误时的说明，此时 path 为块开头的内容摘要
+    error: Optional[str] = None
+
+    @property
+    def is_delete(self) -> bool:
+        """是否为删除文件操作"""
+        return self.code.lower().strip() == 'delete'
+
+
+class FileBlockStreamParser:
+    """文件块的增量解析器"""
+
+    def __init__(self):
+        self._in_block = False
+        self._block: List[str] = []
+        # 已接收内容的末尾若干字符，用于发现跨片段的标记
+        self._tail = ''
+
+    def feed(self, chunk: str) -> List[FileBlock]:
+        """
+        输入一段增量内容
+
+        Args:
+            chunk: 新到达的文本
+
+        Returns:
+            List[FileBlock]: 由此完成的文件块
+        """
+        blocks: List[FileBlock] = []
+        text = chunk
+        while text:
+            window = self._tail + text
+            if not self._in_block:
+                index = window.find(FILE_START)
+                if index < 0:
+                    # 第一个文件块之前的内容（如说明文字）直接丢弃
+                    self._tail = window[-_MARKER_TAIL:]
+                    return blocks
+                text = window[index + len(FILE_START):]
+                self._in_block = True
+                self._block = []
+                self._tail = ''
+                continue
+
+            found = [(window.find(marker), marker) for marker in (FILE_END, FILE_START)]
+            found = [(index, marker) for index, marker in found if index >= 0]
+            if not found:
+                self._block.append(text)
+                self._tail = window[-_MARKER_TAIL:]
+                return blocks
+
+            index, marker = min(found)
+            full = ''.join(self._block) + text
+            position = len(full) - len(window) + index
+            block = self._make_block(full[:position])
+            if block is not None:
+                blocks.append(block)
+            self._in_block = False
+            self._block = []
+            self._tail = ''
+            # 下一个 ---file-start--- 需要留给下一轮识别
+            text = full[position + len(marker):] if marker == FILE_END else full[position:]
+        return blocks
+
+    def close(self) -> List[FileBlock]:
+        """
+        输入结束，返回最后一个未以 ---file-end--- 结束的文件块
+
+        Returns:
+            List[FileBlock]: 由此完成的文件块
+        """
+        blocks: List[FileBlock] = []
+        if self._in_block:
+            block = self._make_block(''.join(self._block))
+            if block is not None:
+                blocks.append(block)
+        self._in_block = False
+        self._block = []
+        self._tail = ''
+        return blocks
+
+    @staticmethod
+    def _make_block(body: str) -> Optional[FileBlock]:
+        """
+        将单个文件块的文本解析为 FileBlock
+
+        Args:
+            body: ---file-start--- 与块结束标记之间的文本
+
+        Returns:
+            Optional[FileBlock]: 解析结果，空块返回None
+        """
+        body = body.strip()
+        if not body:
+            return None
+        parts = body.split(CODE_START, 1)
+        if len(parts) < 2:
+            return FileBlock(path=body[:50], error="文件块格式不正确")
+        rel_path = parts[0].strip().split('\n')[0].strip()
+        code = parts[1].split(CODE_END)[0].strip()
+        return FileBlock(path=rel_path, code=code)
+
+
+def parse_file_blocks(text: str) -> List[FileBlock]:
+    """
+    一次性解析完整文本中的所有文件块
+
+    Args:
+        text: AI 回复的完整文本
+
+    Returns:
+        List[FileBlock]: 文件块列表
+    """
+    parser = FileBlockStreamParser()
+    return parser.feed(text) + parser.close()
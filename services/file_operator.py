@@ -3,14 +3,65 @@
 """
 
 import os
-import shutil
-from typing import Optional
+from dataclasses import dataclass
+from typing import Callable, List, Optional
 from pathlib import Path
-from exceptions.project_exceptions import FileOperationError
+from exceptions.project_exceptions import FileOperationError, PatchApplyError
+from services import patch_applier
 from utils.helpers import validate_file_path
 
+# 检查是否为二进制文件时扫描的字节数
+BINARY_SNIFF_BYTES = 8192
+
+
+@dataclass
+class FileReadResult:
+    """批量读取中单个文件的结果"""
+    path: str
+    content: str = ''
+    exists: bool = False
+    # 未读取内容的原因：outside（超出项目目录）、binary（二进制文件）、too_large（超过大小上限）、error
+    skipped: Optional[str] = None
+    size: int = 0
+
 
 class FileOperator:
+    # 文件写入/删除后的回调，用于让缓存的项目分析结果失效
+    _change_listeners: List[Callable[[str], None]] = []
+
+    @staticmethod
+    def add_change_listener(callback: Callable[[str], None]) -> None:
+        """
+        注册文件变更回调
+        
+        Args:
+            callback: 回调函数，参数为发生变化的文件路径
+        """
+        if callback not in FileOperator._change_listeners:
+            FileOperator._change_listeners.append(callback)
+
+    @staticmethod
+    def remove_change_listener(callback: Callable[[str], None]) -> None:
+        """
+        取消文件变更回调
+        
+        Args:
+            callback: 之前注册的回调函数
+        """
+        if callback in FileOperator._change_listeners:
+            FileOperator._change_listeners.remove(callback)
+
+    @staticmethod
+    def notify_change(file_path: str) -> None:
+        """
+        通知所有监听者文件已发生变化
+        
+        Args:
+            file_path: 发生变化的文件路径
+        """
+        for callback in list(FileOperator._change_listeners):
+            callback(file_path)
+
     @staticmethod
     def validate_path(file_path: str, base_path: str) -> bool:
         """
@@ -26,57 +77,106 @@ class FileOperator:
         return validate_file_path(file_path, base_path)
 
     @staticmethod
-    def backup_file(file_path: str) -> Optional[str]:
+    def write_code_to_file(
+        file_path: str,
+        code: str,
+        project_path: Optional[str] = None,
+        history=None,
+        description: str = ''
+    ) -> bool:
         """
-        创建文件备份
+        安全地将代码写入文件
         
         Args:
-            file_path: 要备份的文件路径
+            file_path: 目标文件路径
+            code: 要写入的代码内容
+            project_path: 项目根路径，用于路径验证
+            history: 记录本次写入的 ChangeHistory（需同时提供项目路径）
+            description: 记录到修改历史中的说明
             
         Returns:
-            str: 备份文件路径，如果文件不存在则返回None
+            bool: 是否写入成功
         """
+        # file_transaction 依赖本模块，在此处导入以避免循环导入
+        from services.file_transaction import FileTransaction
+
         try:
-            if os.path.exists(file_path):
-                backup_path = file_path + ".backup"
-                shutil.copy2(file_path, backup_path)
-                return backup_path
+            # 如果提供了项目路径，则验证文件路径
+            if project_path and not FileOperator.validate_path(file_path, project_path):
+                raise FileOperationError(f"文件路径 '{file_path}' 超出项目目录范围")
+            
+            if project_path:
+                # 通过单文件事务写入：原内容备份到项目缓存目录的对象存储，写入是原子的
+                with FileTransaction(project_path, history=history, description=description) as transaction:
+                    transaction.write(file_path, code)
+                if transaction.unchanged:
+                    print(f"文件内容未变化，跳过写入: {file_path}")
+                    return True
+            else:
+                try:
+                    with open(file_path, 'r', encoding='utf-8', newline='') as f:
+                        unchanged = f.read() == code.replace('\n', os.linesep)
+                except (OSError, UnicodeDecodeError):
+                    unchanged = False
+                if unchanged:
+                    print(f"文件内容未变化，跳过写入: {file_path}")
+                    return True
+                os.makedirs(os.path.dirname(file_path), exist_ok=True)
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.write(code)
+                FileOperator.notify_change(file_path)
+            
+            print(f"已写入文件: {file_path}")
+            return True
         except Exception as e:
-            raise FileOperationError(f"创建文件备份失败: {str(e)}")
-        return None
+            raise FileOperationError(f"写入文件 '{file_path}' 时出错: {str(e)}")
 
     @staticmethod
-    def write_code_to_file(file_path: str, code: str, project_path: Optional[str] = None) -> bool:
+    def apply_patch(file_path: str, patch_text: str, project_path: Optional[str] = None) -> str:
         """
-        安全地将代码写入文件
+        将 SEARCH/REPLACE 修改片段应用到现有文件，返回修改后的内容（不写入）
         
         Args:
             file_path: 目标文件路径
-            code: 要写入的代码内容
+            patch_text: 包含修改片段的文本
             project_path: 项目根路径，用于路径验证
             
         Returns:
-            bool: 是否写入成功
+            str: 修改后的完整文件内容
+            
+        Raises:
+            PatchApplyError: 文件不存在或片段无法唯一定位
+        """
+        if not os.path.exists(file_path):
+            raise PatchApplyError(f"文件 '{file_path}' 不存在")
+        content = FileOperator.read_file(file_path, project_path)
+        return patch_applier.apply_patch(content, patch_text)
+
+    @staticmethod
+    def delete_file(file_path: str, project_path: Optional[str] = None) -> bool:
+        """
+        安全地删除文件
+        
+        Args:
+            file_path: 要删除的文件路径
+            project_path: 项目根路径，用于路径验证
+            
+        Returns:
+            bool: 是否删除成功，文件不存在时返回False
         """
         try:
-            # 如果提供了项目路径，则验证文件路径
             if project_path and not FileOperator.validate_path(file_path, project_path):
                 raise FileOperationError(f"文件路径 '{file_path}' 超出项目目录范围")
             
-            # 创建目录（如果不存在）
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-            
-            # 创建备份（如果文件已存在）
-            FileOperator.backup_file(file_path)
-            
-            # 写入文件
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(code)
-            
-            print(f"已写入文件: {file_path}")
+            if not os.path.exists(file_path):
+                return False
+            os.remove(file_path)
+            FileOperator.notify_change(file_path)
             return True
+        except FileOperationError:
+            raise
         except Exception as e:
-            raise FileOperationError(f"写入文件 '{file_path}' 时出错: {str(e)}")
+            raise FileOperationError(f"删除文件 '{file_path}' 时出错: {str(e)}")
 
     @staticmethod
     def read_file(file_path: str, project_path: Optional[str] = None) -> str:
@@ -101,4 +201,57 @@ class FileOperator:
         except Exception as e:
             raise FileOperationError(f"读取文件 '{file_path}' 时出错: {str(e)}")
         
-        return ""
\ No newline at end of file
+        return ""
+
+    @staticmethod
+    def read_files(
+        file_paths: List[str],
+        project_path: str,
+        max_bytes: int = 512 * 1024,
+        max_workers: int = 8
+    ) -> List[FileReadResult]:
+        """
+        并发读取多个项目文件
+        
+        项目根目录只解析一次；二进制文件和超过大小上限的文件不读取内容。
+        
+        Args:
+            file_paths: 相对于项目根目录（或绝对）的文件路径列表
+            project_path: 项目根路径，用于路径验证
+            max_bytes: 读取内容的文件大小上限
+            max_workers: 读取线程数
+            
+        Returns:
+            List[FileReadResult]: 与 file_paths 顺序一致的读取结果
+        """
+        root = os.path.realpath(project_path)
+        prefix = root.rstrip(os.sep) + os.sep
+
+        def read_one(path: str) -> FileReadResult:
+            abs_path = os.path.realpath(os.path.join(root, path))
+            if abs_path != root and not abs_path.startswith(prefix):
+                return FileReadResult(path, skipped='outside')
+            try:
+                size = os.stat(abs_path).st_size
+            except OSError:
+                return FileReadResult(path)
+            if size > max_bytes:
+                return FileReadResult(path, exists=True, skipped='too_large', size=size)
+            try:
+                with open(abs_path, 'rb') as f:
+                    data = f.read()
+                if b'\0' in data[:BINARY_SNIFF_BYTES]:
+                    return FileReadResult(path, exists=True, skipped='binary', size=size)
+                return FileReadResult(path, data.decode('utf-8'), exists=True, size=size)
+            except UnicodeDecodeError:
+                return FileReadResult(path, exists=True, skipped='binary', size=size)
+            except (OSError, ValueError):
+                return FileReadResult(path, exists=True, skipped='error', size=size)
+
+        if len(file_paths) <= 1:
+            return [read_one(path) for path in file_paths]
+        # concurrent.futures 会连带导入 logging 等模块，只在需要并发读取时导入
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(file_paths))) as executor:
+            return list(executor.map(read_one, file_paths))
@@ -0,0 +1,380 @@
+"""
+文件事务模块
+
+一组文件写入/删除先全部暂存到目标文件旁的临时文件并 fsync，提交时再依次用
+os.replace 替换到位。提交前后的内容以 zlib 压缩后保存到 .agent_cache/objects
+下按内容哈希寻址的对象存储中，提交中途出错时自动恢复；提交的修改可交给
+ChangeHistory 记录，以便撤销和重做。
+"""
+
+import hashlib
+import os
+import shutil
+import uuid
+import zlib
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+from exceptions.project_exceptions import FileOperationError
+from services.file_operator import FileOperator
+from services.project_index import CACHE_DIR_NAME, ensure_cache_dir
+
+OBJECTS_DIR_NAME = 'objects'
+TEMP_SUFFIX = '.agent-tmp'
+
+
+@dataclass
+class FileChange:
+    """事务中单个文件的变化，before/after 为对象存储中的哈希，文件不存在时为None"""
+    path: str
+    before: Optional[str]
+    after: Optional[str]
+
+
+def _fsync_directory(path: str) -> None:
+    """尽力将目录项的变化落盘（Windows 不支持，忽略）"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def normalize_whitespace(text: str) -> str:
+    """去掉行尾空白并统一换行符，用于判断两份内容是否只有空白差异"""
+    return '\n'.join(line.rstrip() for line in text.splitlines()).rstrip('\n')
+
+
+def hash_file(path: str) -> Optional[str]:
+    """计算文件当前内容的哈希（与 BlobStore 一致），文件不存在时返回None"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class BlobStore:
+    """按内容 SHA-256 寻址、zlib 压缩的对象存储，相同内容只保存一份"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def put(self, data: bytes) -> str:
+        """
+        保存内容
+
+        Args:
+            data: 文件内容
+
+        Returns:
+            str: 内容的十六进制哈希
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        # 已存在相同内容的对象时不再写入
+        if not os.path.exists(path):
+            ensure_cache_dir(os.path.dirname(path))
+            temp_path = path + TEMP_SUFFIX
+            with open(temp_path, 'wb') as f:
+                f.write(zlib.compress(data, 6))
+            os.replace(temp_path, path)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        """
+        读取内容
+
+        Args:
+            digest: put 返回的哈希
+
+        Returns:
+            bytes: 文件内容
+
+        Raises:
+            FileOperationError: 对象不存在
+        """
+        try:
+            with open(self._path(digest), 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            raise FileOperationError(f"备份对象 {digest[:12]} 不存在: {str(e)}")
+        try:
+            return zlib.decompress(data)
+        except zlib.error:
+            # 早期版本保存的未压缩对象
+            return data
+
+    def digests(self) -> Iterator[str]:
+        """遍历存储中所有对象的哈希"""
+        try:
+            prefixes = os.listdir(self.root)
+        except OSError:
+            return
+        for prefix in prefixes:
+            try:
+                names = os.listdir(os.path.join(self.root, prefix))
+            except OSError:
+                continue
+            for name in names:
+                if not name.endswith(TEMP_SUFFIX):
+                    yield prefix + name
+
+    def remove(self, digest: str) -> None:
+        """删除单个对象"""
+        try:
+            os.remove(self._path(digest))
+        except OSError:
+            pass
+
+
+class FileTransaction:
+    """一组文件修改的原子提交"""
+
+    def __init__(
+        self,
+        project_path: str,
+        store: Optional[BlobStore] = None,
+        history=None,
+        description: str = '',
+        ignore_whitespace: bool = False
+    ):
+        """
+        Args:
+            project_path: 项目根路径
+            store: 备份对象存储，默认为项目缓存目录下的 objects
+            history: 提交后记录本次修改的 ChangeHistory，为None时不记录
+            description: 记录到历史中的说明
+            ignore_whitespace: 为True时，与现有文件只有行尾空白或换行符差异的文本写入视为无变化
+        """
+        self.project_path = os.path.abspath(project_path)
+        self.cache_dir = os.path.join(self.project_path, CACHE_DIR_NAME)
+        self.store = store or BlobStore(os.path.join(self.cache_dir, OBJECTS_DIR_NAME))
+        self.history = history
+        self.description = description
+        self.ignore_whitespace = ignore_whitespace
+        # (目标绝对路径, 临时文件路径, 新内容的哈希)；删除操作的后两项为None
+        self._operations: List[Tuple[str, Optional[str], Optional[str]]] = []
+        self._created_dirs: List[str] = []
+        self.committed = False
+        # 内容与磁盘上相同、不需要写入的文件（绝对路径）
+        self._unchanged: List[str] = []
+        # 提交后实际发生的变化
+        self.changes: List[FileChange] = []
+
+    def __enter__(self) -> 'FileTransaction':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        if exc_type is None and not self.committed:
+            self.commit()
+        elif not self.committed:
+            self.abort()
+
+    @property
+    def paths(self) -> List[str]:
+        """已暂存操作的目标路径（含内容未变化的文件）"""
+        return [target for target, _, _ in self._operations] + self._unchanged
+
+    @property
+    def unchanged(self) -> List[str]:
+        """内容与磁盘上相同、没有写入的文件（相对路径）"""
+        return [self._relative(path) for path in self._unchanged]
+
+    @property
+    def created(self) -> List[str]:
+        """提交后新建的文件（相对路径）"""
+        return [change.path for change in self.changes if change.before is None]
+
+    @property
+    def modified(self) -> List[str]:
+        """提交后内容被修改的文件（相对路径）"""
+        return [change.path for change in self.changes if change.before is not None and change.after is not None]
+
+    @property
+    def deleted(self) -> List[str]:
+        """提交后被删除的文件（相对路径）"""
+        return [change.path for change in self.changes if change.after is None]
+
+    def _relative(self, abs_path: str) -> str:
+        return os.path.relpath(abs_path, self.project_path).replace('\\', '/')
+
+    @staticmethod
+    def _same_content(abs_path: str, data: bytes) -> bool:
+        """先比较文件大小，大小相同时再比较内容，判断磁盘上的文件是否与新内容相同"""
+        try:
+            if os.path.getsize(abs_path) != len(data):
+                return False
+            with open(abs_path, 'rb') as f:
+                return f.read() == data
+        except OSError:
+            return False
+
+    def _check_path(self, file_path: str) -> str:
+        """验证路径并确保同一文件只暂存一次"""
+        abs_path = os.path.abspath(file_path)
+        if not FileOperator.validate_path(abs_path, self.project_path):
+            raise FileOperationError(f"文件路径 '{file_path}' 超出项目目录范围")
+        if abs_path in self.paths:
+            raise FileOperationError(f"文件 '{file_path}' 在同一事务中被重复修改")
+        return abs_path
+
+    def write(self, file_path: str, content: str) -> None:
+        """
+        暂存一次文本写入，换行符按平台转换（与文本模式写入一致）
+
+        Args:
+            file_path: 目标文件路径
+            content: 新内容
+        """
+        if self.ignore_whitespace and os.path.isfile(file_path):
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    current = f.read()
+            except (OSError, UnicodeDecodeError):
+                current = None
+            if current is not None and normalize_whitespace(current) == normalize_whitespace(content):
+                self._unchanged.append(self._check_path(file_path))
+                return
+        self.write_bytes(file_path, content.replace('\n', os.linesep).encode('utf-8'))
+
+    def write_bytes(self, file_path: str, data: bytes) -> None:
+        """
+        暂存一次写入：内容写入目标文件旁的临时文件并 fsync，内容与现有文件相同时
+        只记录为未变化，不创建临时文件
+
+        Args:
+            file_path: 目标文件路径
+            data: 新内容
+        """
+        abs_path = self._check_path(file_path)
+        if self._same_content(abs_path, data):
+            self._unchanged.append(abs_path)
+            return
+        directory = os.path.dirname(abs_path)
+        missing = []
+        parent = directory
+        while not os.path.isdir(parent):
+            missing.append(parent)
+            parent = os.path.dirname(parent)
+        os.makedirs(directory, exist_ok=True)
+        self._created_dirs.extend(missing)
+
+        temp_path = os.path.join(directory, f".{os.path.basename(abs_path)}.{uuid.uuid4().hex[:8]}{TEMP_SUFFIX}")
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            if os.path.exists(abs_path):
+                shutil.copymode(abs_path, temp_path)
+        except OSError as e:
+            self._remove_quietly(temp_path)
+            raise FileOperationError(f"暂存文件 '{file_path}' 时出错: {str(e)}")
+        self._operations.append((abs_path, temp_path, hashlib.sha256(data).hexdigest()))
+
+    def delete(self, file_path: str) -> None:
+        """
+        暂存一次删除
+
+        Args:
+            file_path: 要删除的文件路径
+        """
+        self._operations.append((self._check_path(file_path), None, None))
+
+    def commit(self) -> None:
+        """
+        提交所有暂存的修改
+
+        先把所有目标文件修改前后的内容存入对象存储，再依次替换/删除；任何一步
+        失败时恢复已经完成的部分并抛出异常，项目不会停留在修改到一半的状态。
+        内容没有变化的文件直接跳过。
+
+        Raises:
+            FileOperationError: 提交失败（已恢复原状）
+        """
+        if self.committed:
+            return
+        try:
+            befores = [hash_file(target) for target, _, _ in self._operations]
+            # 暂存之后才变得与新内容相同的文件不替换、不备份，也不记入历史
+            operations = []
+            for (target, temp_path, after), before in zip(self._operations, befores):
+                if before == after:
+                    if temp_path is not None:
+                        self._remove_quietly(temp_path)
+                        self._unchanged.append(target)
+                    continue
+                operations.append((target, temp_path, after, before))
+            for target, temp_path, after, before in operations:
+                if before is not None:
+                    with open(target, 'rb') as f:
+                        self.store.put(f.read())
+                if temp_path is not None:
+                    with open(temp_path, 'rb') as f:
+                        self.store.put(f.read())
+        except OSError as e:
+            self.abort()
+            raise FileOperationError(f"备份原始文件时出错: {str(e)}")
+
+        done: List[Tuple[str, Optional[str]]] = []
+        try:
+            for target, temp_path, _, before in operations:
+                if temp_path is not None:
+                    os.replace(temp_path, target)
+                elif before is not None:
+                    os.remove(target)
+                done.append((target, before))
+        except OSError as e:
+            self._restore(done)
+            self.abort()
+            raise FileOperationError(f"提交文件修改时出错，已恢复原状: {str(e)}")
+
+        for directory in {os.path.dirname(target) for target, _, _, _ in operations}:
+            if os.path.isdir(directory):
+                _fsync_directory(directory)
+        self.committed = True
+        self.changes = [FileChange(self._relative(target), before, after) for target, _, after, before in operations]
+        if self.history is not None and self.changes:
+            self.history.record(self.changes, self.description)
+        for target, _, _, _ in operations:
+            FileOperator.notify_change(target)
+
+    def abort(self) -> None:
+        """放弃所有暂存的修改，删除临时文件和为此新建的空目录"""
+        for _, temp_path, _ in self._operations:
+            if temp_path is not None:
+                self._remove_quietly(temp_path)
+        for directory in reversed(self._created_dirs):
+            try:
+                os.rmdir(directory)
+            except OSError:
+                pass
+        self._operations = []
+        self._created_dirs = []
+        self._unchanged = []
+
+    def _restore(self, entries: List[Tuple[str, Optional[str]]]) -> None:
+        """按备份恢复文件（尽力而为，用于提交失败时）"""
+        for target, before in reversed(entries):
+            try:
+                if before is None:
+                    self._remove_quietly(target)
+                else:
+                    with open(target, 'wb') as f:
+                        f.write(self.store.get(before))
+            except (OSError, FileOperationError):
+                continue
+
+    @staticmethod
+    def _remove_quietly(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,223 @@
+"""
+对话历史管理模块
+
+AIInteractor.messages 保存完整的对话记录，发送请求时由 HistoryManager
+生成受token预算约束的消息列表：系统消息、正在进行的一轮（开启该轮的提问
+及其后的回答和观察结果）和最近的消息原样保留，已完成轮次中较早的观察结果、
+回答和提问被压缩或去重，超出预算的最早消息被丢弃。
+
+压缩和丢弃都以固定大小的分块为单位推进，连续请求之间的消息列表前缀
+保持不变，以便服务端的前缀缓存生效。PrefixReuseTracker 统计这一效果。
+"""
+
+import hashlib
+from typing import Dict, List, Optional, Set
+from utils.helpers import estimate_tokens
+
+OBSERVATION_PREFIX = 'Observation:'
+# 回答中需要保留的ReAct关键行
+REACT_KEYWORDS = ('Thought:', 'Action:', 'Final Answer:')
+# 每条消息除内容外的固定开销（角色等）
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class HistoryManager:
+    """对话历史的滑动窗口与压缩"""
+
+    def __init__(
+        self,
+        token_budget: int = 24000,
+        recent_messages: int = 6,
+        compacted_chars: int = 200,
+        compaction_chunk: int = 6
+    ):
+        """
+        Args:
+            token_budget: 请求消息列表的token预算
+            recent_messages: 至少原样保留的最近消息数
+            compacted_chars: 较早消息压缩后保留的最大字符数
+            compaction_chunk: 压缩和丢弃的分块大小，边界每积累这么多条消息才移动一次
+        """
+        self.token_budget = token_budget
+        self.recent_messages = recent_messages
+        self.compacted_chars = compacted_chars
+        self.compaction_chunk = max(1, compaction_chunk)
+
+    @staticmethod
+    def message_tokens(message: Dict[str, str]) -> int:
+        """估算单条消息的token数"""
+        return estimate_tokens(message.get('content', '')) + MESSAGE_OVERHEAD_TOKENS
+
+    def build(self, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        生成发送给模型的消息列表
+
+        Args:
+            messages: 完整的对话记录
+
+        Returns:
+            List[Dict[str, str]]: 压缩后的消息列表
+        """
+        head_size = 0
+        while head_size < len(messages) and messages[head_size]['role'] == 'system':
+            head_size += 1
+        head = messages[:head_size]
+        body = messages[head_size:]
+        # 压缩边界按分块对齐，两次移动之间已压缩部分保持不变；边界不会越过正在进行的一轮，
+        # 一轮中经过多次 Action/Observation 后，开启该轮的提问（需求和文件内容）仍原样发送
+        split = max(0, len(body) - self.recent_messages)
+        split -= split % self.compaction_chunk
+        split = min(split, self._current_turn_start(body))
+        older, recent = body[:split], body[split:]
+
+        # 从新到旧压缩，较早的重复观察结果只保留最新的一份；只在已压缩部分内去重，
+        # 新到达的消息不会改变已压缩部分
+        seen: Set[str] = set()
+        compacted = [self._compact(message, seen) for message in reversed(older)]
+        compacted.reverse()
+
+        # 超出预算时从最早的消息开始丢弃，丢弃的条数同样按分块对齐
+        remaining = self.token_budget - sum(self.message_tokens(m) for m in head + recent)
+        total = sum(self.message_tokens(m) for m in compacted)
+        dropped = 0
+        while dropped < len(compacted) and total > remaining:
+            total -= self.message_tokens(compacted[dropped])
+            dropped += 1
+        if dropped % self.compaction_chunk:
+            dropped = min(len(compacted), dropped + self.compaction_chunk - dropped % self.compaction_chunk)
+        kept = compacted[dropped:]
+
+        # 窗口起点不能是孤立的回答
+        while kept and kept[0]['role'] == 'assistant':
+            kept.pop(0)
+        return head + kept + recent
+
+    @staticmethod
+    def _current_turn_start(body: List[Dict[str, str]]) -> int:
+        """
+        查找正在进行的一轮的起点
+
+        Args:
+            body: 除系统消息外的对话记录
+
+        Returns:
+            int: 最后一条不是观察结果的用户消息的下标，没有时为 len(body)
+        """
+        for index in range(len(body) - 1, -1, -1):
+            message = body[index]
+            if message['role'] == 'user' and not message['content'].startswith(OBSERVATION_PREFIX):
+                return index
+        return len(body)
+
+    @staticmethod
+    def _digest(content: str) -> str:
+        """计算消息内容的摘要，用于去重"""
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    def _compact(self, message: Dict[str, str], seen: Set[str]) -> Dict[str, str]:
+        """
+        压缩单条较早的消息
+
+        Args:
+            message: 原始消息
+            seen: 已出现过的观察结果摘要，会被更新
+
+        Returns:
+            Dict[str, str]: 压缩后的消息
+        """
+        content = message['content']
+        role = message['role']
+        if role == 'user' and content.startswith(OBSERVATION_PREFIX):
+            digest = self._digest(content)
+            if digest in seen:
+                return {'role': role, 'content': f"{OBSERVATION_PREFIX} （与之后的观察结果相同，已省略）"}
+            seen.add(digest)
+            first_line = content.split('\n', 1)[0]
+            return {'role': role, 'content': self._shorten(first_line, len(content) - len(first_line))}
+        if role == 'assistant':
+            lines = [
+                self._shorten(line.strip(), 0)
+                for line in content.split('\n') if line.strip().startswith(REACT_KEYWORDS)
+            ]
+            if lines:
+                return {'role': role, 'content': '\n'.join(lines)}
+        return {'role': role, 'content': self._shorten(content, 0)}
+
+    def _shorten(self, text: str, omitted: int) -> str:
+        """截断文本并注明省略的字符数"""
+        if len(text) > self.compacted_chars:
+            omitted += len(text) - self.compacted_chars
+            text = text[:self.compacted_chars]
+        if omitted > 0:
+            return f"{text}…（已省略 {omitted} 字符）"
+        return text
+
+
+class PrefixReuseTracker:
+    """统计连续请求之间消息列表的公共前缀，衡量服务端前缀缓存可复用的比例"""
+
+    def __init__(self):
+        self._previous: Optional[List[Dict[str, str]]] = None
+        self.requests = 0
+        self.reused_tokens = 0
+        self.total_tokens = 0
+        self.last_ratio = 0.0
+
+    def record(self, messages: List[Dict[str, str]]) -> float:
+        """
+        记录一次请求
+
+        Args:
+            messages: 实际发送的消息列表
+
+        Returns:
+            float: 与上一次请求的公共前缀占本次请求的比例（按token估算）
+        """
+        total = sum(HistoryManager.message_tokens(m) for m in messages)
+        reused = 0
+        previous = self._previous or []
+        for index, message in enumerate(messages):
+            if index >= len(previous) or previous[index]['role'] != message['role']:
+                break
+            if previous[index]['content'] == message['content']:
+                reused += HistoryManager.message_tokens(message)
+                continue
+            # 第一条不同的消息，只计算内容的公共前缀
+            reused += estimate_tokens(self._common_prefix(previous[index]['content'], message['content']))
+            break
+
+        self._previous = [dict(m) for m in messages]
+        self.requests += 1
+        self.reused_tokens += reused
+        self.total_tokens += total
+        self.last_ratio = reused / total if total else 0.0
+        return self.last_ratio
+
+    @staticmethod
+    def _common_prefix(a: str, b: str) -> str:
+        """二分查找两个字符串的公共前缀"""
+        low, high = 0, min(len(a), len(b))
+        while low < high:
+            middle = (low + high + 1) // 2
+            if a[:middle] == b[:middle]:
+                low = middle
+            else:
+                high = middle - 1
+        return a[:low]
+
+    @property
+    def reuse_ratio(self) -> float:
+        """所有请求中可复用前缀的总体比例（第一次请求也计入分母）"""
+        return self.reused_tokens / self.total_tokens if self.total_tokens else 0.0
+
+    def format_stats(self) -> str:
+        """
+        生成统计信息
+
+        Returns:
+            str: 统计信息文本
+        """
+        return (
+            f"提示前缀复用：{self.requests} 次请求，约 {self.reused_tokens}/{self.total_tokens} token "
+            f"与上一次请求的前缀相同（{self.reuse_ratio:.0%}）"
+        )
@@ -0,0 +1,140 @@
+"""
+依赖安装缓存模块
+
+每次安装成功后把 package.json 与锁文件内容的哈希记录到
+.agent_cache/install_state.json，两者都没有变化且 node_modules 仍存在时无需重新
+安装。同时根据锁文件（或 package.json 的 packageManager 字段）确定包管理器及
+对应的安装命令。
+"""
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+from services.project_index import CACHE_DIR_NAME, ensure_cache_dir
+
+INSTALL_STATE_FILE_NAME = 'install_state.json'
+# (锁文件, 包管理器)，按优先级排列
+LOCKFILES = [
+    ('pnpm-lock.yaml', 'pnpm'),
+    ('yarn.lock', 'yarn'),
+    ('package-lock.json', 'npm'),
+    ('npm-shrinkwrap.json', 'npm'),
+]
+
+
+@dataclass
+class PackageManager:
+    """项目使用的包管理器"""
+    name: str
+    lockfile: Optional[str]
+
+    def install_args(self) -> List[str]:
+        """
+        安装依赖的命令参数（不含可执行文件）
+
+        有锁文件时严格按锁文件安装：npm ci、pnpm/yarn 的 --frozen-lockfile。
+        """
+        if self.lockfile is None:
+            return ['install']
+        if self.name == 'npm':
+            return ['ci']
+        return ['install', '--frozen-lockfile']
+
+
+def detect_package_manager(project_path: str) -> PackageManager:
+    """
+    根据锁文件确定包管理器，没有锁文件时参考 package.json 的 packageManager 字段
+
+    Args:
+        project_path: 项目根路径
+
+    Returns:
+        PackageManager: 包管理器，默认为 npm
+    """
+    for lockfile, name in LOCKFILES:
+        if os.path.isfile(os.path.join(project_path, lockfile)):
+            return PackageManager(name, lockfile)
+    try:
+        with open(os.path.join(project_path, 'package.json'), 'r', encoding='utf-8') as f:
+            declared = str(json.load(f).get('packageManager', ''))
+    except (OSError, ValueError, AttributeError):
+        declared = ''
+    name = declared.split('@', 1)[0]
+    return PackageManager(name if name in ('pnpm', 'yarn') else 'npm', None)
+
+
+class InstallCache:
+    """记录上次成功安装时的依赖声明，判断是否需要重新安装"""
+
+    def __init__(self, project_path: str):
+        self.project_path = os.path.abspath(project_path)
+        self.state_path = os.path.join(self.project_path, CACHE_DIR_NAME, INSTALL_STATE_FILE_NAME)
+
+    def dependency_hash(self, manager: PackageManager) -> str:
+        """
+        计算 package.json 与锁文件内容的哈希
+
+        Args:
+            manager: 项目使用的包管理器
+
+        Returns:
+            str: 十六进制的 SHA-256 摘要，package.json 不存在时为空字符串
+        """
+        digest = hashlib.sha256()
+        for name in ['package.json'] + ([manager.lockfile] if manager.lockfile else []):
+            try:
+                with open(os.path.join(self.project_path, name), 'rb') as f:
+                    data = f.read()
+            except OSError:
+                if name == 'package.json':
+                    return ''
+                continue
+            digest.update(name.encode('utf-8') + b'\0' + data + b'\0')
+        return digest.hexdigest()
+
+    def is_current(self, manager: PackageManager) -> bool:
+        """
+        判断 node_modules 是否与当前的依赖声明一致
+
+        Args:
+            manager: 项目使用的包管理器
+
+        Returns:
+            bool: 上次安装后依赖声明没有变化且 node_modules 存在
+        """
+        if not os.path.isdir(os.path.join(self.project_path, 'node_modules')):
+            return False
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        current = self.dependency_hash(manager)
+        return bool(current) and state.get('hash') == current and state.get('manager') == manager.name
+
+    def record(self, manager: PackageManager) -> None:
+        """
+        记录一次成功的安装
+
+        Args:
+            manager: 安装使用的包管理器
+        """
+        state = {'hash': self.dependency_hash(manager), 'manager': manager.name, 'time': time.time()}
+        try:
+            ensure_cache_dir(os.path.dirname(self.state_path))
+            temp_path = self.state_path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(state, f)
+            os.replace(temp_path, self.state_path)
+        except OSError:
+            pass
+
+    def clear(self) -> None:
+        """删除安装记录，下次安装时不再跳过"""
+        try:
+            os.remove(self.state_path)
+        except OSError:
+            pass
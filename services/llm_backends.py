@@ -0,0 +1,286 @@
+"""
+大模型后端模块
+
+AIInteractor 通过 LLMBackend 接口以流式方式获取模型输出，可选的实现有：
+- DashScopeBackend: 通义千问 DashScope 服务
+- OpenAICompatibleBackend: 任意 OpenAI 兼容的 /chat/completions 接口
+- ScriptedBackend: 按脚本回放录制好的回复，可配置首字延迟和输出速率，
+  用于离线压测、基准测试和CI
+"""
+
+import json
+import re
+import threading
+from abc import ABC, abstractmethod
+import time
+from typing import Any, Dict, Iterator, List, Optional
+from services.config import Config
+from exceptions.project_exceptions import AIInteractionError, ConfigurationError, RateLimitError
+
+# DashScope 限流时返回的错误码
+DASHSCOPE_THROTTLING_CODES = ('Throttling', 'Throttling.RateQuota', 'Throttling.AllocationQuota')
+
+
+class LLMBackend(ABC):
+    """大模型后端基类"""
+
+    name = 'base'
+
+    @abstractmethod
+    def stream_chat(self, model: str, messages: List[Dict[str, str]]) -> Iterator[str]:
+        """
+        以流式方式发送对话请求
+
+        Args:
+            model: 模型名称
+            messages: 消息列表
+
+        Returns:
+            Iterator[str]: 依次产生的增量文本
+        """
+
+    def chat(self, model: str, messages: List[Dict[str, str]]) -> str:
+        """
+        发送对话请求并返回完整回复
+
+        Args:
+            model: 模型名称
+            messages: 消息列表
+
+        Returns:
+            str: 完整的回复文本
+        """
+        return ''.join(self.stream_chat(model, messages))
+
+
+class DashScopeBackend(LLMBackend):
+    """通义千问 DashScope 后端"""
+
+    name = 'dashscope'
+
+    def __init__(self, api_key: str):
+        self.api_key = api_key
+
+    def stream_chat(self, model: str, messages: List[Dict[str, str]]) -> Iterator[str]:
+        # dashscope 及其HTTP依赖较重，首次调用时才导入
+        import dashscope
+
+        dashscope.api_key = self.api_key
+        response = dashscope.Generation.call(
+            model=model,
+            messages=messages,
+            stream=True,
+            incremental_output=True,
+            result_format='message'
+        )
+        for resp in response:
+            if resp.status_code == 200 and hasattr(resp, 'output') and resp.output and 'choices' in resp.output:
+                if resp.output['choices'] and len(resp.output['choices']) > 0:
+                    choice = resp.output['choices'][0]
+                    if 'message' in choice and choice['message']:
+                        delta = choice['message'].get('content', '')
+                        if delta:
+                            yield delta
+            elif resp.status_code == 429 or getattr(resp, 'code', None) in DASHSCOPE_THROTTLING_CODES:
+                raise RateLimitError(f"code={getattr(resp, 'code', 'N/A')}, message={getattr(resp, 'message', 'N/A')}")
+            elif resp.status_code != 200:
+                raise AIInteractionError(
+                    f"API调用失败: status_code={resp.status_code}, "
+                    f"code={getattr(resp, 'code', 'N/A')}, "
+                    f"message={getattr(resp, 'message', 'N/A')}"
+                )
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """OpenAI 兼容接口后端（基于标准库 urllib，使用 SSE 流式输出）"""
+
+    name = 'openai'
+
+    def __init__(self, base_url: str, api_key: Optional[str] = None, timeout: int = 30):
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+        self.timeout = timeout
+
+    def stream_chat(self, model: str, messages: List[Dict[str, str]]) -> Iterator[str]:
+        # urllib.request 会连带导入 http.client、ssl 等，首次调用时才导入
+        import urllib.error
+        import urllib.request
+
+        body = json.dumps({'model': model, 'messages': messages, 'stream': True}).encode('utf-8')
+        headers = {'Content-Type': 'application/json', 'Accept': 'text/event-stream'}
+        if self.api_key:
+            headers['Authorization'] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(f"{self.base_url}/chat/completions", data=body, headers=headers)
+
+        try:
+            response = urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            detail = e.read().decode('utf-8', 'replace')[:500]
+            if e.code == 429:
+                raise RateLimitError(detail, _parse_retry_after(e.headers.get('Retry-After')))
+            raise AIInteractionError(f"API调用失败: status_code={e.code}, message={detail}")
+        except urllib.error.URLError as e:
+            raise AIInteractionError(f"无法连接到 {self.base_url}: {e.reason}")
+
+        with response:
+            for raw_line in response:
+                line = raw_line.decode('utf-8').strip()
+                if not line.startswith('data:'):
+                    continue
+                data = line[5:].strip()
+                if data == '[DONE]':
+                    break
+                chunk = json.loads(data)
+                if chunk.get('error'):
+                    raise AIInteractionError(f"API调用失败: {chunk['error']}")
+                for choice in chunk.get('choices') or []:
+                    delta = (choice.get('delta') or {}).get('content')
+                    if delta:
+                        yield delta
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析 Retry-After 响应头（秒数），无法解析时返回None"""
+    try:
+        return max(0.0, float(value)) if value else None
+    except ValueError:
+        return None
+
+
+class ScriptedBackend(LLMBackend):
+    """
+    按脚本回放回复的本地后端
+
+    脚本为 JSONL 文件，每行形如 {"response": "...", "match": "可选的正则"}。
+    带 match 的条目只回复最后一条用户消息与之匹配的请求；其余条目按顺序使用。
+    """
+
+    name = 'scripted'
+
+    def __init__(
+        self,
+        responses: List[Dict[str, Any]],
+        latency: float = 0.0,
+        token_rate: float = 0.0,
+        cycle: bool = True
+    ):
+        """
+        Args:
+            responses: 回复条目列表
+            latency: 首个token前的延迟（秒）
+            token_rate: 每秒输出的token数，0表示不限速
+            cycle: 脚本用完后是否从头开始
+        """
+        if not responses:
+            raise ConfigurationError("回放脚本中没有任何回复")
+        self.responses = responses
+        self.latency = latency
+        self.token_rate = token_rate
+        self.cycle = cycle
+        self.calls = 0
+        self._position = 0
+        # 并行生成时会被多个线程同时调用
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> 'ScriptedBackend':
+        """
+        从 JSONL 文件加载回放脚本
+
+        Args:
+            path: 脚本文件路径
+            **kwargs: 传递给构造函数的其他参数
+
+        Returns:
+            ScriptedBackend: 回放后端
+        """
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                responses = [json.loads(line) for line in f if line.strip()]
+        except (OSError, json.JSONDecodeError) as e:
+            raise ConfigurationError(f"无法加载回放脚本 '{path}': {str(e)}")
+        return cls(responses, **kwargs)
+
+    def _next_response(self, messages: List[Dict[str, str]]) -> str:
+        """选择下一条回复"""
+        last_user = next((m['content'] for m in reversed(messages) if m['role'] == 'user'), '')
+        for entry in self.responses:
+            pattern = entry.get('match')
+            if pattern and re.search(pattern, last_user):
+                return entry['response']
+
+        sequential = [entry for entry in self.responses if not entry.get('match')]
+        if not sequential:
+            raise AIInteractionError("回放脚本中没有与请求匹配的回复")
+        if self._position >= len(sequential):
+            if not self.cycle:
+                raise AIInteractionError("回放脚本中的回复已用完")
+            self._position = 0
+        response = sequential[self._position]['response']
+        self._position += 1
+        return response
+
+    def stream_chat(self, model: str, messages: List[Dict[str, str]]) -> Iterator[str]:
+        with self._lock:
+            self.calls += 1
+            response = self._next_response(messages)
+        if self.latency > 0:
+            time.sleep(self.latency)
+        # 按约4个字符一个token切分，模拟流式输出速率
+        step = 4
+        delay = 1 / self.token_rate if self.token_rate > 0 else 0
+        for start in range(0, len(response), step):
+            if delay:
+                time.sleep(delay)
+            yield response[start:start + step]
+
+
+class RecordingBackend(LLMBackend):
+    """包装其他后端，将每次请求的回复追加写入 JSONL 脚本，供 ScriptedBackend 回放"""
+
+    name = 'recording'
+
+    def __init__(self, inner: LLMBackend, path: str):
+        self.inner = inner
+        self.path = path
+
+    def stream_chat(self, model: str, messages: List[Dict[str, str]]) -> Iterator[str]:
+        parts: List[str] = []
+        for delta in self.inner.stream_chat(model, messages):
+            parts.append(delta)
+            yield delta
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps({'response': ''.join(parts)}, ensure_ascii=False) + '\n')
+
+
+def create_backend(config: Config) -> LLMBackend:
+    """
+    根据配置创建大模型后端
+
+    Args:
+        config: 应用配置
+
+    Returns:
+        LLMBackend: 后端实例
+    """
+    backend_name = config.llm_backend
+    if backend_name == 'dashscope':
+        backend: LLMBackend = DashScopeBackend(config.api_key)
+    elif backend_name == 'openai':
+        if not config.api_base_url:
+            raise ConfigurationError("使用 openai 后端时必须设置 OPENAI_BASE_URL")
+        backend = OpenAICompatibleBackend(config.api_base_url, config.openai_api_key, config.timeout)
+    elif backend_name == 'scripted':
+        if not config.scripted_responses_path:
+            raise ConfigurationError("使用 scripted 后端时必须设置 AGENT_SCRIPTED_RESPONSES")
+        backend = ScriptedBackend.from_file(
+            config.scripted_responses_path,
+            latency=config.scripted_latency,
+            token_rate=config.scripted_token_rate
+        )
+    else:
+        raise ConfigurationError(f"不支持的大模型后端: {backend_name}")
+
+    if config.record_responses_path:
+        backend = RecordingBackend(backend, config.record_responses_path)
+    return backend
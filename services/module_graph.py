@@ -0,0 +1,324 @@
+"""
+模块依赖图模块
+
+扫描项目文件中的 ES import/export、require、动态 import 以及 Vue 单文件组件
+<script> 块中的导入语句，解析相对路径、tsconfig/jsconfig 的 paths 别名和
+vite.config 中的 alias，构建项目内部的模块依赖图。文件按 mtime 增量重新扫描，
+别名配置变化时整体重新解析。
+"""
+
+import json
+import os
+import re
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+IMPORT_PATTERN = re.compile(
+    r'''(?:import|export)\s[^'"`;]*?from\s*['"]([^'"]+)['"]'''
+    r'''|import\s*\(\s*['"]([^'"]+)['"]\s*\)'''
+    r'''|require\(\s*['"]([^'"]+)['"]\s*\)'''
+    r'''|import\s+['"]([^'"]+)['"]'''
+)
+VUE_SCRIPT_PATTERN = re.compile(r'<script\b[^>]*>(.*?)</script>', re.DOTALL | re.IGNORECASE)
+JSON_COMMENT_PATTERN = re.compile(r'"(?:\\.|[^"\\])*"|//[^\n]*|/\*.*?\*/', re.DOTALL)
+JSON_TRAILING_COMMA_PATTERN = re.compile(r',(\s*[}\]])')
+# vite.config 中的两种别名写法：{ '@': ... } 与 { find: '@', replacement: ... }
+VITE_ALIAS_BLOCK_PATTERN = re.compile(r'alias\s*:\s*([\[{])', re.DOTALL)
+VITE_OBJECT_ALIAS_PATTERN = re.compile(r'''['"]?([@~\w/.$-]+)['"]?\s*:\s*([^\n}]+)''')
+VITE_FIND_ALIAS_PATTERN = re.compile(r'''find\s*:\s*['"]([^'"]+)['"]\s*,\s*replacement\s*:\s*([^\n}]+)''')
+PATH_LITERAL_PATTERN = re.compile(r'''['"]([^'"]*)['"]''')
+
+RESOLVE_EXTENSIONS = ['.js', '.jsx', '.ts', '.tsx', '.vue', '.mjs', '.cjs']
+ALIAS_CONFIG_FILES = ['tsconfig.json', 'jsconfig.json', 'vite.config.js', 'vite.config.ts', 'vite.config.mjs']
+# 超过该大小的文件不扫描导入语句
+MAX_SCANNED_BYTES = 512 * 1024
+
+
+def extract_import_specifiers(content: str, is_vue: bool = False) -> List[str]:
+    """
+    提取源代码中的导入路径
+
+    Args:
+        content: 文件内容
+        is_vue: 是否为 Vue 单文件组件，是则只扫描 <script> 块
+
+    Returns:
+        List[str]: 按出现顺序排列的导入路径
+    """
+    if is_vue:
+        content = '\n'.join(VUE_SCRIPT_PATTERN.findall(content))
+    specifiers = []
+    for groups in IMPORT_PATTERN.findall(content):
+        specifier = next((group for group in groups if group), '')
+        if specifier:
+            specifiers.append(specifier)
+    return specifiers
+
+
+def _load_jsonc(text: str) -> Dict:
+    """解析允许注释和末尾逗号的 JSON（tsconfig 常见写法）"""
+    stripped = JSON_COMMENT_PATTERN.sub(lambda m: m.group(0) if m.group(0).startswith('"') else '', text)
+    return json.loads(JSON_TRAILING_COMMA_PATTERN.sub(r'\1', stripped))
+
+
+@dataclass
+class _Module:
+    """已扫描的单个文件"""
+    mtime_ns: int
+    size: int
+    specifiers: List[str] = field(default_factory=list)
+
+
+class ModuleGraph:
+    """项目内部的模块依赖图"""
+
+    def __init__(self, project_path: str):
+        self.project_path = project_path
+        self._modules: Dict[str, _Module] = {}
+        self._dependencies: Dict[str, Set[str]] = {}
+        self._dependents: Dict[str, Set[str]] = {}
+        # (前缀, [替换后的目录...])，按前缀长度降序排列
+        self._aliases: List[Tuple[str, List[str]]] = []
+        self._base_url: Optional[str] = None
+        self._alias_stamp: Tuple = ()
+        self._known_files: Set[str] = set()
+        # 更新和查询可能来自不同线程
+        self._lock = threading.RLock()
+
+    def update(self, files: Iterable[str]) -> None:
+        """
+        使依赖图与给定的文件清单一致，只重新扫描新增或修改过的文件
+
+        Args:
+            files: 相对于项目根目录的文件路径
+        """
+        with self._lock:
+            wanted = {path.replace('\\', '/') for path in files}
+            stamp = self._config_stamp()
+            full_rebuild = stamp != self._alias_stamp or wanted != self._known_files
+            if stamp != self._alias_stamp:
+                self._load_aliases()
+                self._alias_stamp = stamp
+            self._known_files = wanted
+
+            for path in [path for path in self._modules if path not in wanted]:
+                del self._modules[path]
+
+            changed: Set[str] = set()
+            for path in wanted:
+                try:
+                    stat = os.stat(os.path.join(self.project_path, path))
+                except OSError:
+                    self._modules.pop(path, None)
+                    continue
+                current = self._modules.get(path)
+                if current is not None and current.mtime_ns == stat.st_mtime_ns and current.size == stat.st_size:
+                    continue
+                self._modules[path] = _Module(stat.st_mtime_ns, stat.st_size, self._scan(path, stat.st_size))
+                changed.add(path)
+
+            # 文件增删或别名变化会影响其他文件导入的解析结果，此时整体重新解析（只做集合查找，不读文件）
+            targets = self._modules.keys() if full_rebuild else changed
+            if full_rebuild:
+                self._dependencies = {}
+                self._dependents = {}
+            for path in list(targets):
+                self._link(path)
+
+    def _scan(self, path: str, size: int) -> List[str]:
+        """读取单个文件并提取导入路径"""
+        if size > MAX_SCANNED_BYTES:
+            return []
+        try:
+            with open(os.path.join(self.project_path, path), 'r', encoding='utf-8', errors='ignore') as f:
+                content = f.read()
+        except OSError:
+            return []
+        return extract_import_specifiers(content, path.endswith('.vue'))
+
+    def _link(self, path: str) -> None:
+        """根据文件的导入路径更新正向和反向的边"""
+        for old in self._dependencies.get(path, set()):
+            self._dependents.get(old, set()).discard(path)
+        resolved = set()
+        for specifier in self._modules[path].specifiers:
+            target = self.resolve(path, specifier)
+            if target and target != path:
+                resolved.add(target)
+        self._dependencies[path] = resolved
+        for target in resolved:
+            self._dependents.setdefault(target, set()).add(path)
+
+    def _config_stamp(self) -> Tuple:
+        """别名配置文件的 mtime，用于判断是否需要重新加载"""
+        stamp = []
+        for name in ALIAS_CONFIG_FILES:
+            try:
+                stamp.append((name, os.stat(os.path.join(self.project_path, name)).st_mtime_ns))
+            except OSError:
+                continue
+        return tuple(stamp)
+
+    def _load_aliases(self) -> None:
+        """从 tsconfig/jsconfig 和 vite.config 中加载路径别名"""
+        aliases: Dict[str, List[str]] = {}
+        self._base_url = None
+
+        for name in ('tsconfig.json', 'jsconfig.json'):
+            try:
+                with open(os.path.join(self.project_path, name), 'r', encoding='utf-8') as f:
+                    options = _load_jsonc(f.read()).get('compilerOptions', {})
+            except (OSError, ValueError, AttributeError):
+                continue
+            base_url = os.path.normpath(options.get('baseUrl', '.')).replace('\\', '/')
+            if 'baseUrl' in options:
+                self._base_url = base_url
+            for pattern, targets in (options.get('paths') or {}).items():
+                prefix = pattern[:-1] if pattern.endswith('*') else pattern
+                aliases.setdefault(prefix, [
+                    os.path.normpath(os.path.join(base_url, target.rstrip('*'))).replace('\\', '/')
+                    for target in targets
+                ])
+
+        for name in ('vite.config.js', 'vite.config.ts', 'vite.config.mjs'):
+            try:
+                with open(os.path.join(self.project_path, name), 'r', encoding='utf-8') as f:
+                    source = f.read()
+            except OSError:
+                continue
+            for find, replacement in self._parse_vite_aliases(source):
+                aliases.setdefault(find, [replacement])
+
+        self._aliases = sorted(aliases.items(), key=lambda item: -len(item[0]))
+
+    @staticmethod
+    def _parse_vite_aliases(source: str) -> List[Tuple[str, str]]:
+        """
+        从 vite.config 源码中提取别名
+
+        只识别替换路径中的字符串字面量（如 path.resolve(__dirname, 'src') 取 'src'），
+        无法静态确定的写法会被忽略。
+        """
+        match = VITE_ALIAS_BLOCK_PATTERN.search(source)
+        if not match:
+            return []
+        opening = match.group(1)
+        closing = ']' if opening == '[' else '}'
+        depth, start = 0, match.end() - 1
+        end = start
+        for end in range(start, len(source)):
+            if source[end] == opening:
+                depth += 1
+            elif source[end] == closing:
+                depth -= 1
+                if depth == 0:
+                    break
+        block = source[start + 1:end]
+
+        pattern = VITE_FIND_ALIAS_PATTERN if opening == '[' else VITE_OBJECT_ALIAS_PATTERN
+        result = []
+        for find, expression in pattern.findall(block):
+            literals = [literal for literal in PATH_LITERAL_PATTERN.findall(expression) if literal]
+            if not literals:
+                continue
+            target = os.path.normpath(os.path.join(*[literal.lstrip('/') for literal in literals]))
+            result.append((find, target.replace('\\', '/')))
+        return result
+
+    def resolve(self, importer: str, specifier: str) -> Optional[str]:
+        """
+        将导入路径解析为项目内的文件
+
+        Args:
+            importer: 发起导入的文件相对路径
+            specifier: 导入路径
+
+        Returns:
+            Optional[str]: 项目内文件的相对路径，第三方包或无法解析时返回None
+        """
+        specifier = specifier.split('?', 1)[0]
+        if specifier.startswith('.'):
+            return self._resolve_file(os.path.join(os.path.dirname(importer), specifier))
+        for prefix, targets in self._aliases:
+            if specifier == prefix.rstrip('/') or specifier.startswith(prefix):
+                rest = specifier[len(prefix):].lstrip('/')
+                for target in targets:
+                    resolved = self._resolve_file(os.path.join(target, rest) if rest else target)
+                    if resolved:
+                        return resolved
+        if self._base_url is not None:
+            return self._resolve_file(os.path.join(self._base_url, specifier))
+        return None
+
+    def _resolve_file(self, base: str) -> Optional[str]:
+        """按扩展名和 index 文件的惯例查找实际文件"""
+        base = os.path.normpath(base).replace('\\', '/')
+        if base.startswith('../'):
+            return None
+        candidates = [base] + [base + ext for ext in RESOLVE_EXTENSIONS]
+        candidates += [f'{base}/index{ext}' for ext in RESOLVE_EXTENSIONS]
+        for candidate in candidates:
+            if candidate in self._known_files:
+                return candidate
+        return None
+
+    def dependencies_of(self, path: str, depth: int = 1) -> List[str]:
+        """
+        获取文件导入的项目内文件
+
+        Args:
+            path: 文件相对路径
+            depth: 追溯的层数
+
+        Returns:
+            List[str]: 排序后的文件路径
+        """
+        with self._lock:
+            return self._walk(path, self._dependencies, depth)
+
+    def dependents_of(self, path: str, depth: int = 1) -> List[str]:
+        """
+        获取导入了该文件的项目内文件
+
+        Args:
+            path: 文件相对路径
+            depth: 追溯的层数
+
+        Returns:
+            List[str]: 排序后的文件路径
+        """
+        with self._lock:
+            return self._walk(path, self._dependents, depth)
+
+    def neighbors(self, path: str) -> Set[str]:
+        """
+        获取与文件直接存在导入关系的文件
+
+        Args:
+            path: 文件相对路径
+
+        Returns:
+            Set[str]: 被该文件导入或导入该文件的文件
+        """
+        path = path.replace('\\', '/')
+        with self._lock:
+            return self._dependencies.get(path, set()) | self._dependents.get(path, set())
+
+    @staticmethod
+    def _walk(path: str, edges: Dict[str, Set[str]], depth: int) -> List[str]:
+        """沿给定方向的边做广度优先遍历"""
+        start = path.replace('\\', '/')
+        seen = {start}
+        queue = deque([(start, 0)])
+        while queue:
+            current, level = queue.popleft()
+            if level >= depth:
+                continue
+            for target in edges.get(current, ()):
+                if target not in seen:
+                    seen.add(target)
+                    queue.append((target, level + 1))
+        seen.discard(start)
+        return sorted(seen)
@@ -0,0 +1,167 @@
+"""
+并行生成模块
+
+把按文件拆分的生成请求并发发送给模型。同时进行的请求数有上限；任何一个请求
+被限流时，所有请求一起暂停（优先使用服务端给出的 Retry-After，否则指数退避），
+允许的并发数减半，之后每连续成功若干次再恢复一个并发，直到回到上限。
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+from exceptions.project_exceptions import ProjectBaseException, RateLimitError
+
+# 限流后连续成功多少次恢复一个并发
+RECOVER_AFTER_SUCCESSES = 4
+
+
+class AdaptiveLimiter:
+    """并发数上限随限流情况自动调整的信号量"""
+
+    def __init__(self, max_concurrency: int, recover_after: int = RECOVER_AFTER_SUCCESSES):
+        """
+        Args:
+            max_concurrency: 并发数上限
+            recover_after: 限流后连续成功多少次恢复一个并发
+        """
+        self.max_concurrency = max(1, max_concurrency)
+        self.limit = self.max_concurrency
+        self.recover_after = recover_after
+        self._active = 0
+        self._successes = 0
+        self._resume_at = 0.0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        """等待暂停结束且有空闲并发时占用一个并发"""
+        with self._condition:
+            while True:
+                pause = self._resume_at - time.monotonic()
+                if pause > 0:
+                    self._condition.wait(pause)
+                elif self._active < self.limit:
+                    self._active += 1
+                    return
+                else:
+                    self._condition.wait()
+
+    def release(self, rate_limited: bool = False, delay: float = 0.0) -> None:
+        """
+        释放占用的并发
+
+        Args:
+            rate_limited: 本次请求是否被限流
+            delay: 被限流时所有请求暂停的秒数
+        """
+        with self._condition:
+            self._active -= 1
+            if rate_limited:
+                self.limit = max(1, self.limit // 2)
+                self._successes = 0
+                self._resume_at = max(self._resume_at, time.monotonic() + delay)
+            else:
+                self._successes += 1
+                if self.limit < self.max_concurrency and self._successes >= self.recover_after:
+                    self.limit += 1
+                    self._successes = 0
+            self._condition.notify_all()
+
+
+@dataclass
+class GenerationResult:
+    """一个生成请求的结果"""
+    key: str
+    text: Optional[str] = None
+    error: Optional[str] = None
+    attempts: int = 0
+    rate_limited: int = 0
+    elapsed: float = 0.0
+
+
+class ParallelGenerator:
+    """有并发上限、能应对限流的并行请求调度器"""
+
+    def __init__(
+        self,
+        request: Callable[[str], str],
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0
+    ):
+        """
+        Args:
+            request: 发送一个提示并返回回复的函数，会在多个线程中同时调用
+            max_concurrency: 同时进行的请求数上限
+            max_retries: 每个请求失败（含被限流）后最多重试的次数
+            base_delay: 指数退避的初始等待时间（秒）
+            max_delay: 指数退避的最长等待时间（秒）
+        """
+        self.request = request
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def run(
+        self,
+        prompts: Dict[str, str],
+        on_result: Optional[Callable[[GenerationResult], None]] = None
+    ) -> Dict[str, GenerationResult]:
+        """
+        并发发送所有请求
+
+        Args:
+            prompts: 请求标识到提示的映射
+            on_result: 可选回调，每个请求完成（成功或最终失败）时在调用线程中按完成顺序调用
+
+        Returns:
+            Dict[str, GenerationResult]: 与 prompts 顺序一致的结果
+        """
+        if not prompts:
+            return {}
+        limiter = AdaptiveLimiter(self.max_concurrency)
+        results: Dict[str, GenerationResult] = {}
+        workers = min(self.max_concurrency, len(prompts))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='generate') as executor:
+            futures = [executor.submit(self._generate, limiter, key, prompt) for key, prompt in prompts.items()]
+            for future in as_completed(futures):
+                result = future.result()
+                results[result.key] = result
+                if on_result:
+                    on_result(result)
+        return {key: results[key] for key in prompts}
+
+    def _backoff(self, attempt: int) -> float:
+        """第 attempt 次失败后的退避时间"""
+        return min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+
+    def _generate(self, limiter: AdaptiveLimiter, key: str, prompt: str) -> GenerationResult:
+        """在工作线程中发送一个请求，按需重试"""
+        result = GenerationResult(key)
+        started = time.perf_counter()
+        while True:
+            limiter.acquire()
+            result.attempts += 1
+            try:
+                result.text = self.request(prompt)
+            except RateLimitError as e:
+                result.rate_limited += 1
+                delay = e.retry_after if e.retry_after is not None else self._backoff(result.attempts)
+                limiter.release(rate_limited=True, delay=delay)
+                if result.attempts > self.max_retries:
+                    result.error = e.message
+                    break
+            except Exception as e:
+                limiter.release()
+                if result.attempts > self.max_retries:
+                    result.error = e.message if isinstance(e, ProjectBaseException) else str(e)
+                    break
+                time.sleep(self._backoff(result.attempts))
+            else:
+                limiter.release()
+                break
+        result.elapsed = time.perf_counter() - started
+        return result
@@ -0,0 +1,206 @@
+"""
+修改片段应用模块
+
+补丁模式下，AI 只返回需要修改的片段（SEARCH/REPLACE 块）：
+
+    <<<<<<< SEARCH
+    原文件中的若干连续行
+    =======
+    替换后的内容
+    >>>>>>> REPLACE
+
+应用时依次尝试精确匹配、忽略行尾空白的匹配和忽略缩进的匹配，且要求匹配
+位置唯一；任何一个片段无法唯一定位时整体失败，不做猜测。忽略缩进匹配时，
+替换内容按文件与 SEARCH 部分的缩进差异重新缩进；替换内容的换行符统一为
+文件使用的换行符，匹配到文件末尾时保留原文件是否以换行符结尾。
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+from exceptions.project_exceptions import PatchApplyError
+
+SEARCH_MARKER = '<<<<<<< SEARCH'
+DIVIDER = '======='
+REPLACE_MARKER = '>>>>>>> REPLACE'
+_HUNK_PATTERN = re.compile(
+    r'^<<<<<<< SEARCH[ \t]*\n(.*?)^=======[ \t]*\n(.*?)^>>>>>>> REPLACE[ \t]*$',
+    re.DOTALL | re.MULTILINE
+)
+
+
+@dataclass
+class Hunk:
+    """单个修改片段"""
+    search: str
+    replace: str
+
+
+def is_patch(text: str) -> bool:
+    """
+    判断文件块内容是否为修改片段
+
+    Args:
+        text: ---code-start--- 与 ---code-end--- 之间的内容
+
+    Returns:
+        bool: 是否包含 SEARCH/REPLACE 片段
+    """
+    return SEARCH_MARKER in text and REPLACE_MARKER in text
+
+
+def parse_hunks(text: str) -> List[Hunk]:
+    """
+    解析修改片段
+
+    Args:
+        text: 包含一个或多个 SEARCH/REPLACE 块的文本
+
+    Returns:
+        List[Hunk]: 修改片段列表
+
+    Raises:
+        PatchApplyError: 没有找到完整的片段
+    """
+    # 文件块内容在解析时被去掉了首尾空白，补回末尾换行以便按行匹配
+    hunks = [Hunk(search, replace) for search, replace in _HUNK_PATTERN.findall(text + '\n')]
+    if not hunks:
+        raise PatchApplyError("没有找到完整的 SEARCH/REPLACE 片段")
+    return hunks
+
+
+def _find_unique_line_match(
+    lines: List[str],
+    search_lines: List[str],
+    normalize: Callable[[str], str]
+) -> Optional[int]:
+    """
+    按行查找唯一匹配的位置
+
+    Args:
+        lines: 原文件的行
+        search_lines: 要查找的行
+        normalize: 比较前对每行的处理
+
+    Returns:
+        Optional[int]: 匹配的起始行号，未找到时返回None
+
+    Raises:
+        PatchApplyError: 匹配位置不唯一
+    """
+    target = [normalize(line) for line in search_lines]
+    normalized = [normalize(line) for line in lines]
+    size = len(target)
+    matches = [
+        start for start in range(len(lines) - size + 1)
+        if normalized[start] == target[0] and normalized[start:start + size] == target
+    ]
+    if len(matches) > 1:
+        raise PatchApplyError(f"片段在文件中出现了 {len(matches)} 次，无法确定修改位置")
+    return matches[0] if matches else None
+
+
+def _leading_whitespace(lines: List[str]) -> str:
+    """第一个非空行的前导空白"""
+    for line in lines:
+        if line.strip():
+            return line[:len(line) - len(line.lstrip())]
+    return ''
+
+
+def _reindent(text: str, search_indent: str, file_indent: str) -> str:
+    """
+    把替换内容的缩进从 SEARCH 部分的缩进改为文件中匹配位置的缩进
+
+    Args:
+        text: 替换内容
+        search_indent: SEARCH 部分第一个非空行的缩进
+        file_indent: 文件中对应行的缩进
+
+    Returns:
+        str: 重新缩进后的内容；缩进比 SEARCH 部分更少的行保持不变
+    """
+    if search_indent == file_indent:
+        return text
+    lines = text.splitlines(keepends=True)
+    return ''.join(
+        file_indent + line[len(search_indent):] if line.strip() and line.startswith(search_indent) else line
+        for line in lines
+    )
+
+
+def apply_hunk(content: str, hunk: Hunk) -> str:
+    """
+    将单个修改片段应用到文本
+
+    Args:
+        content: 原文本
+        hunk: 修改片段
+
+    Returns:
+        str: 修改后的文本
+
+    Raises:
+        PatchApplyError: 片段无法唯一定位
+    """
+    # 模型输出的换行符总是 \n，CRLF 文件中改为 \r\n，避免混用
+    newline = '\r\n' if '\r\n' in content else '\n'
+    replace = hunk.replace.replace('\r\n', '\n')
+    if newline != '\n':
+        replace = replace.replace('\n', newline)
+
+    if not hunk.search.strip():
+        if content.strip():
+            raise PatchApplyError("SEARCH 部分为空，只能用于空文件")
+        return replace
+
+    count = content.count(hunk.search)
+    if count == 1:
+        return content.replace(hunk.search, replace, 1)
+    if count > 1:
+        raise PatchApplyError(f"片段在文件中出现了 {count} 次，无法确定修改位置")
+
+    lines = content.splitlines(keepends=True)
+    search_lines = hunk.search.splitlines()
+    while search_lines and not search_lines[-1].strip():
+        search_lines.pop()
+    stripped_lines = [line.rstrip('\r\n') for line in lines]
+    for normalize in (str.rstrip, str.strip):
+        start = _find_unique_line_match(stripped_lines, search_lines, normalize)
+        if start is not None:
+            end = start + len(search_lines)
+            replacement = replace
+            if normalize is str.strip:
+                replacement = _reindent(
+                    replacement,
+                    _leading_whitespace(search_lines),
+                    _leading_whitespace(stripped_lines[start:end])
+                )
+            if end < len(lines) and replacement and not replacement.endswith('\n'):
+                replacement += newline
+            elif end == len(lines) and not lines[-1].endswith('\n') and replacement.endswith(newline):
+                # 匹配到没有结尾换行符的最后一行，不给文件补上原本没有的换行符
+                replacement = replacement[:-len(newline)]
+            return ''.join(lines[:start]) + replacement + ''.join(lines[end:])
+
+    preview = hunk.search.strip().split('\n')[0][:60]
+    raise PatchApplyError(f"在文件中找不到片段: {preview}")
+
+
+def apply_patch(content: str, patch_text: str) -> str:
+    """
+    依次应用文本中的所有修改片段
+
+    Args:
+        content: 原文本
+        patch_text: 包含 SEARCH/REPLACE 块的文本
+
+    Returns:
+        str: 修改后的文本
+
+    Raises:
+        PatchApplyError: 任一片段无法应用
+    """
+    for hunk in parse_hunks(patch_text):
+        content = apply_hunk(content, hunk)
+    return content
@@ -0,0 +1,312 @@
+"""
+开发服务器进程管理模块
+
+不经过 shell 直接启动 npm 脚本，进程放在独立的进程组中，停止时连同其子进程
+（node、vite、webpack 等）一起结束。stdout/stderr 由后台线程逐行读取到有上限的
+环形缓冲区中，并根据输出判断服务是否就绪（监听地址）或出现编译错误。
+"""
+
+import os
+import re
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, List, Optional, Sequence
+
+ANSI_ESCAPE_PATTERN = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]')
+URL_PATTERN = re.compile(r'https?://(?:localhost|127\.0\.0\.1|0\.0\.0\.0|\[::\]|[\w.-]+):\d+[^\s]*')
+# 常见开发服务器（vite、webpack-dev-server、Vue CLI、CRA、Next.js）启动或重新编译完成时的输出
+DEFAULT_READY_PATTERNS = [
+    r'Local:\s+https?://',
+    r'ready in \d+',
+    r'compiled successfully',
+    r'webpack \d[\d.]* compiled',
+    r'App running at',
+    r'started server on',
+    r'hmr update',
+    r'page reload',
+]
+DEFAULT_ERROR_PATTERNS = [
+    r'Failed to compile',
+    r'Module not found',
+    r'Cannot find module',
+    r'SyntaxError',
+    r'TypeError',
+    r'ReferenceError',
+    r'Internal server error',
+    r'\bERROR\b',
+    r'\berror TS\d+',
+    r'npm ERR!',
+    r'EADDRINUSE',
+    r'Pre-transform error',
+]
+
+# 进程状态
+STATE_STOPPED = 'stopped'
+STATE_STARTING = 'starting'
+STATE_READY = 'ready'
+STATE_ERROR = 'error'
+STATE_EXITED = 'exited'
+SETTLED_STATES = (STATE_READY, STATE_ERROR, STATE_EXITED, STATE_STOPPED)
+
+# 一次错误最多收集的输出行数
+MAX_ERROR_LINES = 60
+
+
+@dataclass
+class LogLine:
+    """一行进程输出"""
+    seq: int
+    time: float
+    stream: str
+    text: str
+
+
+class ProcessSupervisor:
+    """管理单个长期运行的开发服务器进程"""
+
+    def __init__(
+        self,
+        command: Sequence[str],
+        cwd: str,
+        buffer_lines: int = 1000,
+        ready_patterns: Optional[List[str]] = None,
+        error_patterns: Optional[List[str]] = None,
+        env: Optional[dict] = None
+    ):
+        """
+        Args:
+            command: 要运行的命令（不经过 shell）
+            cwd: 工作目录
+            buffer_lines: 环形缓冲区保留的输出行数
+            ready_patterns: 表示服务已就绪的输出正则，默认为常见开发服务器的输出
+            error_patterns: 表示出现错误的输出正则
+            env: 额外的环境变量
+        """
+        self.command = list(command)
+        self.cwd = cwd
+        self.env = env
+        self.ready_pattern = re.compile('|'.join(ready_patterns or DEFAULT_READY_PATTERNS), re.IGNORECASE)
+        self.error_pattern = re.compile('|'.join(error_patterns or DEFAULT_ERROR_PATTERNS))
+        self.lines: Deque[LogLine] = deque(maxlen=buffer_lines)
+        self.state = STATE_STOPPED
+        self.url: Optional[str] = None
+        self.returncode: Optional[int] = None
+        self._process: Optional[subprocess.Popen] = None
+        self._readers: List[threading.Thread] = []
+        self._condition = threading.Condition()
+        self._seq = 0
+        # 当前错误的第一行序号，以及该错误是否已被取走
+        self._error_seq: Optional[int] = None
+        self._error_taken = False
+        self._stopping = False
+
+    @property
+    def is_running(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def start(self) -> None:
+        """
+        启动进程
+
+        Raises:
+            OSError: 命令无法启动
+        """
+        if self.is_running:
+            return
+        kwargs = {}
+        if os.name == 'nt':
+            kwargs['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP
+        else:
+            kwargs['start_new_session'] = True
+        env = dict(os.environ, **self.env) if self.env else None
+
+        with self._condition:
+            self.lines.clear()
+            self.url = None
+            self.returncode = None
+            self._error_seq = None
+            self._error_taken = False
+            self._stopping = False
+            self._process = subprocess.Popen(
+                self.command,
+                cwd=self.cwd,
+                env=env,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                **kwargs
+            )
+            self._set_state(STATE_STARTING)
+
+        process = self._process
+        self._readers = [
+            threading.Thread(target=self._read, args=(process, process.stdout, 'stdout'), daemon=True,
+                             name='ProcessSupervisor-stdout'),
+            threading.Thread(target=self._read, args=(process, process.stderr, 'stderr'), daemon=True,
+                             name='ProcessSupervisor-stderr'),
+        ]
+        for reader in self._readers:
+            reader.start()
+
+    def stop(self, timeout: float = 5.0) -> bool:
+        """
+        结束整个进程组，超时后强制结束
+
+        Args:
+            timeout: 等待进程正常退出的时间（秒）
+
+        Returns:
+            bool: 是否有进程被停止
+        """
+        process = self._process
+        if process is None or process.poll() is not None:
+            self._process = None
+            self._set_state(STATE_STOPPED)
+            return False
+
+        with self._condition:
+            self._stopping = True
+        self._signal_group(process, force=False)
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self._signal_group(process, force=True)
+            process.wait()
+        for reader in self._readers:
+            reader.join(timeout=1.0)
+        self._readers = []
+        self._process = None
+        self._set_state(STATE_STOPPED)
+        return True
+
+    @staticmethod
+    def _signal_group(process: subprocess.Popen, force: bool) -> None:
+        """向进程及其所有子进程发送结束信号"""
+        try:
+            if os.name == 'nt':
+                if force:
+                    # taskkill /T /F 连同子进程一起强制结束
+                    args = ['taskkill', '/PID', str(process.pid), '/T', '/F']
+                    subprocess.run(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                else:
+                    # 不加 /F 的 taskkill 无法结束控制台中的 node，改为向新进程组发送 Ctrl+Break
+                    process.send_signal(signal.CTRL_BREAK_EVENT)
+            else:
+                os.killpg(process.pid, signal.SIGKILL if force else signal.SIGTERM)
+        except (OSError, subprocess.SubprocessError):
+            if force:
+                process.kill()
+            else:
+                process.terminate()
+
+    def _read(self, process: subprocess.Popen, stream, name: str) -> None:
+        """逐行读取一个输出流，直到进程关闭该流"""
+        for raw in iter(stream.readline, b''):
+            text = ANSI_ESCAPE_PATTERN.sub('', raw.decode('utf-8', errors='replace')).rstrip()
+            if text:
+                self._handle_line(name, text)
+        stream.close()
+        # stdout 关闭后等待进程退出并记录退出状态
+        if name == 'stdout':
+            returncode = process.wait()
+            with self._condition:
+                if self._process is process and not self._stopping:
+                    self.returncode = returncode
+                    if returncode != 0 and self._error_seq is None:
+                        self._error_seq = max(0, self._seq - MAX_ERROR_LINES)
+                    self._set_state(STATE_EXITED)
+
+    def _handle_line(self, stream: str, text: str) -> None:
+        """记录一行输出并更新就绪/错误状态"""
+        with self._condition:
+            self._seq += 1
+            self.lines.append(LogLine(self._seq, time.time(), stream, text))
+            if self.url is None:
+                match = URL_PATTERN.search(text)
+                if match:
+                    self.url = match.group(0)
+            if self.error_pattern.search(text):
+                if self.state != STATE_ERROR:
+                    self._error_seq = self._seq
+                    self._error_taken = False
+                    self._set_state(STATE_ERROR)
+            elif self.ready_pattern.search(text):
+                # 重新编译成功后清除之前的错误
+                self._error_seq = None
+                self._set_state(STATE_READY)
+
+    def _set_state(self, state: str) -> None:
+        """更新状态并通知等待者（调用方可持有锁）"""
+        with self._condition:
+            self.state = state
+            self._condition.notify_all()
+
+    def wait_until_settled(self, timeout: float, settle: float = 0.5) -> str:
+        """
+        等待服务就绪、报错或退出
+
+        Args:
+            timeout: 最长等待时间（秒）
+            settle: 进入错误状态后继续收集输出的时间（秒），使错误信息完整
+
+        Returns:
+            str: 等待结束时的状态
+        """
+        deadline = time.time() + timeout
+        with self._condition:
+            while self.state not in SETTLED_STATES:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+            state = self.state
+        if state == STATE_ERROR and settle > 0:
+            time.sleep(settle)
+        return self.state
+
+    def tail(self, count: int = 50) -> List[str]:
+        """
+        获取最近的输出
+
+        Args:
+            count: 行数
+
+        Returns:
+            List[str]: 最近的输出行，stderr 的行带有前缀
+        """
+        with self._condition:
+            lines = list(self.lines)[-count:]
+        return [('[stderr] ' if line.stream == 'stderr' else '') + line.text for line in lines]
+
+    def error_text(self) -> str:
+        """
+        获取当前错误的输出
+
+        Returns:
+            str: 从错误的第一行起最多 MAX_ERROR_LINES 行输出，没有错误时为空
+        """
+        with self._condition:
+            if self._error_seq is None:
+                return ''
+            lines = [line.text for line in self.lines if line.seq >= self._error_seq]
+        return '\n'.join(lines[:MAX_ERROR_LINES])
+
+    def take_error(self) -> Optional[str]:
+        """
+        取走尚未处理的错误，同一次错误只返回一次
+
+        Returns:
+            Optional[str]: 错误输出，没有新错误时返回None
+        """
+        with self._condition:
+            if self._error_seq is None or self._error_taken:
+                return None
+            self._error_taken = True
+        text = self.error_text()
+        if self.state == STATE_EXITED and self.returncode is not None:
+            text += f"\n（进程已退出，退出码 {self.returncode}）"
+        return text
@@ -4,16 +4,26 @@
 
 import os
 import json
-from typing import List, Dict, Any, Optional
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional, Tuple
 from utils.helpers import safe_json_loads
 from services.file_operator import FileOperator
+from services.project_index import ProjectIndex, CACHE_DIR_NAME
 from exceptions.project_exceptions import ProjectAnalysisError
 
 
 class ProjectAnalyzer:
-    def __init__(self, project_path: str):
+    def __init__(self, project_path: str, use_index: bool = True):
         self.project_path = project_path
         self.project_info: Dict[str, Any] = {}
+        # 是否使用 .agent_cache 中的持久化索引进行增量分析
+        self.use_index = use_index
+        self.index: Optional[ProjectIndex] = None
+        # 后台监视器（如已启动），由 ProjectWatcher 设置
+        self.watcher = None
+        # 分析可能同时发生在主线程和监视线程中
+        self._lock = threading.RLock()
         # 可配置的文件和目录列表
         self.key_files = [
             'package.json',
@@ -33,6 +43,19 @@ class ProjectAnalyzer:
             'routes',
             'views'
         ]
+        # src目录中需要单独统计的常见子目录
+        self.src_subdirectories = ['components', 'pages', 'views', 'routes', 'utils', 'hooks', 'services']
+        # 遍历时跳过的目录（依赖、构建产物、版本控制等）
+        self.ignored_directories = [
+            'node_modules',
+            '.git',
+            'dist',
+            'build',
+            '.next',
+            '.nuxt',
+            'coverage',
+            CACHE_DIR_NAME
+        ]
         self.component_extensions = ['.js', '.jsx', '.ts', '.tsx', '.vue']
 
     def analyze(self) -> Dict[str, Any]:
@@ -40,23 +63,52 @@ class ProjectAnalyzer:
         分析项目结构和关键文件
         """
         try:
-            # 读取关键文件
-            for file_name in self.key_files:
-                self.project_info[file_name] = self.read_file(file_name)
-            
-            # 查找关键目录中的文件
-            for dir_name in self.key_directories:
-                self.project_info[dir_name] = self.find_files(dir_name, self.component_extensions)
-            
-            # 特殊处理src目录中的常见结构
-            src_subdirs = ['components', 'pages', 'views', 'routes', 'utils', 'hooks', 'services']
-            for subdir in src_subdirs:
-                self.project_info[f'src/{subdir}'] = self.find_files(f'src/{subdir}', self.component_extensions)
-            
-            return self.project_info
+            with self._lock:
+                index = self._get_index()
+                project_info: Dict[str, Any] = {}
+
+                # 读取关键文件
+                for file_name in self.key_files:
+                    project_info[file_name] = self._read_key_file(file_name, index)
+
+                # 一次遍历同时收集关键目录及src常见子目录中的文件
+                folders = list(self.key_directories)
+                folders.extend(f'src/{subdir}' for subdir in self.src_subdirectories)
+                buckets = self._collect_files(folders, self.component_extensions, index)
+                for folder in folders:
+                    project_info[folder] = buckets[folder]
+
+                if index is not None:
+                    index.flush()
+
+                # 整体替换，读取方不会看到分析到一半的结果
+                self.project_info = project_info
+                return self.project_info
         except Exception as e:
             raise ProjectAnalysisError(f"项目分析失败: {str(e)}")
 
+    def get_project_info(self) -> Dict[str, Any]:
+        """
+        获取当前项目信息
+
+        后台监视器运行时直接返回由其保持最新的结果（仅在有尚未处理的变更时
+        短暂等待）；等待超时（如大项目的首次分析尚未完成）或还没有结果时，
+        以及没有监视器时，执行一次分析。
+        """
+        watcher = self.watcher
+        if watcher is not None and watcher.is_running():
+            if watcher.wait_until_fresh() and self.project_info:
+                return self.project_info
+        return self.analyze()
+
+    def mark_stale(self) -> None:
+        """
+        通知后台监视器项目已发生变化，需要重新分析
+        """
+        watcher = self.watcher
+        if watcher is not None and watcher.is_running():
+            watcher.mark_dirty()
+
     def find_files(self, folder: str, exts: List[str]) -> List[str]:
         """
         查找指定目录中具有特定扩展名的文件
@@ -68,20 +120,171 @@ class ProjectAnalyzer:
         Returns:
             List[str]: 找到的文件路径列表
         """
-        result: List[str] = []
-        abs_folder = os.path.join(self.project_path, folder)
-        if not os.path.exists(abs_folder):
-            return result
-            
+        return self._collect_files([folder], exts)[folder]
+
+    def _get_index(self) -> Optional[ProjectIndex]:
+        """
+        获取（必要时打开）持久化项目索引，无法使用时返回None
+        """
+        if not self.use_index:
+            return None
+        if self.index is None:
+            signature = json.dumps({
+                'extensions': self.component_extensions,
+                'ignored': self.ignored_directories
+            })
+            try:
+                self.index = ProjectIndex(self.project_path, signature)
+            except (OSError, sqlite3.Error):
+                # 项目目录不可写等情况下退化为全量分析
+                self.use_index = False
+        return self.index
+
+    def _read_key_file(self, rel_path: str, index: Optional[ProjectIndex]) -> str:
+        """
+        读取关键文件，大小和修改时间未变化时直接使用索引中的内容
+
+        Args:
+            rel_path: 相对于项目根目录的文件路径
+            index: 项目索引，为None时直接读取
+
+        Returns:
+            str: 文件内容，如果文件不存在则返回空字符串
+        """
+        if index is None:
+            return self.read_file(rel_path)
         try:
-            for root, _, files in os.walk(abs_folder):
-                for f in files:
-                    if any(f.endswith(ext) for ext in exts):
-                        result.append(os.path.relpath(os.path.join(root, f), self.project_path))
+            stat = os.stat(os.path.join(self.project_path, rel_path))
+        except OSError:
+            return ''
+        content = index.get_key_file(rel_path, stat.st_size, stat.st_mtime_ns)
+        if content is None:
+            content = self.read_file(rel_path)
+            index.put_key_file(rel_path, stat.st_size, stat.st_mtime_ns, content)
+        return content
+
+    def _collect_files(
+        self,
+        folders: List[str],
+        exts: List[str],
+        index: Optional[ProjectIndex] = None
+    ) -> Dict[str, List[str]]:
+        """
+        单次遍历收集多个目录中具有特定扩展名的文件
+
+        嵌套的目录（如 src 与 src/components）只遍历一次，子目录中的文件同时
+        归入所有包含它的目录；忽略目录不会被深入。每个目录的结果顺序与
+        os.walk 自顶向下遍历的顺序一致。
+
+        Args:
+            folders: 要搜索的目录列表（相对于项目根目录）
+            exts: 文件扩展名列表
+            index: 项目索引，目录修改时间未变化时直接使用其中的目录列表
+
+        Returns:
+            Dict[str, List[str]]: 目录到文件相对路径列表的映射
+        """
+        ext_tuple = tuple(exts)
+        folder_by_path = {os.path.normpath(folder): folder for folder in folders}
+        buckets: Dict[str, List[str]] = {folder: [] for folder in folders}
+        visited = set()
+
+        try:
+            for folder in folders:
+                if folder in visited:
+                    continue
+                # 栈中保存 (相对目录, 该目录所属的结果目录)，按先序遍历
+                stack: List[Tuple[str, Tuple[str, ...]]] = [(os.path.normpath(folder), ())]
+                while stack:
+                    rel_dir, owners = stack.pop()
+                    owner = folder_by_path.get(rel_dir)
+                    if owner is not None and owner not in visited:
+                        visited.add(owner)
+                        owners = owners + (owner,)
+                    if not owners:
+                        continue
+
+                    files, subdirs = self._scan_directory(rel_dir, ext_tuple, index)
+                    for name in owners:
+                        buckets[name].extend(files)
+                    for subdir in reversed(subdirs):
+                        stack.append((subdir, owners))
         except Exception as e:
-            raise ProjectAnalysisError(f"搜索目录 '{folder}' 时出错: {str(e)}")
-            
-        return result
+            raise ProjectAnalysisError(f"搜索目录 '{', '.join(folders)}' 时出错: {str(e)}")
+
+        return buckets
+
+    def _scan_directory(
+        self,
+        rel_dir: str,
+        exts: Tuple[str, ...],
+        index: Optional[ProjectIndex] = None
+    ) -> Tuple[List[str], List[str]]:
+        """
+        列出单个目录中匹配扩展名的文件和需要继续遍历的子目录
+
+        Args:
+            rel_dir: 相对于项目根目录的目录路径
+            exts: 文件扩展名元组
+            index: 项目索引，为None时直接读取目录
+
+        Returns:
+            Tuple[List[str], List[str]]: (文件相对路径列表, 子目录相对路径列表)
+        """
+        if index is None:
+            return self._list_directory(rel_dir, exts)
+
+        try:
+            mtime_ns = os.stat(os.path.join(self.project_path, rel_dir)).st_mtime_ns
+        except OSError:
+            return [], []
+        cached = index.get_directory(rel_dir, mtime_ns)
+        if cached is not None:
+            return cached
+        files, subdirs = self._list_directory(rel_dir, exts)
+        index.put_directory(rel_dir, mtime_ns, files, subdirs)
+        return files, subdirs
+
+    def _list_directory(self, rel_dir: str, exts: Tuple[str, ...]) -> Tuple[List[str], List[str]]:
+        """
+        读取单个目录的内容（不使用索引）
+
+        Args:
+            rel_dir: 相对于项目根目录的目录路径
+            exts: 文件扩展名元组
+
+        Returns:
+            Tuple[List[str], List[str]]: (文件相对路径列表, 子目录相对路径列表)
+        """
+        files: List[str] = []
+        subdirs: List[str] = []
+        try:
+            with os.scandir(os.path.join(self.project_path, rel_dir)) as it:
+                entries = list(it)
+        except OSError:
+            # 与 os.walk 一致：无法读取的目录直接跳过
+            return files, subdirs
+
+        for entry in entries:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+
+            if is_dir:
+                if entry.name in self.ignored_directories:
+                    continue
+                try:
+                    is_link = entry.is_symlink()
+                except OSError:
+                    is_link = False
+                # 与 os.walk(followlinks=False) 一致：不进入符号链接目录
+                if not is_link:
+                    subdirs.append(os.path.join(rel_dir, entry.name))
+            elif entry.name.endswith(exts):
+                files.append(os.path.join(rel_dir, entry.name))
+
+        return files, subdirs
 
     def read_file(self, rel_path: str) -> str:
         """
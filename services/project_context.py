@@ -0,0 +1,241 @@
+"""
+项目分析上下文模块
+
+同一项目的所有命令共享一个 ProjectContext：其中只有一个 ProjectAnalyzer，
+解析后的 package.json、scripts 和文件清单按“代”缓存。只有经由
+FileOperator 的写入或后台监视器报告变化时，代数才会递增、缓存才会失效。
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from services.file_operator import FileOperator
+from services.module_graph import ModuleGraph
+from services.project_analyzer import ProjectAnalyzer
+from services.project_index import RACY_WINDOW_NS
+from services.project_summary import ProjectSummaryBuilder
+from services.retrieval_index import RetrievalHit, RetrievalIndex
+
+
+class ProjectContext:
+    """单个项目的共享分析上下文"""
+
+    def __init__(self, project_path: str, analyzer: Optional[ProjectAnalyzer] = None):
+        self.project_path = os.path.abspath(project_path)
+        self.analyzer = analyzer or ProjectAnalyzer(project_path)
+        self.generation = 0
+        self._cache: Dict[str, Tuple[int, Any]] = {}
+        self._lock = threading.RLock()
+        # 检索索引和模块依赖图按文件 mtime 增量更新，跨代保留
+        self._retrieval_index = RetrievalIndex(self.project_path)
+        self._module_graph = ModuleGraph(self.project_path)
+        # 文件相对路径 -> (mtime_ns, 大小, 内容摘要)
+        self._content_hashes: Dict[str, Tuple[int, int, bytes]] = {}
+        FileOperator.add_change_listener(self._on_file_changed)
+
+    def close(self) -> None:
+        """取消对文件写入的监听"""
+        FileOperator.remove_change_listener(self._on_file_changed)
+
+    def invalidate(self) -> None:
+        """使所有缓存失效"""
+        with self._lock:
+            self.generation += 1
+
+    def _on_file_changed(self, file_path: str) -> None:
+        """FileOperator 写入或删除文件后的回调"""
+        abs_path = os.path.abspath(file_path)
+        if abs_path != self.project_path and not abs_path.startswith(self.project_path + os.sep):
+            return
+        self.invalidate()
+        self.analyzer.mark_stale()
+
+    def _memoize(self, key: str, factory: Callable[[], Any]) -> Any:
+        """
+        按当前代数缓存计算结果
+
+        Args:
+            key: 缓存键
+            factory: 缓存未命中时的计算函数
+
+        Returns:
+            Any: 计算结果
+        """
+        with self._lock:
+            generation = self.generation
+            cached = self._cache.get(key)
+            if cached is not None and cached[0] == generation:
+                return cached[1]
+        value = factory()
+        with self._lock:
+            # 计算期间如果发生了失效，不写入缓存，下次重新计算
+            if self.generation == generation:
+                self._cache[key] = (generation, value)
+        return value
+
+    def get_project_info(self) -> Dict[str, Any]:
+        """获取项目信息"""
+        return self._memoize('project_info', self.analyzer.get_project_info)
+
+    def get_package_json_text(self) -> str:
+        """
+        获取 package.json 的原始内容
+
+        Returns:
+            str: 文件内容，不存在时返回空字符串
+        """
+        return self.get_project_info().get('package.json', '')
+
+    def get_package_data(self) -> Dict[str, Any]:
+        """
+        获取解析后的 package.json
+
+        Returns:
+            Dict[str, Any]: 解析结果，文件不存在时返回空字典
+
+        Raises:
+            json.JSONDecodeError: package.json 格式错误
+        """
+        def parse() -> Tuple[Optional[Dict[str, Any]], Optional[json.JSONDecodeError]]:
+            text = self.get_package_json_text()
+            if not text:
+                return {}, None
+            try:
+                return json.loads(text), None
+            except json.JSONDecodeError as e:
+                return None, e
+
+        data, error = self._memoize('package_data', parse)
+        if error is not None:
+            raise error
+        return data
+
+    def get_scripts(self) -> Dict[str, str]:
+        """
+        获取 package.json 中定义的 scripts
+
+        Returns:
+            Dict[str, str]: 脚本名到命令的映射，格式错误或未定义时返回空字典
+        """
+        try:
+            scripts = self.get_package_data().get('scripts', {})
+        except json.JSONDecodeError:
+            return {}
+        return scripts if isinstance(scripts, dict) else {}
+
+    def get_file_inventory(self) -> List[str]:
+        """
+        获取去重后的项目文件清单
+
+        Returns:
+            List[str]: 按路径排序的文件相对路径列表
+        """
+        def build() -> List[str]:
+            files = set()
+            for value in self.get_project_info().values():
+                if isinstance(value, list):
+                    files.update(value)
+            return sorted(files)
+
+        return self._memoize('file_inventory', build)
+
+    def get_project_summary(self, token_budget: int) -> str:
+        """
+        获取控制在token预算内的项目摘要
+
+        Args:
+            token_budget: 摘要的token预算
+
+        Returns:
+            str: 摘要文本
+        """
+        return self._memoize(
+            f'summary:{token_budget}',
+            lambda: ProjectSummaryBuilder(token_budget).build(self.get_project_info())
+        )
+
+    def get_retrieval_index(self) -> RetrievalIndex:
+        """
+        获取与当前文件清单同步的检索索引
+
+        Returns:
+            RetrievalIndex: 检索索引
+        """
+        def build() -> RetrievalIndex:
+            self._retrieval_index.update(self.get_file_inventory())
+            return self._retrieval_index
+
+        return self._memoize('retrieval_index', build)
+
+    def get_module_graph(self) -> ModuleGraph:
+        """
+        获取与当前文件清单同步的模块依赖图
+
+        Returns:
+            ModuleGraph: 模块依赖图
+        """
+        def build() -> ModuleGraph:
+            self._module_graph.update(self.get_file_inventory())
+            return self._module_graph
+
+        return self._memoize('module_graph', build)
+
+    def search_files(self, query: str, top_k: int) -> List[RetrievalHit]:
+        """
+        检索与需求最相关的项目文件
+
+        Args:
+            query: 用户需求
+            top_k: 返回的最大结果数
+
+        Returns:
+            List[RetrievalHit]: 按得分从高到低排列的结果
+        """
+        index = self.get_retrieval_index()
+        graph = self.get_module_graph()
+        return index.search(query, top_k, neighbors=graph.neighbors)
+
+    def get_content_fingerprint(self) -> str:
+        """
+        获取项目关键文件和源文件内容的整体指纹
+
+        每次调用都重新计算整体摘要（没有后台监视器时，外部编辑不会使缓存失效）；
+        单个文件的内容摘要按大小和修改时间缓存，只有变化的文件会被重新读取。
+
+        Returns:
+            str: 十六进制摘要，任何相关文件内容变化时随之改变
+        """
+        digest = hashlib.sha256()
+        for path in list(self.analyzer.key_files) + self.get_file_inventory():
+            digest.update(path.encode('utf-8'))
+            digest.update(self._hash_file(path))
+        return digest.hexdigest()
+
+    def _hash_file(self, path: str) -> bytes:
+        """
+        计算单个文件的内容摘要，大小和修改时间未变化时使用缓存
+
+        修改时间过于接近当前时间的文件可能在同一时间刻度内再次被修改（大小不变时
+        无法察觉），其摘要不缓存，与 ProjectIndex 的规则一致。
+        """
+        abs_path = os.path.join(self.project_path, path)
+        try:
+            stat = os.stat(abs_path)
+        except OSError:
+            return b''
+        cached = self._content_hashes.get(path)
+        if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        try:
+            with open(abs_path, 'rb') as f:
+                value = hashlib.sha1(f.read()).digest()
+        except OSError:
+            return b''
+        if time.time_ns() - stat.st_mtime_ns >= RACY_WINDOW_NS:
+            self._content_hashes[path] = (stat.st_mtime_ns, stat.st_size, value)
+        else:
+            self._content_hashes.pop(path, None)
+        return value
@@ -0,0 +1,210 @@
+"""
+项目索引模块
+
+将目录列表和关键文件内容持久化到项目下的 .agent_cache 目录中，以路径、
+大小和修改时间为键。再次分析时只重新读取修改时间发生变化的目录和内容
+发生变化的关键文件。
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+CACHE_DIR_NAME = '.agent_cache'
+INDEX_FILE_NAME = 'project_index.sqlite3'
+# 修改时间距当前时间过近的目录可能在同一时间刻度内再次变化，不写入索引
+RACY_WINDOW_NS = 2 * 1000 * 1000 * 1000
+# 写入缓存目录的 .gitignore，避免缓存内容被提交到项目的版本库
+CACHE_GITIGNORE = '# 由前端自动修改Agent自动创建\n*\n'
+
+
+def ensure_cache_dir(directory: str) -> None:
+    """
+    创建缓存目录（或其下的子目录），并在缓存目录中写入忽略全部内容的 .gitignore
+
+    Args:
+        directory: .agent_cache 目录或其下的子目录
+    """
+    os.makedirs(directory, exist_ok=True)
+    cache_dir = directory
+    while os.path.basename(cache_dir) != CACHE_DIR_NAME:
+        parent = os.path.dirname(cache_dir)
+        if parent == cache_dir:
+            return
+        cache_dir = parent
+    gitignore_path = os.path.join(cache_dir, '.gitignore')
+    if os.path.exists(gitignore_path):
+        return
+    try:
+        with open(gitignore_path, 'w', encoding='utf-8') as f:
+            f.write(CACHE_GITIGNORE)
+    except OSError:
+        pass
+
+
+class ProjectIndex:
+    """基于 SQLite 的项目增量索引"""
+
+    def __init__(self, project_path: str, signature: str):
+        """
+        Args:
+            project_path: 项目根目录
+            signature: 遍历参数签名（扩展名、忽略目录等），变化时索引整体失效
+        """
+        self.project_path = project_path
+        self.index_path = os.path.join(project_path, CACHE_DIR_NAME, INDEX_FILE_NAME)
+        self._lock = threading.RLock()
+        self._directories: Dict[str, Tuple[int, List[str], List[str]]] = {}
+        self._key_files: Dict[str, Tuple[int, int, str]] = {}
+        self._dirty_directories: Dict[str, Tuple[int, List[str], List[str]]] = {}
+        self._dirty_key_files: Dict[str, Tuple[int, int, str]] = {}
+        self._seen_directories: set = set()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._open(signature)
+
+    def _open(self, signature: str) -> None:
+        """打开（必要时创建）索引数据库并载入内存"""
+        ensure_cache_dir(os.path.dirname(self.index_path))
+        # 分析可能在后台线程中进行，连接由锁保护
+        self._conn = sqlite3.connect(self.index_path, check_same_thread=False)
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS directories ("
+                "path TEXT PRIMARY KEY, mtime_ns INTEGER, files TEXT, subdirs TEXT)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS key_files ("
+                "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, content TEXT)"
+            )
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'signature'").fetchone()
+            if row is None or row[0] != signature:
+                self._conn.execute("DELETE FROM directories")
+                self._conn.execute("DELETE FROM key_files")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('signature', ?)", (signature,)
+                )
+
+        for path, mtime_ns, files, subdirs in self._conn.execute(
+            "SELECT path, mtime_ns, files, subdirs FROM directories"
+        ):
+            self._directories[path] = (mtime_ns, json.loads(files), json.loads(subdirs))
+        for path, size, mtime_ns, content in self._conn.execute(
+            "SELECT path, size, mtime_ns, content FROM key_files"
+        ):
+            self._key_files[path] = (size, mtime_ns, content)
+
+    @staticmethod
+    def _is_racy(mtime_ns: int) -> bool:
+        """判断修改时间是否过于接近当前时间"""
+        return time.time_ns() - mtime_ns < RACY_WINDOW_NS
+
+    def get_directory(self, rel_dir: str, mtime_ns: int) -> Optional[Tuple[List[str], List[str]]]:
+        """
+        获取缓存的目录列表
+
+        Args:
+            rel_dir: 相对于项目根目录的目录路径
+            mtime_ns: 目录当前的修改时间（纳秒）
+
+        Returns:
+            Optional[Tuple[List[str], List[str]]]: (文件列表, 子目录列表)，未命中时返回None
+        """
+        with self._lock:
+            self._seen_directories.add(rel_dir)
+            cached = self._directories.get(rel_dir)
+            if cached is None or cached[0] != mtime_ns:
+                return None
+            return list(cached[1]), list(cached[2])
+
+    def put_directory(self, rel_dir: str, mtime_ns: int, files: List[str], subdirs: List[str]) -> None:
+        """记录目录列表"""
+        with self._lock:
+            self._seen_directories.add(rel_dir)
+            if self._is_racy(mtime_ns):
+                self._directories.pop(rel_dir, None)
+                return
+            entry = (mtime_ns, list(files), list(subdirs))
+            self._directories[rel_dir] = entry
+            self._dirty_directories[rel_dir] = entry
+
+    def get_key_file(self, rel_path: str, size: int, mtime_ns: int) -> Optional[str]:
+        """
+        获取缓存的关键文件内容
+
+        Args:
+            rel_path: 相对于项目根目录的文件路径
+            size: 文件当前大小
+            mtime_ns: 文件当前的修改时间（纳秒）
+
+        Returns:
+            Optional[str]: 文件内容，未命中时返回None
+        """
+        with self._lock:
+            cached = self._key_files.get(rel_path)
+            if cached is None or cached[0] != size or cached[1] != mtime_ns:
+                return None
+            return cached[2]
+
+    def put_key_file(self, rel_path: str, size: int, mtime_ns: int, content: str) -> None:
+        """记录关键文件内容"""
+        with self._lock:
+            if self._is_racy(mtime_ns):
+                self._key_files.pop(rel_path, None)
+                return
+            entry = (size, mtime_ns, content)
+            self._key_files[rel_path] = entry
+            self._dirty_key_files[rel_path] = entry
+
+    def flush(self) -> None:
+        """
+        将本轮分析中变化的条目写入磁盘，并清理本轮未访问到的目录
+        """
+        with self._lock:
+            stale = [path for path in self._directories if path not in self._seen_directories]
+            for path in stale:
+                del self._directories[path]
+            self._seen_directories = set()
+
+            if not (self._dirty_directories or self._dirty_key_files or stale) or self._conn is None:
+                return
+            try:
+                self._write_dirty(stale)
+            except sqlite3.Error:
+                # 索引只是缓存，写入失败时下次分析重新读取即可
+                pass
+            self._dirty_directories.clear()
+            self._dirty_key_files.clear()
+
+    def _write_dirty(self, stale: List[str]) -> None:
+        """在单个事务中写入变化的条目并删除过期目录"""
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO directories (path, mtime_ns, files, subdirs) VALUES (?, ?, ?, ?)",
+                [
+                    (path, mtime_ns, json.dumps(files), json.dumps(subdirs))
+                    for path, (mtime_ns, files, subdirs) in self._dirty_directories.items()
+                ]
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO key_files (path, size, mtime_ns, content) VALUES (?, ?, ?, ?)",
+                [
+                    (path, size, mtime_ns, content)
+                    for path, (size, mtime_ns, content) in self._dirty_key_files.items()
+                ]
+            )
+            self._conn.executemany(
+                "DELETE FROM directories WHERE path = ?", [(path,) for path in stale]
+            )
+
+    def close(self) -> None:
+        """关闭索引数据库"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
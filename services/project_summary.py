@@ -0,0 +1,221 @@
+"""
+项目摘要模块
+
+将 ProjectAnalyzer 的分析结果压缩为适合放入提示词的文本：文件清单去重后
+渲染为目录树，配置文件只保留依赖、脚本、路径别名等相关部分，并控制在
+给定的token预算之内。
+"""
+
+import re
+from typing import Any, Dict, List
+from utils.helpers import estimate_tokens, safe_json_loads
+
+# 各配置文件中保留的字段
+PACKAGE_JSON_FIELDS = ['name', 'type', 'scripts', 'dependencies', 'devDependencies', 'peerDependencies']
+TSCONFIG_FIELDS = ['baseUrl', 'paths', 'jsx', 'module', 'target']
+# JS配置文件中保留的片段
+JS_CONFIG_PATTERNS = [
+    re.compile(r'alias\s*:\s*(\{[^{}]*\}|\[[^\[\]]*\])', re.DOTALL),
+    re.compile(r'(?:presets|plugins)\s*:\s*\[[^\[\]]*\]', re.DOTALL),
+]
+
+
+class ProjectSummaryBuilder:
+    """项目摘要生成器"""
+
+    def __init__(self, token_budget: int = 2000):
+        """
+        Args:
+            token_budget: 摘要的token预算
+        """
+        self.token_budget = token_budget
+
+    def build(self, project_info: Dict[str, Any]) -> str:
+        """
+        生成项目摘要
+
+        Args:
+            project_info: ProjectAnalyzer.analyze() 的结果
+
+        Returns:
+            str: 摘要文本
+        """
+        files = sorted({
+            path.replace('\\', '/')
+            for value in project_info.values() if isinstance(value, list)
+            for path in value
+        })
+        config_section = self._build_config_section(project_info)
+        header = f"## 目录结构（共 {len(files)} 个文件）"
+
+        remaining = self.token_budget - estimate_tokens(config_section) - estimate_tokens(header)
+        tree = self._build_tree(files)
+        tree_text = self._render_tree_within_budget(tree, remaining)
+
+        sections = [header, tree_text]
+        if config_section:
+            sections.append(config_section)
+        summary = '\n'.join(section for section in sections if section)
+        return self._truncate(summary, self.token_budget)
+
+    # ------------------------------------------------------------------
+    # 目录树
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _build_tree(files: List[str]) -> Dict[str, Any]:
+        """将文件路径列表构建为嵌套字典，文件对应的值为None"""
+        tree: Dict[str, Any] = {}
+        for path in files:
+            node = tree
+            parts = path.split('/')
+            for part in parts[:-1]:
+                child = node.get(part)
+                if not isinstance(child, dict):
+                    child = node[part] = {}
+                node = child
+            node.setdefault(parts[-1], None)
+        return tree
+
+    @staticmethod
+    def _count_files(node: Dict[str, Any]) -> int:
+        """统计目录下的文件总数"""
+        return sum(1 if child is None else ProjectSummaryBuilder._count_files(child) for child in node.values())
+
+    @staticmethod
+    def _tree_depth(node: Dict[str, Any]) -> int:
+        """目录树的最大深度"""
+        depths = [ProjectSummaryBuilder._tree_depth(child) + 1 for child in node.values() if isinstance(child, dict)]
+        return max(depths, default=0) + 1
+
+    def _render_tree(self, node: Dict[str, Any], max_depth: int, depth: int = 0) -> List[str]:
+        """
+        渲染目录树，超过最大深度的目录折叠为文件数
+
+        Args:
+            node: 目录节点
+            max_depth: 展开的最大深度
+            depth: 当前深度
+
+        Returns:
+            List[str]: 渲染后的行
+        """
+        lines: List[str] = []
+        indent = '  ' * depth
+        # 目录在前，文件在后，各自按名称排序，保证输出稳定
+        dirs = sorted(name for name, child in node.items() if isinstance(child, dict))
+        names = sorted(name for name, child in node.items() if child is None)
+        for name in dirs:
+            child = node[name]
+            if depth + 1 >= max_depth:
+                lines.append(f"{indent}{name}/ ({self._count_files(child)} 个文件)")
+            else:
+                lines.append(f"{indent}{name}/")
+                lines.extend(self._render_tree(child, max_depth, depth + 1))
+        if names:
+            lines.append(f"{indent}{', '.join(names)}")
+        return lines
+
+    def _render_tree_within_budget(self, tree: Dict[str, Any], budget: int) -> str:
+        """
+        从完全展开开始逐层折叠目录树，直到满足预算
+
+        Args:
+            tree: 目录树
+            budget: 可用的token预算
+
+        Returns:
+            str: 渲染后的目录树
+        """
+        text = ''
+        for max_depth in range(self._tree_depth(tree), 0, -1):
+            text = '\n'.join(self._render_tree(tree, max_depth))
+            if estimate_tokens(text) <= budget:
+                return text
+        return self._truncate(text, budget)
+
+    # ------------------------------------------------------------------
+    # 配置文件
+    # ------------------------------------------------------------------
+
+    def _build_config_section(self, project_info: Dict[str, Any]) -> str:
+        """提取各配置文件中的相关部分"""
+        parts: List[str] = []
+        for file_name, value in project_info.items():
+            if not isinstance(value, str) or not value.strip():
+                continue
+            if file_name == 'package.json':
+                extracted = self._extract_package_json(value)
+            elif file_name.startswith('tsconfig') and file_name.endswith('.json'):
+                extracted = self._extract_tsconfig(value)
+            else:
+                extracted = self._extract_js_config(value)
+            if extracted:
+                parts.append(f"## {file_name}\n{extracted}")
+        return '\n'.join(parts)
+
+    @staticmethod
+    def _format_value(value: Any) -> str:
+        """紧凑地格式化配置值"""
+        if isinstance(value, dict):
+            return ', '.join(f"{k}: {ProjectSummaryBuilder._format_value(v)}" for k, v in sorted(value.items()))
+        if isinstance(value, list):
+            return ', '.join(ProjectSummaryBuilder._format_value(v) for v in value)
+        return str(value)
+
+    def _extract_package_json(self, content: str) -> str:
+        """保留 package.json 中的名称、脚本和依赖"""
+        data = safe_json_loads(content)
+        if not isinstance(data, dict):
+            return "(package.json 格式错误)"
+        lines = [
+            f"{field}: {self._format_value(data[field])}"
+            for field in PACKAGE_JSON_FIELDS if data.get(field)
+        ]
+        return '\n'.join(lines)
+
+    def _extract_tsconfig(self, content: str) -> str:
+        """保留 tsconfig.json 中与模块解析相关的编译选项"""
+        data = safe_json_loads(self._strip_json_comments(content))
+        if not isinstance(data, dict):
+            return ''
+        options = data.get('compilerOptions') or {}
+        lines = [
+            f"{field}: {self._format_value(options[field])}"
+            for field in TSCONFIG_FIELDS if options.get(field)
+        ]
+        if data.get('extends'):
+            lines.append(f"extends: {data['extends']}")
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _extract_js_config(content: str) -> str:
+        """保留 JS 配置文件中的路径别名和插件声明"""
+        snippets: List[str] = []
+        for pattern in JS_CONFIG_PATTERNS:
+            for match in pattern.finditer(content):
+                snippets.append(re.sub(r'\s+', ' ', match.group(0)).strip())
+        return '\n'.join(snippets)
+
+    @staticmethod
+    def _strip_json_comments(content: str) -> str:
+        """去掉 tsconfig 中允许出现的注释和尾随逗号"""
+        content = re.sub(r'("(?:\\.|[^"\\])*")|//[^\n]*|/\*.*?\*/', lambda m: m.group(1) or '', content, flags=re.DOTALL)
+        return re.sub(r',(\s*[}\]])', r'\1', content)
+
+    @staticmethod
+    def _truncate(text: str, budget: int) -> str:
+        """按行截断文本，使其满足预算"""
+        if estimate_tokens(text) <= budget:
+            return text
+        lines: List[str] = []
+        used = 0
+        for line in text.split('\n'):
+            cost = estimate_tokens(line + '\n')
+            if used + cost > budget:
+                lines.append('...')
+                break
+            lines.append(line)
+            used += cost
+        return '\n'.join(lines)
+
@@ -0,0 +1,212 @@
+"""
+项目监视模块
+
+在后台保持 ProjectAnalyzer.project_info 为最新状态。优先使用 watchdog
+（Linux 下基于 inotify）接收文件系统事件，未安装时退化为定时轮询；
+得益于项目索引，轮询只需检查目录的修改时间。
+"""
+
+import os
+import threading
+from typing import Callable, List, Optional
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog 为可选依赖
+    FileSystemEventHandler = object
+    Observer = None
+
+from services.project_analyzer import ProjectAnalyzer
+
+
+class _ChangeHandler(FileSystemEventHandler):
+    """将文件系统事件转发给 ProjectWatcher"""
+
+    # 只读访问产生的事件，分析器自身读取文件时也会触发，需忽略
+    IGNORED_EVENT_TYPES = ('opened', 'closed', 'closed_no_write')
+
+    def __init__(self, watcher: 'ProjectWatcher'):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event) -> None:
+        if event.event_type in self.IGNORED_EVENT_TYPES:
+            return
+        paths = [getattr(event, 'src_path', ''), getattr(event, 'dest_path', '')]
+        if any(path and self.watcher.is_relevant(path) for path in paths):
+            self.watcher.mark_dirty()
+
+
+class ProjectWatcher:
+    """后台项目监视器"""
+
+    def __init__(
+        self,
+        analyzer: ProjectAnalyzer,
+        mode: str = 'auto',
+        interval: float = 1.0,
+        debounce: float = 0.2
+    ):
+        """
+        Args:
+            analyzer: 要保持最新的项目分析器
+            mode: 'auto'（有 watchdog 时使用事件，否则轮询）、'inotify' 或 'poll'
+            interval: 轮询间隔（秒）
+            debounce: 收到事件后合并后续事件的等待时间（秒）
+        """
+        self.analyzer = analyzer
+        self.project_path = os.path.abspath(analyzer.project_path)
+        self.interval = interval
+        self.debounce = debounce
+        if mode == 'auto':
+            mode = 'inotify' if Observer is not None else 'poll'
+        if mode == 'inotify' and Observer is None:
+            print("未安装 watchdog，项目监视退化为轮询模式")
+            mode = 'poll'
+        self.mode = mode
+        self._listeners: List[Callable[[], None]] = []
+        self._condition = threading.Condition()
+        self._dirty = False
+        self._refreshing = False
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+        self._handler = None
+        self._watched_dirs: set = set()
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        """注册项目信息发生变化后的回调（在监视线程中调用）"""
+        self._listeners.append(callback)
+
+    def is_running(self) -> bool:
+        """监视器是否正在运行"""
+        return self._running
+
+    def start(self) -> None:
+        """启动后台监视，并立即在后台进行一次分析"""
+        if self._running:
+            return
+        self._running = True
+        self.analyzer.watcher = self
+        if self.mode == 'inotify':
+            self._start_observer()
+        self._thread = threading.Thread(target=self._run, name='ProjectWatcher', daemon=True)
+        self._thread.start()
+        self.mark_dirty()
+
+    def stop(self) -> None:
+        """停止后台监视"""
+        if not self._running:
+            return
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout=2)
+            self._observer = None
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+        if self.analyzer.watcher is self:
+            self.analyzer.watcher = None
+
+    def mark_dirty(self) -> None:
+        """标记项目已变化，唤醒后台线程重新分析"""
+        with self._condition:
+            self._dirty = True
+            self._condition.notify_all()
+
+    def wait_until_fresh(self, timeout: float = 5.0) -> bool:
+        """
+        等待尚未处理的变更分析完成
+
+        Args:
+            timeout: 最长等待时间（秒）
+
+        Returns:
+            bool: 项目信息是否已是最新
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not (self._dirty or self._refreshing) or not self._running,
+                timeout=timeout
+            )
+
+    def is_relevant(self, path: str) -> bool:
+        """
+        判断变化的路径是否可能影响项目信息
+
+        Args:
+            path: 发生变化的绝对路径
+
+        Returns:
+            bool: 是否需要重新分析
+        """
+        rel_path = os.path.relpath(path, self.project_path)
+        parts = rel_path.split(os.sep)
+        if parts[0] == os.pardir:
+            return False
+        return not any(part in self.analyzer.ignored_directories for part in parts)
+
+    def _start_observer(self) -> None:
+        """启动 watchdog 观察者：根目录非递归，关键目录递归"""
+        self._observer = Observer()
+        self._handler = _ChangeHandler(self)
+        self._observer.schedule(self._handler, self.project_path, recursive=False)
+        self._schedule_key_directories()
+        self._observer.start()
+
+    def _schedule_key_directories(self) -> None:
+        """为已存在但尚未监视的关键目录添加递归监视"""
+        if self._observer is None:
+            return
+        for dir_name in self.analyzer.key_directories:
+            abs_dir = os.path.join(self.project_path, dir_name)
+            if dir_name not in self._watched_dirs and os.path.isdir(abs_dir):
+                try:
+                    self._observer.schedule(self._handler, abs_dir, recursive=True)
+                    self._watched_dirs.add(dir_name)
+                except OSError as e:
+                    print(f"监视目录 {abs_dir} 失败: {str(e)}")
+
+    def _run(self) -> None:
+        """后台线程主循环"""
+        # 事件模式下也定期检查一次，兜底遗漏的事件
+        wait_timeout = self.interval if self.mode == 'poll' else max(self.interval, 30.0)
+        while True:
+            with self._condition:
+                if not self._dirty:
+                    self._condition.wait(timeout=wait_timeout)
+                if not self._running:
+                    return
+                triggered = self._dirty
+            if triggered and self.debounce > 0:
+                # 合并短时间内连续到达的事件（如一次保存多个文件）
+                threading.Event().wait(self.debounce)
+            with self._condition:
+                self._dirty = False
+                self._refreshing = True
+            try:
+                self._refresh()
+            finally:
+                with self._condition:
+                    self._refreshing = False
+                    self._condition.notify_all()
+
+    def _refresh(self) -> None:
+        """重新分析项目，结果变化时通知监听者"""
+        previous = self.analyzer.project_info
+        try:
+            current = self.analyzer.analyze()
+        except Exception as e:
+            print(f"后台分析项目时出错: {str(e)}")
+            return
+        self._schedule_key_directories()
+        if current != previous:
+            for callback in list(self._listeners):
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"项目变更回调出错: {str(e)}")
@@ -0,0 +1,174 @@
+"""
+ReAct流式解析模块
+
+在模型输出的过程中增量解析 ReAct 格式，每当一行完整结束就产生结构化事件：
+- thought: 一段完整的 Thought
+- action: 一个完整的 Action 行（名称和参数）
+- observation: 模型自行编造的 Observation 行，调用方可据此提前结束接收
+- final_answer: Final Answer 之后的内容片段，随到随发
+
+内容以列表缓存，不做字符串的重复拼接。
+"""
+
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+FINAL_ANSWER_MARKER = 'Final Answer:'
+ACTION_PATTERN = re.compile(r'Action:\s*(\w+)\s*\((.*?)\)', re.IGNORECASE)
+THOUGHT_PATTERN = re.compile(r'^\s*Thought:\s*(.*)$', re.IGNORECASE)
+OBSERVATION_PATTERN = re.compile(r'^\s*Observation:', re.IGNORECASE)
+
+
+@dataclass
+class ReActEvent:
+    """ReAct 流式解析事件"""
+    kind: str
+    text: str = ''
+    name: str = ''
+    argument: str = ''
+    # 事件所在行在完整内容中的起始位置
+    offset: int = 0
+
+
+class ReActStreamParser:
+    """ReAct 格式的增量解析器"""
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._length = 0
+        self._line: List[str] = []
+        self._line_start = 0
+        # 当前行末尾的若干字符，用于发现跨片段的 Final Answer 标记
+        self._tail = ''
+        self._thought: Optional[List[str]] = None
+        self._final_parts: List[str] = []
+        self.final_started = False
+
+    @property
+    def content(self) -> str:
+        """目前接收到的完整内容"""
+        return ''.join(self._parts)
+
+    @property
+    def final_answer(self) -> Optional[str]:
+        """Final Answer 之后的内容，尚未出现时为None"""
+        if not self.final_started:
+            return None
+        return ''.join(self._final_parts).strip()
+
+    def feed(self, delta: str) -> List[ReActEvent]:
+        """
+        输入一段增量内容
+
+        Args:
+            delta: 模型新输出的文本
+
+        Returns:
+            List[ReActEvent]: 由此产生的事件
+        """
+        base = self._length
+        self._parts.append(delta)
+        self._length += len(delta)
+        if self.final_started:
+            return self._emit_final(delta)
+
+        events: List[ReActEvent] = []
+        position = 0
+        while position < len(delta):
+            newline = delta.find('\n', position)
+            piece = delta[position:] if newline < 0 else delta[position:newline]
+
+            window = self._tail + piece
+            marker = window.find(FINAL_ANSWER_MARKER)
+            if marker >= 0:
+                line = ''.join(self._line) + piece
+                marker_end = line.find(FINAL_ANSWER_MARKER) + len(FINAL_ANSWER_MARKER)
+                events.extend(self._flush_thought())
+                self.final_started = True
+                remainder = line[marker_end:].lstrip()
+                if newline >= 0:
+                    remainder += delta[newline:]
+                self._line = []
+                self._tail = ''
+                events.extend(self._emit_final(remainder))
+                return events
+
+            if newline < 0:
+                self._line.append(piece)
+                self._tail = window[-len(FINAL_ANSWER_MARKER):]
+                break
+
+            line = ''.join(self._line) + piece
+            events.extend(self._process_line(line, self._line_start))
+            self._line = []
+            self._tail = ''
+            position = newline + 1
+            self._line_start = base + position
+        return events
+
+    def close(self) -> List[ReActEvent]:
+        """
+        输入结束，处理最后一行
+
+        Returns:
+            List[ReActEvent]: 由此产生的事件
+        """
+        events: List[ReActEvent] = []
+        if not self.final_started and self._line:
+            events.extend(self._process_line(''.join(self._line), self._line_start))
+            self._line = []
+        events.extend(self._flush_thought())
+        return events
+
+    def _emit_final(self, text: str) -> List[ReActEvent]:
+        """记录并产生 Final Answer 片段"""
+        if not text:
+            return []
+        self._final_parts.append(text)
+        return [ReActEvent('final_answer', text=text)]
+
+    def _flush_thought(self) -> List[ReActEvent]:
+        """结束当前 Thought 段落"""
+        if self._thought is None:
+            return []
+        text = '\n'.join(self._thought).strip()
+        self._thought = None
+        return [ReActEvent('thought', text=text)] if text else []
+
+    def _process_line(self, line: str, offset: int) -> List[ReActEvent]:
+        """
+        处理一行完整内容
+
+        Args:
+            line: 不含换行符的一行
+            offset: 该行在完整内容中的起始位置
+
+        Returns:
+            List[ReActEvent]: 由此产生的事件
+        """
+        if OBSERVATION_PATTERN.match(line):
+            return self._flush_thought() + [ReActEvent('observation', text=line, offset=offset)]
+
+        actions = list(ACTION_PATTERN.finditer(line))
+        if actions:
+            events = self._flush_thought()
+            for match in actions:
+                events.append(ReActEvent(
+                    'action',
+                    text=line,
+                    name=match.group(1),
+                    argument=match.group(2).strip('"'),
+                    offset=offset
+                ))
+            return events
+
+        thought = THOUGHT_PATTERN.match(line)
+        if thought:
+            events = self._flush_thought()
+            self._thought = [thought.group(1)]
+            return events
+
+        if self._thought is not None:
+            self._thought.append(line)
+        return []
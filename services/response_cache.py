@@ -0,0 +1,224 @@
+"""
+模型回复缓存模块
+
+以模型名称、规范化后的消息列表以及项目文件内容指纹的哈希为键，把完整的模型
+回复缓存到磁盘（项目下的 .agent_cache/responses/）。同一请求再次发送时直接
+返回缓存内容。缓存条目有过期时间，总大小超过上限时按最近使用时间淘汰。
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from services.llm_backends import LLMBackend
+from services.project_index import ensure_cache_dir
+
+
+def normalize_messages(messages: List[Dict[str, str]]) -> List[Tuple[str, str]]:
+    """
+    规范化消息列表，忽略换行符风格和首尾空白的差异
+
+    Args:
+        messages: 消息列表
+
+    Returns:
+        List[Tuple[str, str]]: (角色, 内容) 列表
+    """
+    return [
+        (message.get('role', ''), message.get('content', '').replace('\r\n', '\n').strip())
+        for message in messages
+    ]
+
+
+def make_cache_key(model: str, messages: List[Dict[str, str]], fingerprint: str = '') -> str:
+    """
+    计算请求的缓存键
+
+    Args:
+        model: 模型名称
+        messages: 消息列表
+        fingerprint: 相关文件内容的指纹
+
+    Returns:
+        str: 十六进制的 SHA-256 摘要
+    """
+    payload = json.dumps(
+        {'model': model, 'messages': normalize_messages(messages), 'files': fingerprint},
+        ensure_ascii=False,
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """磁盘上的模型回复缓存"""
+
+    def __init__(self, cache_dir: str, ttl: float = 86400.0, max_bytes: int = 50 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        # 为 True 时跳过缓存，直接请求模型（结果仍会写入缓存）
+        self.bypass = False
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self._lock = threading.Lock()
+        # 缓存键 -> (最近使用时间, 文件大小)
+        self._entries: Dict[str, Tuple[float, int]] = {}
+        self._total_bytes = 0
+        self._load_entries()
+
+    def _load_entries(self) -> None:
+        """扫描缓存目录，以文件修改时间作为最近使用时间"""
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except OSError:
+                continue
+            self._entries[name[:-5]] = (stat.st_mtime, stat.st_size)
+            self._total_bytes += stat.st_size
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key + '.json')
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        读取缓存的回复
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Optional[str]: 缓存的回复，未命中、已过期或处于跳过状态时返回None
+        """
+        with self._lock:
+            if self.bypass:
+                self.bypassed += 1
+                return None
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            path = self._path(key)
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+                if time.time() - entry['created'] > self.ttl:
+                    self._remove(key)
+                    self.misses += 1
+                    return None
+                now = time.time()
+                os.utime(path, (now, now))
+            except (OSError, ValueError, KeyError):
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries[key] = (now, self._entries[key][1])
+            self.hits += 1
+            return entry['response']
+
+    def put(self, key: str, response: str) -> None:
+        """
+        写入回复，并在超出大小上限时淘汰最久未使用的条目
+
+        Args:
+            key: 缓存键
+            response: 完整的回复文本
+        """
+        data = json.dumps({'created': time.time(), 'response': response}, ensure_ascii=False).encode('utf-8')
+        with self._lock:
+            try:
+                ensure_cache_dir(self.cache_dir)
+                temp_path = self._path(key) + '.tmp'
+                with open(temp_path, 'wb') as f:
+                    f.write(data)
+                os.replace(temp_path, self._path(key))
+            except OSError:
+                return
+            if key in self._entries:
+                self._total_bytes -= self._entries[key][1]
+            self._entries[key] = (time.time(), len(data))
+            self._total_bytes += len(data)
+            self._evict()
+
+    def clear(self) -> None:
+        """删除所有缓存条目"""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def _evict(self) -> None:
+        """按最近使用时间淘汰条目，直到总大小不超过上限"""
+        if self._total_bytes <= self.max_bytes:
+            return
+        for key, _ in sorted(self._entries.items(), key=lambda item: item[1][0]):
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._remove(key)
+
+    def _remove(self, key: str) -> None:
+        """删除单个条目"""
+        _, size = self._entries.pop(key, (0, 0))
+        self._total_bytes -= size
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    @property
+    def hit_rate(self) -> float:
+        """命中率（跳过缓存的请求不计入）"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def format_stats(self) -> str:
+        """
+        生成缓存统计信息
+
+        Returns:
+            str: 统计信息文本
+        """
+        text = (
+            f"模型回复缓存：命中 {self.hits} 次，未命中 {self.misses} 次，命中率 {self.hit_rate:.0%}，"
+            f"当前 {len(self._entries)} 条（{self._total_bytes / 1024:.1f} KB）"
+        )
+        if self.bypassed:
+            text += f"，跳过缓存 {self.bypassed} 次"
+        return text
+
+
+class CachingBackend(LLMBackend):
+    """包装其他后端，完整回复写入缓存，相同请求直接返回缓存内容"""
+
+    name = 'caching'
+
+    def __init__(
+        self,
+        inner: LLMBackend,
+        cache: ResponseCache,
+        fingerprint: Optional[Callable[[], str]] = None
+    ):
+        self.inner = inner
+        self.cache = cache
+        self.fingerprint = fingerprint
+
+    def stream_chat(self, model: str, messages: List[Dict[str, str]]) -> Iterator[str]:
+        key = make_cache_key(model, messages, self.fingerprint() if self.fingerprint else '')
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+        parts: List[str] = []
+        for delta in self.inner.stream_chat(model, messages):
+            parts.append(delta)
+            yield delta
+        # 只有完整接收的回复才写入缓存，调用方提前结束接收时不会执行到这里
+        self.cache.put(key, ''.join(parts))
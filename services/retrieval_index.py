@@ -0,0 +1,280 @@
+"""
+文件检索模块
+
+为项目文件建立本地 BM25 索引，词项来自路径、标识符、导入路径、JSX 组件名、
+路由路径以及中文文本（按二元组切分），并可利用模块依赖图对结果加权。
+可以在毫秒级为用户需求给出候选文件及相关片段，省去让模型挑选文件的往返。
+"""
+
+import math
+import os
+import re
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from services.module_graph import extract_import_specifiers
+
+IDENTIFIER_PATTERN = re.compile(r'[A-Za-z_$][A-Za-z0-9_$]*')
+CAMEL_PATTERN = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+')
+CJK_PATTERN = re.compile(r'[一-鿿]+')
+COMPONENT_PATTERN = re.compile(r'<([A-Z][A-Za-z0-9_.]*)')
+ROUTE_PATTERN = re.compile(r'''path\s*[:=]\s*\{?\s*['"]([^'"]+)['"]''')
+
+# 路径命中的词项单独加分（乘以 idf），不受文件长度归一化的影响
+PATH_BOOST = 2.0
+# 内容中各来源词项的权重（以重复次数体现）
+COMPONENT_WEIGHT = 2
+ROUTE_WEIGHT = 2
+IMPORT_WEIGHT = 2
+
+STOP_WORDS = {
+    'const', 'let', 'var', 'function', 'return', 'import', 'export', 'from', 'default',
+    'if', 'else', 'true', 'false', 'null', 'undefined', 'this', 'new', 'class', 'extends',
+    'props', 'react', 'div', 'span', 'async', 'await', 'src', 'index', 'js', 'jsx', 'ts', 'tsx',
+    'vue', 'the', 'and', 'for', 'of', 'in', 'to', 'a', 'is'
+}
+# 超过该大小的文件只索引路径
+MAX_INDEXED_BYTES = 256 * 1024
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    将文本切分为检索词项
+
+    标识符保留整体并按驼峰/下划线拆分，中文按相邻二字切分。
+
+    Args:
+        text: 要切分的文本
+
+    Returns:
+        List[str]: 小写的词项列表
+    """
+    tokens: List[str] = []
+    for identifier in IDENTIFIER_PATTERN.findall(text):
+        lower = identifier.lower()
+        if lower not in STOP_WORDS:
+            tokens.append(lower)
+        parts = CAMEL_PATTERN.findall(identifier)
+        if len(parts) > 1:
+            tokens.extend(part.lower() for part in parts if part.lower() not in STOP_WORDS)
+    for run in CJK_PATTERN.findall(text):
+        if len(run) == 1:
+            tokens.append(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+@dataclass
+class RetrievalHit:
+    """检索结果"""
+    path: str
+    score: float
+    snippet: str = ''
+
+
+@dataclass
+class _Document:
+    """已索引的单个文件"""
+    mtime_ns: int
+    size: int
+    terms: Counter
+    length: int
+    path_terms: Set[str] = field(default_factory=set)
+
+
+class RetrievalIndex:
+    """项目文件的 BM25 检索索引"""
+
+    def __init__(self, project_path: str, k1: float = 1.5, b: float = 0.75):
+        self.project_path = project_path
+        self.k1 = k1
+        self.b = b
+        self._documents: Dict[str, _Document] = {}
+        self._document_frequency: Counter = Counter()
+        self._total_length = 0
+        # 更新和检索可能来自不同线程
+        self._lock = threading.RLock()
+
+    def update(self, files: Iterable[str]) -> None:
+        """
+        使索引与给定的文件清单一致，只重新索引新增或修改过的文件
+
+        Args:
+            files: 相对于项目根目录的文件路径
+        """
+        # 统一使用 '/' 分隔的路径作为键，与 ModuleGraph 一致（Windows 上文件清单使用 '\\'）
+        wanted = {path.replace('\\', '/') for path in files}
+        with self._lock:
+            for path in [path for path in self._documents if path not in wanted]:
+                self._remove(path)
+            for path in wanted:
+                try:
+                    stat = os.stat(os.path.join(self.project_path, path))
+                except OSError:
+                    if path in self._documents:
+                        self._remove(path)
+                    continue
+                current = self._documents.get(path)
+                if current is not None and current.mtime_ns == stat.st_mtime_ns and current.size == stat.st_size:
+                    continue
+                if current is not None:
+                    self._remove(path)
+                self._add(path, stat.st_mtime_ns, stat.st_size)
+
+    def _add(self, path: str, mtime_ns: int, size: int) -> None:
+        """索引单个文件"""
+        content = ''
+        if size <= MAX_INDEXED_BYTES:
+            try:
+                with open(os.path.join(self.project_path, path), 'r', encoding='utf-8', errors='ignore') as f:
+                    content = f.read()
+            except OSError:
+                content = ''
+
+        path_terms = set(tokenize(path.replace('\\', '/').replace('/', ' ').replace('.', ' ')))
+        terms: Counter = Counter()
+        terms.update(tokenize(content))
+        for name in COMPONENT_PATTERN.findall(content):
+            for token in tokenize(name):
+                terms[token] += COMPONENT_WEIGHT
+        for route in ROUTE_PATTERN.findall(content):
+            for token in tokenize(route.replace('/', ' ')):
+                terms[token] += ROUTE_WEIGHT
+
+        for specifier in extract_import_specifiers(content, path.endswith('.vue')):
+            for token in tokenize(specifier.replace('/', ' ')):
+                terms[token] += IMPORT_WEIGHT
+
+        document = _Document(mtime_ns, size, terms, sum(terms.values()), path_terms)
+        self._documents[path] = document
+        self._document_frequency.update(path_terms.union(terms))
+        self._total_length += document.length
+
+    def _remove(self, path: str) -> None:
+        """从索引中移除单个文件"""
+        document = self._documents.pop(path)
+        self._document_frequency.subtract(document.path_terms.union(document.terms))
+        self._total_length -= document.length
+
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        neighbors: Optional[Callable[[str], Set[str]]] = None,
+        graph_boost: float = 0.3,
+        min_ratio: float = 0.1
+    ) -> List[RetrievalHit]:
+        """
+        检索与需求最相关的文件
+
+        Args:
+            query: 用户需求
+            top_k: 返回的最大结果数
+            neighbors: 返回与文件直接存在导入关系的文件，通常为 ModuleGraph.neighbors
+            graph_boost: 与高分文件存在导入关系的文件获得的加分比例
+            min_ratio: 得分低于最高分该比例的文件不返回
+
+        Returns:
+            List[RetrievalHit]: 按得分从高到低排列的结果（含相关片段）
+        """
+        with self._lock:
+            query_terms = set(tokenize(query))
+            if not query_terms or not self._documents:
+                return []
+
+            document_count = len(self._documents)
+            average_length = self._total_length / document_count or 1
+            scores: Dict[str, float] = {}
+            for path, document in self._documents.items():
+                score = 0.0
+                for term in query_terms:
+                    frequency = document.terms.get(term)
+                    in_path = term in document.path_terms
+                    if not frequency and not in_path:
+                        continue
+                    df = self._document_frequency[term]
+                    idf = math.log(1 + (document_count - df + 0.5) / (df + 0.5))
+                    if in_path:
+                        score += idf * PATH_BOOST
+                    if not frequency:
+                        continue
+                    norm = frequency + self.k1 * (1 - self.b + self.b * document.length / average_length)
+                    score += idf * frequency * (self.k1 + 1) / norm
+                if score > 0:
+                    scores[path] = score
+
+            # 与高分文件存在导入关系的文件往往也需要一起修改
+            boosted = dict(scores)
+            if neighbors is not None:
+                ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+                for path, score in ranked[:top_k]:
+                    for neighbor in neighbors(path):
+                        neighbor = neighbor.replace('\\', '/')
+                        if neighbor in self._documents:
+                            boosted[neighbor] = boosted.get(neighbor, 0.0) + score * graph_boost
+
+            ranked = sorted(boosted.items(), key=lambda item: (-item[1], item[0]))[:top_k]
+            if ranked:
+                cutoff = ranked[0][1] * min_ratio
+                ranked = [(path, score) for path, score in ranked if score >= cutoff]
+            return [RetrievalHit(path, score, self._snippet(path, query_terms)) for path, score in ranked]
+
+    def coverage(self, query: str, paths: Iterable[str]) -> float:
+        """
+        计算给定文件合起来覆盖了需求中多少检索依据
+
+        只统计在项目中出现过的词项，每个词项按 idf 加权：只命中一个罕见词项的文件
+        得分可能很高，但覆盖率仍然很低。
+
+        Args:
+            query: 用户需求
+            paths: 文件相对路径，通常为检索结果
+
+        Returns:
+            float: 0~1 之间的覆盖率，需求中没有项目里出现过的词项时为0
+        """
+        with self._lock:
+            document_count = len(self._documents)
+            weights: Dict[str, float] = {}
+            for term in set(tokenize(query)):
+                df = self._document_frequency[term]
+                if df > 0:
+                    weights[term] = math.log(1 + (document_count - df + 0.5) / (df + 0.5))
+            total = sum(weights.values())
+            if not total:
+                return 0.0
+            matched: Set[str] = set()
+            for path in paths:
+                document = self._documents.get(path.replace('\\', '/'))
+                if document is not None:
+                    matched.update(term for term in weights if term in document.terms or term in document.path_terms)
+            return sum(weights[term] for term in matched) / total
+
+    def _snippet(self, path: str, query_terms: Set[str], max_lines: int = 8) -> str:
+        """
+        提取文件中与需求相关的行
+
+        Args:
+            path: 文件相对路径
+            query_terms: 需求的词项
+            max_lines: 最多返回的行数
+
+        Returns:
+            str: 带行号的相关片段
+        """
+        try:
+            with open(os.path.join(self.project_path, path), 'r', encoding='utf-8', errors='ignore') as f:
+                lines = f.read(MAX_INDEXED_BYTES).split('\n')
+        except OSError:
+            return ''
+
+        scored: List[Tuple[int, int]] = []
+        for number, line in enumerate(lines):
+            overlap = len(query_terms.intersection(tokenize(line)))
+            if overlap:
+                scored.append((overlap, number))
+        chosen = sorted(number for _, number in sorted(scored, key=lambda item: (-item[0], item[1]))[:max_lines])
+        if not chosen:
+            chosen = list(range(min(max_lines, len(lines))))
+        return '\n'.join(f"{number + 1}: {lines[number].strip()[:160]}" for number in chosen)
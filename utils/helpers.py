@@ -6,7 +6,8 @@ import os
 import json
 import subprocess
 import shutil
-from typing import Any, Optional, Dict, List
+from collections import deque
+from typing import Any, Callable, Optional, Dict, List, Tuple
 from pathlib import Path
 
 
@@ -89,6 +90,41 @@ def run_subprocess_command(
     )
 
 
+def stream_subprocess_command(
+    command: List[str],
+    cwd: Optional[str] = None,
+    on_line: Optional[Callable[[str], None]] = print,
+    tail_lines: int = 50
+) -> Tuple[int, List[str]]:
+    """
+    运行子进程命令，逐行转发输出而不在内存中保留全部内容
+    
+    Args:
+        command: 命令列表
+        cwd: 工作目录
+        on_line: 处理每一行输出（stdout 与 stderr 合并）的函数，为None时不转发
+        tail_lines: 保留的最后若干行输出，用于失败时显示
+        
+    Returns:
+        Tuple[int, List[str]]: 退出码和最后若干行输出
+    """
+    tail: deque = deque(maxlen=tail_lines)
+    process = subprocess.Popen(
+        command,
+        cwd=cwd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT
+    )
+    with process.stdout:
+        for raw in iter(process.stdout.readline, b''):
+            line = raw.decode('utf-8', errors='replace').rstrip()
+            tail.append(line)
+            if on_line is not None:
+                on_line(line)
+    return process.wait(), list(tail)
+
+
 def safe_json_loads(json_string: str) -> Optional[Any]:
     """
     安全地解析JSON字符串
@@ -102,4 +138,24 @@ def safe_json_loads(json_string: str) -> Optional[Any]:
     try:
         return json.loads(json_string)
     except (json.JSONDecodeError, TypeError):
-        return None
\ No newline at end of file
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    粗略估算文本的token数量
+    
+    中日韩等非ASCII字符大致按每个字符一个token计算，ASCII文本按每4个字符
+    一个token计算，用于控制提示词长度，不追求与具体模型的分词器一致。
+    
+    Args:
+        text: 要估算的文本
+        
+    Returns:
+        int: 估算的token数量
+    """
+    if not text:
+        return 0
+    ascii_chars = len(text.encode('ascii', 'ignore'))
+    non_ascii_chars = len(text) - ascii_chars
+    return non_ascii_chars + (ascii_chars + 3) // 4